@@ -0,0 +1,62 @@
+"""
+Threshold index over achievement rules.
+
+A rule's condition maps metrics (total_workouts, strength, total_volume,
+...) to minimum values. Rules are indexed per metric in threshold order,
+so when a metric moves from `before` to `after` only the rules whose
+threshold lies in (before, after] are candidates, found by binary search.
+A candidate unlocks once every metric in its condition is met.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+
+class AchievementRules:
+
+    def __init__(self, achievements: Iterable[dict]):
+        self.by_id: Dict[str, dict] = {}
+        index = defaultdict(list)
+        for achievement in achievements:
+            self.by_id[achievement['id']] = achievement
+            for metric, threshold in achievement['condition'].items():
+                index[metric].append((threshold, achievement['id']))
+
+        self._thresholds: Dict[str, List[float]] = {}
+        self._ids: Dict[str, List[str]] = {}
+        for metric, rules in index.items():
+            rules.sort()
+            self._thresholds[metric] = [threshold for threshold, _ in rules]
+            self._ids[metric] = [achievement_id for _, achievement_id in rules]
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self._thresholds)
+
+    @staticmethod
+    def met(achievement: dict, progress: dict) -> bool:
+        return all(progress.get(metric, 0) >= threshold for metric, threshold in achievement['condition'].items())
+
+    def crossed(self, before: dict, after: dict) -> List[dict]:
+        """Rules newly satisfied by moving from `before` to `after`"""
+        found = {}
+        for metric, thresholds in self._thresholds.items():
+            low, high = before.get(metric, 0), after.get(metric, 0)
+            if high <= low:
+                continue
+            ids = self._ids[metric]
+            for achievement_id in ids[bisect_right(thresholds, low):bisect_right(thresholds, high)]:
+                achievement = self.by_id[achievement_id]
+                if achievement_id not in found and self.met(achievement, after):
+                    found[achievement_id] = achievement
+        return list(found.values())
+
+    def satisfied(self, progress: dict) -> List[dict]:
+        """Every rule `progress` meets, for backfilling unlocks"""
+        found = {}
+        for metric, thresholds in self._thresholds.items():
+            for achievement_id in self._ids[metric][:bisect_right(thresholds, progress.get(metric, 0))]:
+                achievement = self.by_id[achievement_id]
+                if achievement_id not in found and self.met(achievement, progress):
+                    found[achievement_id] = achievement
+        return list(found.values())
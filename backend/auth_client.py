@@ -0,0 +1,205 @@
+"""
+Pooled client for the Emergent OAuth session exchange.
+
+One httpx.AsyncClient is shared for the life of the app so logins reuse
+warm connections (HTTP/2 when the `h2` package is installed). A circuit
+breaker stops hammering the auth service while it is down, and recent
+session lookups are cached and de-duplicated so a double-submitted login
+costs one round trip.
+"""
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class AuthServiceUnavailable(Exception):
+    """The auth service failed, timed out, or the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls
+    for `reset_timeout` seconds; then lets one trial call through
+    (half-open) and closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                logger.warning("Auth service circuit opened")
+            self.opened_at = self._clock()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures, "rejected": self.rejected}
+
+
+class OAuthSessionClient:
+    """Resolves an OAuth session_id to the user data returned by the auth service"""
+
+    def __init__(
+        self,
+        url: str,
+        timeout: float = 5.0,
+        connect_timeout: float = 2.0,
+        max_connections: int = 20,
+        cache_ttl: float = 60.0,
+        cache_size: int = 1000,
+        breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.url = url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.breaker = breaker or CircuitBreaker()
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sessions = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    def _http(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                limits=self.limits,
+                transport=self._transport,
+            )
+        return self._client
+
+    def start(self):
+        if not HTTP2_AVAILABLE:
+            logger.warning("h2 is not installed; the auth service client falls back to HTTP/1.1")
+        self._http()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch_session(self, session_id: str) -> Optional[dict]:
+        """
+        User data for `session_id`, or None when the auth service rejects it.
+
+        Raises AuthServiceUnavailable on server errors, invalid responses,
+        timeouts or while the circuit is open.
+        """
+        cached = self._sessions.get(session_id)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get(session_id)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The leading lookup was cancelled rather than this one: look it up again
+                if pending.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.fetch_session(session_id)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[session_id] = future
+        try:
+            data = await self._request(session_id)
+        except Exception as e:
+            future.set_exception(e)
+            # Only waiters see the exception; don't log it as never retrieved
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled (e.g. the client disconnected); waiters must not hang on the future
+            future.cancel()
+            raise
+        else:
+            future.set_result(data)
+            if data is not None:
+                self._sessions.set(session_id, data)
+            return data
+        finally:
+            del self._inflight[session_id]
+
+    async def _request(self, session_id: str) -> Optional[dict]:
+        if not self.breaker.allow():
+            raise AuthServiceUnavailable("Auth service circuit is open")
+
+        self.requests += 1
+        try:
+            response = await self._http().get(self.url, headers={"X-Session-ID": session_id})
+        except httpx.HTTPError as e:
+            self.breaker.record_failure()
+            raise AuthServiceUnavailable(f"Auth service request failed: {str(e)}") from e
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            raise AuthServiceUnavailable(f"Auth service returned {response.status_code}")
+
+        if response.status_code != 200:
+            self.breaker.record_success()
+            return None
+        try:
+            data = response.json()
+        except ValueError as e:
+            self.breaker.record_failure()
+            raise AuthServiceUnavailable("Auth service returned an invalid response") from e
+        self.breaker.record_success()
+        return data
+
+    def stats(self) -> dict:
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "session_cache": self._sessions.stats(),
+            "circuit": self.breaker.stats(),
+        }
@@ -0,0 +1,136 @@
+"""
+Latency and accuracy of the local text plan parser on a labelled corpus.
+
+Usage (from the backend directory):
+    python benchmarks/bench_plan_parser.py
+    python benchmarks/bench_plan_parser.py --llm    # also time the Gemini backend (needs EMERGENT_LLM_KEY)
+
+Accuracy counts an exercise as correct when name, sets, reps, weight and
+category all match the label; only plans at or above the confidence
+threshold are answered by the parser, the rest would go to the LLM.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plan_import import GeminiPlanBackend, PlanUpload, parse_plan_response
+from plan_parser import MIN_CONFIDENCE, parse_text_plan
+
+# (plan text, expected [(name, sets, reps, weight, category)])
+CORPUS = [
+    (
+        "Push Day\nBench Press 4x8-12\nOverhead Press 3x8\nDips 3x10\nTricep Extensions 3x12-15\n",
+        [("Bench Press", 4, "8-12", 0, "push"), ("Overhead Press", 3, "8", 0, "push"),
+         ("Dips", 3, "10", 0, "push"), ("Tricep Extensions", 3, "12-15", 0, "push")],
+    ),
+    (
+        "Pull\n- Deadlift 3 sets of 5 reps @ 140kg\n- Pull-ups 4 x 8\n- Barbell Row 4x8-10 @ 135 lbs\n- Face Pulls 3x15\n- Hammer Curls 3x12\n",
+        [("Deadlift", 3, "5", 140.0, "pull"), ("Pull-ups", 4, "8", 0, "pull"), ("Barbell Row", 4, "8-10", 61.2, "pull"),
+         ("Face Pulls", 3, "15", 0, "pull"), ("Hammer Curls", 3, "12", 0, "pull")],
+    ),
+    (
+        "LEG DAY:\n1. Squat 100kg 5x5\n2. Romanian Deadlift 3x8\n3. Leg Press 4x10-12\n4. Leg Curls 3x12\n5. Calf Raises 4x15\n",
+        [("Squat", 5, "5", 100.0, "legs"), ("Romanian Deadlift", 3, "8", 0, "pull"), ("Leg Press", 4, "10-12", 0, "legs"),
+         ("Leg Curls", 3, "12", 0, "legs"), ("Calf Raises", 4, "15", 0, "legs")],
+    ),
+    (
+        "Upper A\nincline dumbbell press 3×10\nlat pulldown 3×12\nchest fly 3×15\ncable row 3×12\nlateral raises 4×15\n",
+        [("Incline Dumbbell Press", 3, "10", 0, "push"), ("Lat Pulldown", 3, "12", 0, "pull"), ("Chest Fly", 3, "15", 0, "push"),
+         ("Cable Row", 3, "12", 0, "pull"), ("Lateral Raises", 4, "15", 0, "push")],
+    ),
+    (
+        "Full body routine\nFront Squat: 4 x 6 @ 80 kg\nBench Press: 4 x 6 @ 70 kg\nChin-ups: 3 x AMRAP\nHip Thrusts: 3 x 10 @ 100 kg\n",
+        [("Front Squat", 4, "6", 80.0, "legs"), ("Bench Press", 4, "6", 70.0, "push"), ("Chin-ups", 3, "AMRAP", 0, "pull"),
+         ("Hip Thrusts", 3, "10", 100.0, "legs")],
+    ),
+    (
+        "Squat\nBench Press\nDeadlift\nPull-ups\n",
+        [("Squat", 3, "10", 0, "legs"), ("Bench Press", 3, "10", 0, "push"), ("Deadlift", 3, "10", 0, "pull"),
+         ("Pull-ups", 3, "10", 0, "pull")],
+    ),
+    (
+        "Week 1 - Hypertrophy\nMonday (push)\n* Bench 4x10 @ 60kg\n* Incline Press 3x10\n* Push-ups 3x20\n"
+        "Thursday (legs)\n* Bulgarian Split Squat 3x10 each leg\n* Leg Extensions 3x15\n* Glute Bridges 3x12\n",
+        [("Bench", 4, "10", 60.0, "push"), ("Incline Press", 3, "10", 0, "push"), ("Push-ups", 3, "20", 0, "push"),
+         ("Bulgarian Split Squat", 3, "10", 0, "legs"), ("Leg Extensions", 3, "15", 0, "legs"), ("Glute Bridges", 3, "12", 0, "legs")],
+    ),
+    (
+        "My coach says to warm up for ten minutes, then work up to a heavy single on squats before doing "
+        "back-off sets. Finish the day with some core work and stretching.\n",
+        [("Squat", 3, "10", 0, "legs")],
+    ),
+]
+
+
+def _correct(parsed: list, expected: list) -> int:
+    remaining = [(e["name"].lower(), e["sets"], str(e["reps"]), round(float(e.get("weight") or 0), 1), e.get("category"))
+                 for e in parsed]
+    hits = 0
+    for name, sets, reps, weight, category in expected:
+        key = (name.lower(), sets, reps, weight, category)
+        if key in remaining:
+            remaining.remove(key)
+            hits += 1
+    return hits
+
+
+def bench_parser(threshold: float, repeat: int):
+    total = sum(len(expected) for _, expected in CORPUS)
+    routed = routed_total = correct_routed = correct_all = 0
+    timings = []
+    for text, expected in CORPUS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            plan, confidence = parse_text_plan(text)
+        timings.append((time.perf_counter() - start) / repeat)
+        hits = _correct(plan["exercises"], expected)
+        correct_all += hits
+        if confidence >= threshold:
+            routed += 1
+            routed_total += len(expected)
+            correct_routed += hits
+        print(f"  confidence={confidence:<5}  {hits}/{len(expected)} correct  {plan['plan_name']!r}")
+
+    print(f"parser: median {statistics.median(timings) * 1e6:.1f}us, max {max(timings) * 1e6:.1f}us per plan")
+    print(f"parser: {correct_all}/{total} exercises correct overall")
+    print(f"parser: handled {routed}/{len(CORPUS)} plans at threshold {threshold}, "
+          f"{correct_routed}/{routed_total} of their exercises correct")
+
+
+async def bench_llm():
+    backend = GeminiPlanBackend(os.environ.get("EMERGENT_LLM_KEY"))
+    if not backend.configured:
+        print("llm: EMERGENT_LLM_KEY not set, skipping")
+        return
+    total = correct = 0
+    timings = []
+    for i, (text, expected) in enumerate(CORPUS):
+        start = time.perf_counter()
+        response = await backend.extract(PlanUpload.from_bytes(text.encode()), "text/plain", "plan.txt", session_id=f"bench-plan-parser-{i}")
+        timings.append(time.perf_counter() - start)
+        plan = parse_plan_response(response)
+        total += len(expected)
+        correct += _correct(plan.get("exercises", []), expected)
+    print(f"llm: median {statistics.median(timings) * 1e3:.0f}ms, max {max(timings) * 1e3:.0f}ms per plan")
+    print(f"llm: {correct}/{total} exercises correct")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=MIN_CONFIDENCE)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--llm", action="store_true")
+    args = parser.parse_args()
+
+    bench_parser(args.threshold, args.repeat)
+    if args.llm:
+        asyncio.run(bench_llm())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Throughput of the batched XP engine on a synthetic workout history.
+
+Usage (from the backend directory):
+    python benchmarks/bench_xp_engine.py
+    python benchmarks/bench_xp_engine.py --workouts 100000 --users 1000
+
+Workouts are generated as the dicts MongoDB would return and streamed into
+WorkoutColumns, so the load phase includes per-exercise parsing and the
+generator itself. The scalar calculate_workout_xp loop (generator included)
+is timed on a sample for comparison, and its results are checked against
+the vectorized ones.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from progression import progress_for
+from xp_engine import WorkoutColumns, calculate_workout_xp, per_user, workout_rewards
+
+EXERCISES = ["Bench Press", "Squat", "Deadlift", "Overhead Press", "Barbell Row", "Pull-ups", "Lunges", "Dips"]
+REPS = ["5", "8", "10", "12", "8-12", "6-8", "AMRAP", "15"]
+
+
+def synthetic_workouts(count: int, users: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(count):
+        if rng.random() < 0.7:
+            details = {"exercises": [
+                {"name": rng.choice(EXERCISES), "sets": rng.randint(2, 5), "reps": rng.choice(REPS), "weight": rng.choice([0, 20, 40, 60, 80, 100, 140])}
+                for _ in range(rng.randint(1, 6))
+            ]}
+            workout_type = "weightlifting"
+        else:
+            details = {"duration_minutes": rng.randint(10, 90), "distance_km": rng.choice([None, 2.5, 5.0, 10.0, 21.1])}
+            workout_type = "cardio"
+        yield {"id": str(i), "user_id": f"user-{rng.randrange(users)}", "workout_type": workout_type, "details": details}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workouts", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--sample", type=int, default=100_000, help="Workouts scored by the scalar loop")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    columns = WorkoutColumns.from_workouts(synthetic_workouts(args.workouts, args.users))
+    load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rewards = workout_rewards(columns)
+    score = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lifetime_xp = per_user(columns, rewards["xp"]).astype(np.int64).tolist()
+    level = max(progress_for(total)[0] for total in lifetime_xp)
+    replay = time.perf_counter() - start
+
+    sample = min(args.sample, args.workouts)
+    start = time.perf_counter()
+    mismatches = 0
+    for row, workout in enumerate(synthetic_workouts(sample, args.users)):
+        xp, stats = calculate_workout_xp(workout["workout_type"], workout["details"])
+        if xp != rewards["xp"][row] or any(stats[stat] != rewards[stat][row] for stat in stats):
+            mismatches += 1
+    scalar = time.perf_counter() - start
+
+    n = len(columns)
+    print(f"{n} workouts, {len(columns.user_ids)} users, {len(columns.sets)} exercises")
+    print(f"load:   {load:7.2f}s  {n / load:12,.0f} workouts/s  (dicts -> columns)")
+    print(f"score:  {score:7.3f}s  {n / score:12,.0f} workouts/s  (vectorized xp and stats)")
+    print(f"replay: {replay:7.3f}s  {len(lifetime_xp) / replay:12,.0f} users/s  (max level {level})")
+    print(f"scalar: {scalar:7.2f}s  {sample / scalar:12,.0f} workouts/s  (calculate_workout_xp on {sample})")
+    print(f"scalar and vectorized disagree on {mismatches} of {sample} workouts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Exercise catalog: canonical names, aliases and fast lookup.
+
+Free-text exercise names ("bench press", "Barbell Bench", "BB bench") are
+resolved to one canonical catalog name before they are stored, so
+per-exercise statistics don't fragment. The catalog is seeded from the
+push/pull/legs lists shared with the plan parser plus a table of common
+aliases, and builds two in-memory indexes when constructed:
+
+- a sorted list of every word-suffix of every name and alias, so prefix
+  autocomplete ("pre" -> "Bench Press") is a binary search;
+- a trigram index over compact name keys, so misspellings ("benchpres")
+  resolve by trigram overlap without scanning the catalog.
+"""
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from plan_parser import EXERCISE_CATEGORIES
+
+# alias -> canonical name; canonical names must be in EXERCISE_CATEGORIES
+EXERCISE_ALIASES = {
+    "Barbell Bench": "Bench Press", "Barbell Bench Press": "Bench Press", "BB Bench": "Bench Press",
+    "Flat Bench": "Bench Press", "Bench": "Bench Press",
+    "OHP": "Overhead Press", "Military Press": "Overhead Press", "Shoulder Press": "Overhead Press",
+    "Incline Bench": "Incline Press", "Incline Bench Press": "Incline Press",
+    "Decline Bench": "Decline Press", "Decline Bench Press": "Decline Press",
+    "DB Press": "Dumbbell Press", "Dumbbell Bench Press": "Dumbbell Press",
+    "Skull Crushers": "Tricep Extensions", "Tricep Pushdown": "Tricep Extensions", "Triceps Extension": "Tricep Extensions",
+    "Chest Flyes": "Chest Fly", "Pec Fly": "Chest Fly", "Dumbbell Fly": "Chest Fly",
+    "Side Raises": "Lateral Raises", "Lateral Raise": "Lateral Raises",
+    "Press-ups": "Push-ups", "Pushups": "Push-ups",
+    "Pullups": "Pull-ups", "Chinups": "Chin-ups",
+    "Bent Over Row": "Barbell Row", "BB Row": "Barbell Row", "Pendlay Row": "Barbell Row",
+    "DB Row": "Dumbbell Row", "One Arm Row": "Dumbbell Row", "Seated Cable Row": "Cable Row",
+    "Lat Pull Down": "Lat Pulldown", "Pulldown": "Lat Pulldown",
+    "Curls": "Bicep Curls", "Biceps Curl": "Bicep Curls", "Barbell Curl": "Bicep Curls", "Dumbbell Curl": "Bicep Curls",
+    "Conventional Deadlift": "Deadlift", "RDL": "Romanian Deadlift", "Stiff Leg Deadlift": "Romanian Deadlift",
+    "Back Squat": "Squat", "Barbell Squat": "Squat",
+    "Split Squat": "Bulgarian Split Squat", "BSS": "Bulgarian Split Squat",
+    "Hamstring Curls": "Leg Curls", "Lying Leg Curl": "Leg Curls", "Quad Extensions": "Leg Extensions",
+    "Calf Raise": "Calf Raises", "Standing Calf Raise": "Calf Raises",
+    "Glute Bridge": "Glute Bridges", "Hip Thrust": "Hip Thrusts", "Barbell Hip Thrust": "Hip Thrusts",
+    "Hanging Leg Raise": "Leg Raise", "Step Up": "Step-ups",
+}
+
+# Minimum trigram similarity (Dice coefficient) for a misspelling to resolve
+MIN_SIMILARITY = 0.75
+
+SEARCH_LIMIT = 10
+
+
+def _words(name: str) -> List[str]:
+    words = re.split(r"[^a-z0-9]+", (name or "").lower())
+    # Crude singularization: "curls" -> "curl", but "press" stays
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words if w]
+
+
+def compact_key(name: str) -> str:
+    """Spacing, punctuation and plural insensitive key: "Pull-ups" and "pullups" -> "pullup" """
+    key = "".join(_words(name))
+    return key[:-1] if len(key) > 3 and key.endswith("s") and not key.endswith("ss") else key
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ExerciseCatalog:
+
+    def __init__(self, categories: Dict[str, tuple] = EXERCISE_CATEGORIES, aliases: Dict[str, str] = EXERCISE_ALIASES):
+        self.category: Dict[str, str] = {}
+        for category, names in categories.items():
+            for name in names:
+                self.category[name] = category
+
+        # Every spelling the catalog knows: (text, canonical name)
+        spellings = [(name, name) for name in self.category]
+        for alias, name in aliases.items():
+            if name not in self.category:
+                raise ValueError(f"Alias {alias!r} points at unknown exercise {name!r}")
+            spellings.append((alias, name))
+
+        self._exact: Dict[str, str] = {}
+        prefixes = []
+        self._keys: List[Tuple[str, str]] = []
+        self._trigram_index: Dict[str, List[int]] = defaultdict(list)
+        for text, name in spellings:
+            key = compact_key(text)
+            if key in self._exact:
+                continue
+            self._exact[key] = name
+            words = _words(text)
+            for start in range(len(words)):
+                prefixes.append((" ".join(words[start:]), name))
+            key_id = len(self._keys)
+            self._keys.append((key, name))
+            for trigram in _trigrams(key):
+                self._trigram_index[trigram].append(key_id)
+        self._prefixes = sorted(set(prefixes))
+        self._resolved: Dict[str, Optional[str]] = {}
+
+    def __len__(self):
+        return len(self.category)
+
+    def _fuzzy(self, key: str) -> List[Tuple[float, str]]:
+        """(similarity, canonical name) of every spelling sharing a trigram with `key`, best first"""
+        query = _trigrams(key)
+        shared = defaultdict(int)
+        for trigram in query:
+            for key_id in self._trigram_index.get(trigram, ()):
+                shared[key_id] += 1
+        best: Dict[str, float] = {}
+        for key_id, count in shared.items():
+            candidate, name = self._keys[key_id]
+            score = 2 * count / (len(query) + len(_trigrams(candidate)))
+            if score > best.get(name, 0):
+                best[name] = score
+        return sorted(((score, name) for name, score in best.items()), key=lambda hit: (-hit[0], hit[1]))
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Canonical catalog name for free text, or None for exercises the catalog doesn't know"""
+        key = compact_key(name)
+        if key in self._exact:
+            return self._exact[key]
+        if key not in self._resolved:
+            hits = self._fuzzy(key) if key else []
+            if len(self._resolved) >= 4096:
+                self._resolved.clear()
+            self._resolved[key] = hits[0][1] if hits and hits[0][0] >= MIN_SIMILARITY else None
+        return self._resolved[key]
+
+    def canonical_name(self, name: str) -> str:
+        """The catalog name for `name`, else the name itself with tidied whitespace"""
+        return self.resolve(name) or " ".join((name or "").split())
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[dict]:
+        """Autocomplete: prefix matches on any word first, then close misspellings"""
+        prefix = " ".join(_words(query))
+        if not prefix:
+            return []
+        matches = set()
+        i = bisect_left(self._prefixes, (prefix,))
+        while i < len(self._prefixes) and self._prefixes[i][0].startswith(prefix):
+            matches.add(self._prefixes[i][1])
+            i += 1
+        # Names that start with the query first, then shortest
+        ranked = sorted(matches, key=lambda name: (not name.lower().startswith(prefix), len(name), name))
+        found: Dict[str, str] = {name: "prefix" for name in ranked[:limit]}
+        if len(found) < limit:
+            for score, name in self._fuzzy(compact_key(query)):
+                if score < MIN_SIMILARITY / 2 or len(found) >= limit:
+                    break
+                found.setdefault(name, "fuzzy")
+        return [{"name": name, "category": self.category[name], "match": match} for name, match in found.items()]
+
+    def entries(self) -> List[dict]:
+        return [{"name": name, "category": category} for name, category in sorted(self.category.items())]
+
+
+exercise_catalog = ExerciseCatalog()
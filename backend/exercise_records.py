@@ -0,0 +1,122 @@
+"""
+Per-exercise sessions and personal records.
+
+Each weightlifting workout is flattened into one session per exercise
+(sets, volume, best set) for the `exercise_sessions` collection, and the
+sessions are folded into one running record per user and exercise for
+`exercise_records`. Strength is compared by estimated one-rep max using
+Epley's formula, e1RM = weight * (1 + reps / 30).
+"""
+from typing import Dict, Iterable, List, Optional
+
+from exercise_catalog import exercise_catalog
+from xp_engine import parse_reps
+
+
+def exercise_key(name: Optional[str]) -> str:
+    """Lookup key for an exercise name; catalog aliases share their exercise's key"""
+    return exercise_catalog.canonical_name(name).lower()
+
+
+def epley_e1rm(weight: float, reps: int) -> float:
+    """Estimated one-rep max; a single is its own max"""
+    if weight <= 0 or reps <= 0:
+        return 0.0
+    if reps == 1:
+        return float(weight)
+    return round(weight * (1 + reps / 30), 2)
+
+
+def exercise_sets(exercise: dict) -> List[tuple]:
+    """(weight, reps) of every set, honouring per-set weights"""
+    reps = parse_reps(exercise.get('reps', '0'))
+    weights = exercise.get('weights') if exercise.get('useSameWeight') is False else None
+    sets = []
+    for set_index in range(int(exercise.get('sets') or 0)):
+        weight = weights[set_index] if weights and set_index < len(weights) else exercise.get('weight')
+        sets.append((float(weight or 0), reps))
+    return sets
+
+
+def workout_exercise_sessions(workout: dict) -> List[dict]:
+    """One session per distinct exercise in a weightlifting workout"""
+    if workout.get('workout_type') != "weightlifting":
+        return []
+
+    sessions: Dict[str, dict] = {}
+    for exercise in (workout.get('details') or {}).get('exercises') or []:
+        name = exercise_catalog.canonical_name(exercise.get('name'))
+        key = name.lower()
+        if not key:
+            continue
+        session = sessions.get(key)
+        if session is None:
+            session = sessions[key] = {
+                "user_id": workout['user_id'],
+                "exercise": key,
+                "name": name,
+                "workout_id": workout['id'],
+                "performed_at": workout['created_at'],
+                "sets": 0,
+                "reps": 0,
+                "volume": 0.0,
+                "top_weight": 0.0,
+                "best_set": None,
+            }
+        for weight, reps in exercise_sets(exercise):
+            session['sets'] += 1
+            session['reps'] += reps
+            session['volume'] += weight * reps
+            session['top_weight'] = max(session['top_weight'], weight)
+            e1rm = epley_e1rm(weight, reps)
+            if session['best_set'] is None or e1rm > session['best_set']['e1rm']:
+                session['best_set'] = {"weight": weight, "reps": reps, "e1rm": e1rm}
+    return [session for session in sessions.values() if session['sets']]
+
+
+def fold_sessions(sessions: Iterable[dict]) -> Dict[str, dict]:
+    """Per-exercise record contribution of a batch of sessions"""
+    records: Dict[str, dict] = {}
+    for session in sessions:
+        record = records.get(session['exercise'])
+        best_set = {**session['best_set'], "workout_id": session['workout_id'], "performed_at": session['performed_at']}
+        if record is None:
+            records[session['exercise']] = {
+                "name": session['name'],
+                "best_set": best_set,
+                "top_weight": session['top_weight'],
+                "best_session_volume": session['volume'],
+                "total_volume": session['volume'],
+                "sessions": 1,
+                "last_performed_at": session['performed_at'],
+            }
+            continue
+        if best_set['e1rm'] > record['best_set']['e1rm']:
+            record['best_set'] = best_set
+        record['top_weight'] = max(record['top_weight'], session['top_weight'])
+        record['best_session_volume'] = max(record['best_session_volume'], session['volume'])
+        record['total_volume'] += session['volume']
+        record['sessions'] += 1
+        record['last_performed_at'] = max(record['last_performed_at'], session['performed_at'])
+    return records
+
+
+def record_update_pipeline(record: dict, now) -> list:
+    """Update pipeline merging a fold_sessions() contribution into a stored record"""
+    return [
+        {"$set": {
+            "name": {"$ifNull": ["$name", record['name']]},
+            "best_set": {"$cond": [
+                {"$gt": [record['best_set']['e1rm'], {"$ifNull": ["$best_set.e1rm", -1]}]},
+                {"$literal": record['best_set']},
+                "$best_set"
+            ]},
+            "top_weight": {"$max": ["$top_weight", record['top_weight']]},
+            "best_session_volume": {"$max": ["$best_session_volume", record['best_session_volume']]},
+            "total_volume": {"$add": [{"$ifNull": ["$total_volume", 0]}, record['total_volume']]},
+            "sessions": {"$add": [{"$ifNull": ["$sessions", 0]}, record['sessions']]},
+            "last_performed_at": {"$max": ["$last_performed_at", record['last_performed_at']]},
+            "updated_at": now,
+        }},
+        {"$set": {"best_e1rm": "$best_set.e1rm"}},
+    ]
@@ -0,0 +1,219 @@
+"""
+In-process nearest-neighbour index for face login.
+
+Descriptors are L2-normalised once on insert and kept in a contiguous float32
+matrix, so a query is a single matrix-vector product instead of a Python loop
+over user documents. For very large enrolment counts the index can optionally
+partition descriptors into IVF lists (spherical k-means) and only score the
+lists closest to the query.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+DESCRIPTOR_DIM = 128
+
+
+def normalize_descriptor(descriptor, dim: int = DESCRIPTOR_DIM) -> Optional[np.ndarray]:
+    """Return a unit-length float32 copy of the descriptor, or None if unusable"""
+    vec = np.asarray(descriptor, dtype=np.float32)
+    if vec.shape != (dim,):
+        return None
+    norm = float(np.linalg.norm(vec))
+    if not np.isfinite(norm) or norm == 0.0:
+        return None
+    return vec / norm
+
+
+class _Partition:
+    """Growable float32 matrix of unit vectors plus the matching user ids"""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.matrix = np.empty((capacity, dim), dtype=np.float32)
+        self.ids: List[str] = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, user_id: str, vec: np.ndarray) -> int:
+        row = len(self.ids)
+        if row == self.matrix.shape[0]:
+            grown = np.empty((row * 2, self.matrix.shape[1]), dtype=np.float32)
+            grown[:row] = self.matrix[:row]
+            self.matrix = grown
+        self.matrix[row] = vec
+        self.ids.append(user_id)
+        return row
+
+    def remove(self, row: int) -> Optional[str]:
+        """Swap-remove a row; returns the id that moved into `row`, if any"""
+        last = len(self.ids) - 1
+        moved = None
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = self.ids[last]
+            moved = self.ids[row]
+        self.ids.pop()
+        return moved
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        return self.matrix[:len(self.ids)] @ query
+
+
+class FaceIndex:
+    """
+    Cosine-similarity index over face descriptors.
+
+    `search` keeps the login semantics of the original linear scan: the best
+    match wins and it must be strictly above `threshold`.
+
+    With `n_lists > 0` the index switches to approximate IVF mode once
+    `build` sees at least `n_lists * min_points_per_list` descriptors; queries
+    then only score the `n_probe` closest lists.
+    """
+
+    def __init__(
+        self,
+        dim: int = DESCRIPTOR_DIM,
+        threshold: float = 0.6,
+        n_lists: int = 0,
+        n_probe: int = 8,
+        min_points_per_list: int = 39,
+        kmeans_iterations: int = 10,
+        seed: int = 0,
+    ):
+        self.dim = dim
+        self.threshold = threshold
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_points_per_list = min_points_per_list
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        self._centroids: Optional[np.ndarray] = None
+        self._partitions: List[_Partition] = [_Partition(dim)]
+        self._locations: Dict[str, Tuple[int, int]] = {}
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __contains__(self, user_id: str):
+        return user_id in self._locations
+
+    @property
+    def approximate(self) -> bool:
+        return self._centroids is not None
+
+    # ---------- building ----------
+
+    def build(self, entries: Iterable[Tuple[str, List[float]]]):
+        """Replace the index contents, training IVF lists if configured"""
+        ids: List[str] = []
+        rows: List[np.ndarray] = []
+        for user_id, descriptor in entries:
+            vec = normalize_descriptor(descriptor, self.dim)
+            if vec is not None:
+                ids.append(user_id)
+                rows.append(vec)
+
+        matrix = np.vstack(rows) if rows else np.empty((0, self.dim), dtype=np.float32)
+        self._centroids = None
+        if self.n_lists > 0 and len(ids) >= self.n_lists * self.min_points_per_list:
+            self._centroids = self._train_centroids(matrix)
+
+        self._partitions = [_Partition(self.dim) for _ in range(self._n_partitions())]
+        self._locations = {}
+        assignments = self._assign(matrix) if len(ids) else np.empty(0, dtype=np.int64)
+        for user_id, vec, part in zip(ids, matrix, assignments):
+            self._insert(user_id, vec, int(part))
+
+    def _n_partitions(self) -> int:
+        return len(self._centroids) if self._centroids is not None else 1
+
+    def _train_centroids(self, matrix: np.ndarray) -> np.ndarray:
+        """Spherical k-means on (a sample of) the descriptors"""
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(matrix), self.n_lists * 256)
+        sample = matrix[rng.choice(len(matrix), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, self.n_lists, replace=False)].copy()
+
+        for _ in range(self.kmeans_iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            # Keep the previous centroid for lists that ended up empty
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+        return centroids
+
+    def _assign(self, matrix: np.ndarray) -> np.ndarray:
+        if self._centroids is None:
+            return np.zeros(len(matrix), dtype=np.int64)
+        return np.argmax(matrix @ self._centroids.T, axis=1)
+
+    # ---------- incremental updates ----------
+
+    def upsert(self, user_id: str, descriptor: List[float]) -> bool:
+        """Add or replace a user's descriptor; returns False if it is unusable"""
+        vec = normalize_descriptor(descriptor, self.dim)
+        self.remove(user_id)
+        if vec is None:
+            return False
+        self._insert(user_id, vec, int(self._assign(vec[None, :])[0]))
+        return True
+
+    def remove(self, user_id: str):
+        location = self._locations.pop(user_id, None)
+        if location is None:
+            return
+        part, row = location
+        moved = self._partitions[part].remove(row)
+        if moved is not None:
+            self._locations[moved] = (part, row)
+
+    def _insert(self, user_id: str, vec: np.ndarray, part: int):
+        row = self._partitions[part].add(user_id, vec)
+        self._locations[user_id] = (part, row)
+
+    # ---------- queries ----------
+
+    def search(self, descriptor: List[float], candidates: Optional[Iterable[str]] = None) -> Optional[Tuple[str, float]]:
+        """
+        Return (user_id, similarity) of the best match above the threshold.
+
+        `candidates` restricts the search to the given user ids (used for the
+        username hint on login) and is always answered exactly.
+        """
+        query = normalize_descriptor(descriptor, self.dim)
+        if query is None or not self._locations:
+            return None
+
+        if candidates is not None:
+            best = None
+            for user_id in candidates:
+                location = self._locations.get(user_id)
+                if location is None:
+                    continue
+                part, row = location
+                similarity = float(self._partitions[part].matrix[row] @ query)
+                if similarity > self.threshold and (best is None or similarity > best[1]):
+                    best = (user_id, similarity)
+            return best
+
+        if self._centroids is None:
+            probe = [0]
+        else:
+            n_probe = min(self.n_probe, len(self._centroids))
+            probe = np.argpartition(-(self._centroids @ query), n_probe - 1)[:n_probe]
+
+        best = None
+        for part in probe:
+            partition = self._partitions[int(part)]
+            if not len(partition):
+                continue
+            scores = partition.scores(query)
+            row = int(np.argmax(scores))
+            similarity = float(scores[row])
+            if similarity > self.threshold and (best is None or similarity > best[1]):
+                best = (partition.ids[row], similarity)
+        return best
@@ -0,0 +1,83 @@
+"""
+In-memory ranked leaderboard.
+
+Users are kept in a list sorted by (level desc, xp desc, user id), so top-N
+pages are slices and a user's rank is a binary search. Equal level and XP
+share a rank (standard competition ranking: 1, 2, 2, 4).
+"""
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional
+
+LEADERBOARD_FIELDS = ("username", "level", "xp", "strength", "endurance", "agility", "total_workouts")
+
+
+class Leaderboard:
+
+    def __init__(self):
+        self._keys: List[tuple] = []
+        self._entries: Dict[str, dict] = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, user_id: str):
+        return user_id in self._entries
+
+    @staticmethod
+    def _key(user_id: str, entry: dict) -> tuple:
+        return (-entry['level'], -entry['xp'], user_id)
+
+    def load(self, users: Iterable[dict]):
+        """Replace the ranking with the given user documents"""
+        self._entries = {}
+        for user in users:
+            self._entries[user['id']] = self._entry(user)
+        self._keys = sorted(self._key(user_id, entry) for user_id, entry in self._entries.items())
+
+    @staticmethod
+    def _entry(user: dict) -> dict:
+        return {field: user.get(field, 0) for field in LEADERBOARD_FIELDS}
+
+    def update(self, user: dict):
+        """Insert or re-rank a user after their level/XP changed"""
+        entry = self._entry(user)
+        previous = self._entries.get(user['id'])
+        if previous is not None:
+            old_key = self._key(user['id'], previous)
+            if old_key == self._key(user['id'], entry):
+                self._entries[user['id']] = entry
+                return
+            del self._keys[bisect_left(self._keys, old_key)]
+        self._entries[user['id']] = entry
+        insort(self._keys, self._key(user['id'], entry))
+
+    def remove(self, user_id: str):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            del self._keys[bisect_left(self._keys, self._key(user_id, entry))]
+
+    def _rank_of_key(self, key: tuple) -> int:
+        # Everyone strictly ahead on (level, xp) plus one
+        return bisect_left(self._keys, key[:2]) + 1
+
+    def _row(self, key: tuple) -> dict:
+        user_id = key[2]
+        return {"id": user_id, "rank": self._rank_of_key(key), **self._entries[user_id]}
+
+    def page(self, offset: int = 0, limit: int = 10) -> List[dict]:
+        return [self._row(key) for key in self._keys[offset:offset + limit]]
+
+    def rank(self, user_id: str) -> Optional[int]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return self._rank_of_key(self._key(user_id, entry))
+
+    def around(self, user_id: str, radius: int = 3) -> List[dict]:
+        """The user's row with up to `radius` neighbours on each side"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return []
+        position = bisect_left(self._keys, self._key(user_id, entry))
+        start = max(0, position - radius)
+        return [self._row(key) for key in self._keys[start:position + radius + 1]]
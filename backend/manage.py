@@ -0,0 +1,161 @@
+"""
+Operational commands for the Warrior's Way backend.
+
+Usage (from the backend directory):
+    python manage.py ensure-indexes
+    python manage.py index-stats
+    python manage.py rebuild-stats [--user USER_ID]
+    python manage.py migrate-quests [--drop]
+    python manage.py prune-achievements
+    python manage.py recheck-achievements [--user USER_ID]
+    python manage.py recompute-xp [--user USER_ID] [--dry-run]
+    python manage.py migrate-levels
+    python manage.py rebuild-exercises [--user USER_ID]
+    python manage.py canonicalize-exercises [--user USER_ID]
+    python manage.py rebuild-streaks [--user USER_ID]
+"""
+import argparse
+import asyncio
+import json
+
+import server
+
+
+async def ensure_indexes(args):
+    await server.ensure_indexes()
+    print("Indexes ensured")
+
+
+async def index_stats(args):
+    stats = await server.collect_index_stats()
+    if args.json:
+        print(json.dumps(stats, indent=2, default=str))
+        return
+    for collection, indexes in stats["collections"].items():
+        print(collection)
+        for index in indexes:
+            print(f"  {index['ops']:>10}  {index['name']}")
+    scans = stats["query_executor"].get("collectionScans", {})
+    if scans:
+        print(f"collection scans: total={scans.get('total')} non_tailable={scans.get('nonTailable')}")
+
+
+async def rebuild_stats(args):
+    if args.user:
+        user_ids = [args.user]
+    else:
+        user_ids = await server.db.workouts.distinct("user_id")
+    for user_id in user_ids:
+        stats = await server.rebuild_workout_stats(user_id)
+        print(f"{user_id}: {stats.get('total_workouts', 0)} workouts")
+
+
+async def migrate_quests(args):
+    users = await server.migrate_legacy_quests()
+    print(f"Migrated quest progress for {users} users")
+    if args.drop:
+        await server.db.quests.drop()
+        print("Dropped legacy quests collection")
+
+
+async def prune_achievements(args):
+    deleted = await server.prune_legacy_achievements()
+    print(f"Deleted {deleted} locked achievement placeholders")
+
+
+async def recheck_achievements(args):
+    if args.user:
+        user_ids = [args.user]
+    else:
+        user_ids = await server.db.users.distinct("id")
+    for user_id in user_ids:
+        xp = await server.recheck_achievements(user_id)
+        if xp:
+            print(f"{user_id}: +{xp} XP")
+
+
+async def recompute_xp(args):
+    result = await server.recompute_progress(args.user, apply=not args.dry_run)
+    verb = "Would update" if args.dry_run else "Updated"
+    print(f"{verb} {result['workouts_changed']} of {result['workouts']} workouts and "
+          f"{result['users_changed']} of {result['users']} users in {result['seconds']}s")
+    if result['users_skipped']:
+        print(f"Skipped {result['users_skipped']} users whose progress changed meanwhile; run again to retry")
+
+
+async def migrate_levels(args):
+    users = await server.migrate_lifetime_xp()
+    print(f"Derived lifetime XP for {users} users")
+
+
+async def rebuild_exercises(args):
+    if args.user:
+        user_ids = [args.user]
+    else:
+        user_ids = await server.db.workouts.distinct("user_id", {"workout_type": "weightlifting"})
+    for user_id in user_ids:
+        records = await server.rebuild_exercise_index(user_id)
+        print(f"{user_id}: {records} exercises")
+
+
+async def canonicalize_exercises(args):
+    changed = await server.canonicalize_stored_exercises(args.user)
+    print(f"Renamed exercises in {changed} workouts")
+
+
+async def rebuild_streaks(args):
+    query = {"id": args.user} if args.user else {}
+    async for user in server.db.users.find(query, {"_id": 0, "id": 1, "timezone": 1}):
+        streaks = await server.rebuild_streaks(user['id'], server.user_zone(user))
+        longest = {kind: streak['longest'] for kind, streak in streaks.items()}
+        print(f"{user['id']}: {longest or 'no workouts'}")
+
+
+COMMANDS = {
+    "ensure-indexes": ensure_indexes,
+    "index-stats": index_stats,
+    "rebuild-stats": rebuild_stats,
+    "migrate-quests": migrate_quests,
+    "prune-achievements": prune_achievements,
+    "recheck-achievements": recheck_achievements,
+    "recompute-xp": recompute_xp,
+    "migrate-levels": migrate_levels,
+    "rebuild-exercises": rebuild_exercises,
+    "canonicalize-exercises": canonicalize_exercises,
+    "rebuild-streaks": rebuild_streaks,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warrior's Way backend management")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("ensure-indexes", help="Create any missing MongoDB indexes")
+    stats_parser = subparsers.add_parser("index-stats", help="Report index usage counters")
+    stats_parser.add_argument("--json", action="store_true", help="Print raw JSON")
+    rebuild_parser = subparsers.add_parser("rebuild-stats", help="Backfill materialized workout stats")
+    rebuild_parser.add_argument("--user", help="Only rebuild this user id")
+    quests_parser = subparsers.add_parser("migrate-quests", help="Move current quest progress to per-period counters")
+    quests_parser.add_argument("--drop", action="store_true", help="Drop the legacy quests collection afterwards")
+    subparsers.add_parser("prune-achievements", help="Delete locked achievement placeholders left by older versions")
+    recheck_parser = subparsers.add_parser("recheck-achievements", help="Unlock achievements users already qualify for")
+    recheck_parser.add_argument("--user", help="Only recheck this user id")
+    recompute_parser = subparsers.add_parser("recompute-xp", help="Rescore workout history and replay levels")
+    recompute_parser.add_argument("--user", help="Only recompute this user id")
+    recompute_parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    subparsers.add_parser("migrate-levels", help="Store lifetime XP for users that predate it")
+    exercises_parser = subparsers.add_parser("rebuild-exercises", help="Backfill per-exercise sessions and records")
+    exercises_parser.add_argument("--user", help="Only rebuild this user id")
+    canonical_parser = subparsers.add_parser("canonicalize-exercises", help="Rename logged exercises to their catalog names")
+    canonical_parser.add_argument("--user", help="Only rename this user's workouts")
+    streaks_parser = subparsers.add_parser("rebuild-streaks", help="Replay daily and weekly streaks from workout history")
+    streaks_parser.add_argument("--user", help="Only rebuild this user id")
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(COMMANDS[args.command](args))
+    finally:
+        server.client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Training plan import: pluggable LLM backends, response parsing and the
+background job queue that runs imports outside the request cycle.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, Iterator, Optional
+
+from plan_parser import EXERCISE_CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+PLAN_IMPORT_SYSTEM_PROMPT_TEMPLATE = """You are a fitness training plan analyzer. Extract exercise information from uploaded documents and categorize them by muscle group.
+
+            Return ONLY a valid JSON object in this exact format:
+            {
+                "plan_name": "Name of the training plan or 'Imported Plan'",
+                "exercises": [
+                    {"name": "Exercise Name", "sets": 3, "reps": "8-12", "weight": 0, "notes": "any notes", "category": "push"},
+                    ...
+                ]
+            }
+
+            IMPORTANT RULES:
+            - Extract all exercises you can find
+            - Use standard exercise names (e.g., "Bench Press", "Incline Bench Press", "Squat", "Deadlift")
+            - PRESERVE REP RANGES: If the plan shows "8-12" or "10-15" reps, keep the FULL range as a string like "8-12", do NOT simplify to just one number
+            - For sets, use the exact number shown (e.g., 4 sets = 4)
+            - Format examples: "4x8-12" means sets: 4, reps: "8-12" | "3x10" means sets: 3, reps: "10"
+            - Weight should be in kg, use 0 if not specified
+            - If sets/reps are not specified at all, use reasonable defaults (3 sets, "10" reps)
+
+            CATEGORIZATION RULES:
+{category_rules}
+            - If unsure or mixed compound movement, use the primary muscle group (e.g., Deadlift = "pull" because of back emphasis)
+
+            Return ONLY the JSON, no other text"""
+
+PLAN_IMPORT_SYSTEM_PROMPT = PLAN_IMPORT_SYSTEM_PROMPT_TEMPLATE.replace("{category_rules}", "\n".join(
+    f'            - "{category}" category: {", ".join(names)}' for category, names in EXERCISE_CATEGORIES.items()
+))
+
+
+# Changing the prompt changes what the model returns, so it is part of the cache key
+PLAN_PROMPT_VERSION = hashlib.sha256(PLAN_IMPORT_SYSTEM_PROMPT.encode()).hexdigest()[:16]
+
+
+class PlanImportError(Exception):
+    pass
+
+
+def plan_cache_digest(content_type: str, backend):
+    """sha256 seeded with everything besides the file bytes that shapes the model's answer"""
+    digest = hashlib.sha256()
+    for part in (backend.name, backend.model, PLAN_PROMPT_VERSION, content_type):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest
+
+
+def plan_cache_key(content: bytes, content_type: str, backend) -> str:
+    """Content address of an upload: identical bytes sent to the same model and prompt share a result"""
+    digest = plan_cache_digest(content_type, backend)
+    digest.update(content)
+    return digest.hexdigest()
+
+
+class PlanUpload:
+    """
+    An uploaded plan file, hashed as it is written.
+
+    Bytes are held in memory up to `spool_bytes` and then roll over to an
+    anonymous temporary file, which the OS reclaims even if `close()` is
+    never reached. Backends that need a real path use `as_path()`, which
+    removes the named copy when the block exits.
+    """
+
+    def __init__(self, digest=None, spool_bytes: int = 1024 * 1024):
+        self.digest = digest or hashlib.sha256()
+        self.size = 0
+        self._file = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+
+    @classmethod
+    def from_bytes(cls, content: bytes, digest=None) -> "PlanUpload":
+        upload = cls(digest, spool_bytes=len(content) + 1)
+        upload.write(content)
+        return upload
+
+    @property
+    def key(self) -> str:
+        return self.digest.hexdigest()
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self.digest.update(chunk)
+        self.size += len(chunk)
+
+    def read(self) -> bytes:
+        self._file.seek(0)
+        return self._file.read()
+
+    @contextmanager
+    def as_path(self, suffix: str = "") -> Iterator[str]:
+        with tempfile.NamedTemporaryFile(suffix=suffix) as tmp:
+            self._file.seek(0)
+            while chunk := self._file.read(64 * 1024):
+                tmp.write(chunk)
+            tmp.flush()
+            yield tmp.name
+
+    def close(self):
+        self._file.close()
+
+
+def parse_plan_response(response: str) -> dict:
+    """Extract the plan JSON from a model response, tolerating code fences and chatter"""
+    response_text = response.strip()
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    if response_text.startswith("```"):
+        response_text = response_text[3:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+
+    try:
+        return json.loads(response_text.strip())
+    except json.JSONDecodeError:
+        # Try to find JSON in the response
+        json_match = re.search(r'\{[\s\S]*\}', response_text)
+        if json_match:
+            try:
+                return json.loads(json_match.group())
+            except json.JSONDecodeError:
+                pass
+        raise PlanImportError("Failed to parse AI response")
+
+
+# ==================== BACKENDS ====================
+
+class GeminiPlanBackend:
+    """Gemini through emergentintegrations (supports PDF and image attachments)"""
+
+    name = "gemini"
+    model = "gemini-2.5-flash"
+
+    def __init__(self, api_key: Optional[str]):
+        self.api_key = api_key
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    async def extract(self, upload: PlanUpload, content_type: str, filename: str, session_id: str) -> str:
+        from emergentintegrations.llm.chat import LlmChat, UserMessage, FileContentWithMimeType
+
+        chat = LlmChat(
+            api_key=self.api_key,
+            session_id=session_id,
+            system_message=PLAN_IMPORT_SYSTEM_PROMPT
+        ).with_model("gemini", self.model)
+
+        # For text files, send the content directly
+        if content_type == 'text/plain':
+            text_content = upload.read().decode('utf-8', errors='ignore')
+            user_message = UserMessage(
+                text=f"Please analyze this training plan text and extract all exercises with their sets, reps, and weights. Return the data as JSON.\n\nTraining Plan Content:\n{text_content}"
+            )
+            return await chat.send_message(user_message)
+
+        with upload.as_path(suffix=Path(filename or "").suffix) as tmp_path:
+            file_attachment = FileContentWithMimeType(
+                file_path=tmp_path,
+                mime_type=content_type
+            )
+            user_message = UserMessage(
+                text="Please analyze this training plan document and extract all exercises with their sets, reps, and weights. Return the data as JSON.",
+                file_contents=[file_attachment]
+            )
+            return await chat.send_message(user_message)
+
+
+class FakePlanBackend:
+    """
+    Deterministic local backend for tests and development.
+
+    Returns `response` verbatim when given; otherwise echoes one exercise per
+    non-empty line of a text upload. `failures` makes the first N calls raise
+    so retry handling can be exercised.
+    """
+
+    name = "fake"
+    model = "fake"
+    configured = True
+
+    def __init__(self, response: Optional[str] = None, delay: float = 0.0, failures: int = 0):
+        self.response = response
+        self.delay = delay
+        self.failures = failures
+        self.calls = 0
+
+    async def extract(self, upload: PlanUpload, content_type: str, filename: str, session_id: str) -> str:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise RuntimeError("Fake backend failure")
+        if self.response is not None:
+            return self.response
+
+        exercises = []
+        if content_type == 'text/plain':
+            for line in upload.read().decode('utf-8', errors='ignore').splitlines():
+                if line.strip():
+                    exercises.append({"name": line.strip(), "sets": 3, "reps": "10", "weight": 0, "category": None})
+        return json.dumps({"plan_name": Path(filename or "Imported Plan").stem, "exercises": exercises})
+
+
+def create_plan_backend(name: str, api_key: Optional[str]):
+    if name == "fake":
+        return FakePlanBackend()
+    if name == "gemini":
+        return GeminiPlanBackend(api_key)
+    raise ValueError(f"Unknown plan import backend: {name}")
+
+
+# ==================== JOB QUEUE ====================
+
+class JobQueue:
+    """
+    Bounded in-process queue drained by a fixed pool of worker tasks.
+
+    `handler(job, attempt)` is retried with exponential backoff up to
+    `max_attempts`; after the last failure `on_failure(job, error)` is called.
+    Errors listed in `fatal_errors` are not retried. `on_done(job)` runs
+    once a job is finished either way, e.g. to release its resources.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[dict, int], Awaitable[None]],
+        on_failure: Callable[[dict, Exception], Awaitable[None]],
+        workers: int = 2,
+        max_size: int = 100,
+        max_attempts: int = 3,
+        retry_delay: float = 1.0,
+        fatal_errors: tuple = (),
+        on_done: Optional[Callable[[dict], None]] = None,
+    ):
+        self.handler = handler
+        self.on_failure = on_failure
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.fatal_errors = fatal_errors
+        self.on_done = on_done
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._tasks = []
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+
+    def submit(self, job: dict):
+        """Enqueue a job; raises asyncio.QueueFull when the backlog is at capacity"""
+        self._queue.put_nowait(job)
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs never started are abandoned; still release what they hold
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            self._queue.task_done()
+            if self.on_done:
+                self.on_done(job)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            self.active += 1
+            try:
+                await self._run(job)
+            finally:
+                self.active -= 1
+                self._queue.task_done()
+                if self.on_done:
+                    self.on_done(job)
+
+    async def _run(self, job: dict):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self.handler(job, attempt)
+                self.completed += 1
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt == self.max_attempts or isinstance(e, self.fatal_errors):
+                    self.failed += 1
+                    try:
+                        await self.on_failure(job, e)
+                    except Exception:
+                        logger.exception("Job failure handler raised")
+                    return
+                self.retries += 1
+                logger.warning(f"Job attempt {attempt} failed, retrying: {str(e)}")
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "active": self.active,
+            "workers": self.workers,
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+        }
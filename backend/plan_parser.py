@@ -0,0 +1,232 @@
+"""
+Rule-based parser for plain-text training plans.
+
+Most text uploads are one exercise per line ("Bench Press 4x8-12 @ 80kg"),
+which can be parsed in-process without a model call. Every line is scored,
+and the plan's confidence is the average score. Callers fall back to the
+LLM when confidence is below their threshold.
+"""
+import re
+from typing import List, Optional, Tuple
+
+# Shared with the LLM extraction prompt so both paths categorize the same way.
+# Editing this table rewrites the prompt and so changes PLAN_PROMPT_VERSION,
+# which starts a fresh plan cache. Compared with the original hand-written
+# prompt, row and deadlift variants are listed individually and "Lateral
+# Raises" is listed under push.
+EXERCISE_CATEGORIES = {
+    "push": (
+        "Bench Press", "Overhead Press", "Incline Press", "Decline Press", "Dumbbell Press", "Dips",
+        "Tricep Extensions", "Chest Fly", "Shoulder Raises", "Lateral Raises", "Push-ups", "Cable Crossover",
+    ),
+    "pull": (
+        "Pull-ups", "Chin-ups", "Barbell Row", "Dumbbell Row", "Cable Row", "T-Bar Row", "Lat Pulldown",
+        "Face Pulls", "Bicep Curls", "Hammer Curls", "Shrugs", "Deadlift", "Sumo Deadlift", "Romanian Deadlift",
+    ),
+    "legs": (
+        "Squat", "Front Squat", "Leg Press", "Lunges", "Bulgarian Split Squat", "Leg Curls", "Leg Extensions",
+        "Calf Raises", "Glute Bridges", "Hip Thrusts", "Leg Raise", "Step-ups",
+    ),
+}
+
+# Single-word fallbacks and abbreviations, used when no name above matches
+CATEGORY_FALLBACKS = {
+    "bench": "push", "press": "push", "fly": "push", "raise": "push", "extension": "push", "pushdown": "push",
+    "tricep": "push", "chest": "push", "ohp": "push",
+    "row": "pull", "curl": "pull", "pulldown": "pull", "pullup": "pull", "chinup": "pull", "bicep": "pull",
+    "rdl": "pull",
+    "squat": "legs", "lunge": "legs", "calf": "legs", "glute": "legs", "hamstring": "legs", "nordic": "legs",
+}
+
+# Plans scoring below this should be sent to the LLM instead
+MIN_CONFIDENCE = 0.8
+
+LB_TO_KG = 0.45359237
+
+_REPS = r"(?P<reps>\d{1,3}(?:\s*[-–]\s*\d{1,3})?|amrap|max|failure)"
+_SCHEMES = [
+    # 4x8-12, 4 x 8–12, 3×10
+    re.compile(r"(?<![\d.])(?P<sets>\d{1,2})\s*[x×*]\s*" + _REPS + r"(?:\s*reps?)?(?![\d.])", re.I),
+    # 3 sets of 10, 3 sets x 8-12 reps
+    re.compile(r"(?<![\d.])(?P<sets>\d{1,2})\s*sets?\s*(?:of|x|×)?\s*" + _REPS + r"(?:\s*(?:reps?|repetitions))?(?![\d.])", re.I),
+    # 10 reps x 3 sets
+    re.compile(_REPS + r"\s*reps?\s*[x×,]?\s*(?P<sets>\d{1,2})\s*sets?\b", re.I),
+]
+_WEIGHT = re.compile(r"@?\s*(?P<weight>\d+(?:[.,]\d+)?)\s*(?P<unit>kgs?|kilos?|lbs?|pounds?)\b", re.I)
+_BODYWEIGHT = re.compile(r"@?\s*\b(?:bw|bodyweight|body weight)\b", re.I)
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•·]+|\d{1,2}[.)])\s*")
+_HEADING_WORDS = re.compile(
+    r"\b(?:day|week|workout|session|routine|program|programme|plan|split"
+    r"|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
+    re.I
+)
+_SECTION_WORDS = {"push": "push", "pull": "pull", "leg": "legs"}
+_SEPARATORS = " \t:-–—|,;@"
+
+
+def _tokens(text: str) -> List[str]:
+    tokens = re.split(r"[^a-z0-9]+", text.lower().replace("-", ""))
+    # Crude singularization: "lunges" -> "lunge", but "press" stays
+    return [t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t for t in tokens if t]
+
+
+def _phrase_table() -> List[Tuple[Tuple[str, ...], str]]:
+    phrases = [(tuple(_tokens(name)), category) for category, names in EXERCISE_CATEGORIES.items() for name in names]
+    # Longest phrase first so "leg curl" beats "bicep curls" style partial matches
+    return sorted(phrases, key=lambda phrase: -len(phrase[0]))
+
+
+_PHRASES = _phrase_table()
+
+
+def categorize_exercise(name: str, section: Optional[str] = None) -> Optional[str]:
+    """
+    push, pull or legs for an exercise name, else None.
+
+    Names from EXERCISE_CATEGORIES win, then the plan section the exercise
+    is listed under (e.g. "Leg Day"), then single-word fallbacks.
+    """
+    tokens = _tokens(name)
+    for phrase, category in _PHRASES:
+        n = len(phrase)
+        for i in range(len(tokens) - n + 1):
+            if tuple(tokens[i:i + n]) == phrase:
+                return category
+    if section:
+        return section
+    return next((CATEGORY_FALLBACKS[t] for t in tokens if t in CATEGORY_FALLBACKS), None)
+
+
+def _clean(text: str) -> str:
+    text = re.sub(r"\s+", " ", text).strip(_SEPARATORS)
+    # "(pause at chest)" -> "pause at chest"
+    if text.startswith("(") and text.endswith(")") and text.count("(") == 1:
+        text = text[1:-1]
+    return text.strip(_SEPARATORS + "()")
+
+
+def _tidy_name(name: str) -> str:
+    return name.title() if name.islower() else name
+
+
+def _parse_weight(text: str) -> Tuple[float, str]:
+    """Weight in kg and the text with the weight removed"""
+    match = _WEIGHT.search(text)
+    if match:
+        weight = float(match.group("weight").replace(",", "."))
+        if match.group("unit").lower().startswith(("lb", "pound")):
+            weight = round(weight * LB_TO_KG, 1)
+        return weight, text[:match.start()] + " " + text[match.end():]
+    match = _BODYWEIGHT.search(text)
+    if match:
+        return 0, text[:match.start()] + " " + text[match.end():]
+    return 0, text
+
+
+def parse_exercise_line(line: str, section: Optional[str] = None) -> Optional[Tuple[dict, float]]:
+    """
+    Parse one line into an exercise and a 0-1 score.
+
+    Returns None for lines without a sets x reps scheme; those are headings,
+    bare exercise names or prose, which `parse_text_plan` scores itself.
+    """
+    for scheme in _SCHEMES:
+        match = scheme.search(line)
+        if match:
+            break
+    else:
+        return None
+
+    sets = int(match.group("sets"))
+    reps = re.sub(r"\s*[-–]\s*", "-", match.group("reps"))
+    if not reps[0].isdigit():
+        reps = reps.upper() if reps.lower() == "amrap" else reps.lower()
+    elif not all(1 <= int(r) <= 100 for r in reps.split("-")):
+        return None
+    if not 1 <= sets <= 20:
+        return None
+
+    before, after = line[:match.start()], line[match.end():]
+    if _WEIGHT.search(after) or _BODYWEIGHT.search(after):
+        weight, after = _parse_weight(after)
+    else:
+        # "Squat 100kg 5x5"
+        weight, before = _parse_weight(before)
+
+    name, notes = _clean(before), _clean(after)
+    if not name:
+        # "4x8 Bench Press"
+        name, notes = notes, ""
+    if not re.search(r"[a-z]", name, re.I):
+        return None
+
+    exercise = {
+        "name": _tidy_name(name),
+        "sets": sets,
+        "reps": reps,
+        "weight": weight,
+        "notes": notes or None,
+        "category": categorize_exercise(name, section),
+    }
+    # An unrecognized exercise name is better categorized by the model
+    return exercise, 1.0 if categorize_exercise(name) else 0.5
+
+
+def parse_text_plan(text: str) -> Tuple[dict, float]:
+    """
+    Parse a plain-text plan into the import JSON shape.
+
+    Returns the plan and a confidence in [0, 1]: the mean line score, where
+    fully parsed known exercises score 1, bare known exercise names 0.75
+    (default sets and reps), unrecognized exercise names 0.5 and
+    unparseable lines 0.
+    Headings are not scored but set the plan name and section category.
+    """
+    plan_name = None
+    section = None
+    exercises = []
+    scores = []
+
+    for raw in text.splitlines():
+        line = _LIST_MARKER.sub("", raw).strip()
+        if not line:
+            continue
+
+        parsed = parse_exercise_line(line, section)
+        if parsed:
+            exercise, score = parsed
+            exercises.append(exercise)
+            scores.append(score)
+            continue
+
+        is_heading = (
+            line.endswith(":")
+            or _HEADING_WORDS.search(line)
+            or (plan_name is None and not exercises and categorize_exercise(line) is None)
+        )
+        if is_heading and len(line) <= 60:
+            heading = _clean(line)
+            if plan_name is None and not exercises:
+                plan_name = heading
+            words = _tokens(heading)
+            section = next((_SECTION_WORDS[w] for w in words if w in _SECTION_WORDS), section)
+            if {"upper", "lower", "full"} & set(words):
+                section = None
+            continue
+
+        if len(line) <= 40 and categorize_exercise(line):
+            # Bare exercise name; use the same defaults the model is told to
+            exercises.append({
+                "name": _tidy_name(_clean(line)),
+                "sets": 3,
+                "reps": "10",
+                "weight": 0,
+                "notes": None,
+                "category": categorize_exercise(line, section),
+            })
+            scores.append(0.75)
+        else:
+            scores.append(0.0)
+
+    confidence = sum(scores) / len(scores) if exercises else 0.0
+    return {"plan_name": plan_name or "Imported Plan", "exercises": exercises}, round(confidence, 3)
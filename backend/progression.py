@@ -0,0 +1,103 @@
+"""
+Level curve in closed form.
+
+Reaching level L + 1 from L costs XP_BASE + (L - 1) * XP_STEP, an
+arithmetic series, so the lifetime XP needed to reach level L is
+
+    C(L) = XP_BASE * n + XP_STEP * n * (n - 1) / 2,   n = L - 1
+         = 75n^2 + 25n                                 (base 100, step 150)
+
+Users store `lifetime_xp` as the single source of truth; `level`, `xp`
+(progress into the current level) and `xp_to_next_level` are derived from
+it, both here and inside MongoDB update pipelines so XP can be granted with
+one atomic update.
+"""
+from math import isqrt
+from typing import Tuple
+
+XP_BASE = 100
+XP_STEP = 150
+
+
+def xp_to_level(level: int) -> int:
+    """XP needed to go from `level` to the next one"""
+    # Harder progression: Level 1 = 100, Level 2 = 250, Level 3 = 450, etc.
+    return XP_BASE + (level - 1) * XP_STEP
+
+
+def xp_to_reach(level: int) -> int:
+    """Lifetime XP at which `level` starts"""
+    n = level - 1
+    return XP_BASE * n + XP_STEP * n * (n - 1) // 2
+
+
+def level_for(lifetime_xp: int) -> int:
+    """Largest level whose start is at or below `lifetime_xp`"""
+    if lifetime_xp <= 0:
+        return 1
+    # Positive root of (XP_STEP/2) n^2 + (XP_BASE - XP_STEP/2) n - T = 0
+    b = 2 * XP_BASE - XP_STEP
+    n = (isqrt(b * b + 8 * XP_STEP * lifetime_xp) - b) // (2 * XP_STEP)
+    while xp_to_reach(n + 2) <= lifetime_xp:
+        n += 1
+    while n > 0 and xp_to_reach(n + 1) > lifetime_xp:
+        n -= 1
+    return n + 1
+
+
+def progress_for(lifetime_xp: int) -> Tuple[int, int, int]:
+    """(level, xp into that level, xp_to_next_level) for a lifetime XP total"""
+    level = level_for(lifetime_xp)
+    return level, max(lifetime_xp, 0) - xp_to_reach(level), xp_to_level(level)
+
+
+def level_fields(lifetime_xp: int) -> dict:
+    level, xp, xp_to_next = progress_for(lifetime_xp)
+    return {"lifetime_xp": lifetime_xp, "level": level, "xp": xp, "xp_to_next_level": xp_to_next}
+
+
+def lifetime_xp_of(user: dict) -> int:
+    """A user's lifetime XP, derived from level and xp for documents that predate it"""
+    if user.get('lifetime_xp') is not None:
+        return user['lifetime_xp']
+    return xp_to_reach(user.get('level', 1)) + user.get('xp', 0)
+
+
+# ---- MongoDB aggregation expressions ----
+
+def _reach_expr(level) -> dict:
+    n = {"$subtract": [level, 1]}
+    return {"$toLong": {"$add": [
+        {"$multiply": [XP_BASE, n]},
+        {"$divide": [{"$multiply": [XP_STEP, n, {"$subtract": [n, 1]}]}, 2]}
+    ]}}
+
+
+LIFETIME_XP_EXPR = {"$ifNull": ["$lifetime_xp", {"$add": [_reach_expr({"$ifNull": ["$level", 1]}), {"$ifNull": ["$xp", 0]}]}]}
+
+
+def level_stages() -> list:
+    """Pipeline stages deriving level, xp and xp_to_next_level from $lifetime_xp"""
+    b = 2 * XP_BASE - XP_STEP
+    estimate = {"$add": [
+        {"$floor": {"$divide": [
+            {"$subtract": [{"$sqrt": {"$add": [b * b, {"$multiply": [8 * XP_STEP, {"$max": ["$lifetime_xp", 0]}]}]}}, b]},
+            2 * XP_STEP
+        ]}},
+        1
+    ]}
+    # Correct the floating point estimate by at most one level either way
+    level = {"$let": {"vars": {"l": estimate}, "in": {"$switch": {
+        "branches": [
+            {"case": {"$gt": [_reach_expr("$$l"), "$lifetime_xp"]}, "then": {"$max": [{"$subtract": ["$$l", 1]}, 1]}},
+            {"case": {"$lte": [_reach_expr({"$add": ["$$l", 1]}), "$lifetime_xp"]}, "then": {"$add": ["$$l", 1]}},
+        ],
+        "default": "$$l"
+    }}}}
+    return [
+        {"$set": {"level": {"$toInt": level}}},
+        {"$set": {
+            "xp": {"$toInt": {"$subtract": [{"$max": ["$lifetime_xp", 0]}, _reach_expr("$level")]}},
+            "xp_to_next_level": {"$toInt": {"$add": [XP_BASE, {"$multiply": [{"$subtract": ["$level", 1]}, XP_STEP]}]}}
+        }},
+    ]
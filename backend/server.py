@@ -1,20 +1,44 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Request, Response
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File, Request, Response, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 import os
+import asyncio
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, ValidationError
 from typing import List, Optional
 import uuid
-from datetime import datetime, timezone, timedelta
-import bcrypt
+from datetime import datetime, date, timezone, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import jwt
+import numpy as np
 import base64
-import tempfile
-import httpx
+import codecs
+import copy
+import csv
+import io
+import json
+import zlib
+
+from achievements import AchievementRules
+from auth_client import AuthServiceUnavailable, CircuitBreaker, OAuthSessionClient
+from cache import TTLCache
+from exercise_catalog import exercise_catalog
+from exercise_records import exercise_key, fold_sessions, record_update_pipeline, workout_exercise_sessions
+from face_index import FaceIndex
+from leaderboard import LEADERBOARD_FIELDS, Leaderboard
+from passwords import PasswordHasher, PasswordHasherBusy
+from sessions import SessionStore
+from plan_import import JobQueue, PlanUpload, create_plan_backend, parse_plan_response, plan_cache_digest
+from plan_parser import MIN_CONFIDENCE, parse_text_plan
+from progression import LIFETIME_XP_EXPR, level_fields, level_stages, lifetime_xp_of
+from streaks import advance_streaks, local_date, replay_streaks, streak_metrics, streak_periods, streak_stages, streak_view
+from xp_engine import TYPE_WEIGHTLIFTING, WorkoutColumns, calculate_workout_volume, calculate_workout_xp, per_user, workout_rewards
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -29,11 +53,85 @@ JWT_SECRET = os.environ.get('JWT_SECRET', 'training-hero-secret-key-2024')
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# bcrypt cost; stored hashes with a different cost are upgraded on the next login
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', '2'))
+BCRYPT_MAX_PENDING = 64
+
+# Admin key for operational endpoints (disabled when unset)
+ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY')
+
 # LLM Key for AI features
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
 
-# Emergent Auth URL
-EMERGENT_AUTH_URL = "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+# Training plan import pipeline ("gemini" or the local "fake" backend for tests)
+PLAN_IMPORT_BACKEND = os.environ.get('PLAN_IMPORT_BACKEND', 'gemini')
+PLAN_IMPORT_WORKERS = int(os.environ.get('PLAN_IMPORT_WORKERS', '2'))
+PLAN_IMPORT_QUEUE_SIZE = int(os.environ.get('PLAN_IMPORT_QUEUE_SIZE', '100'))
+PLAN_IMPORT_MAX_ATTEMPTS = 3
+PLAN_IMPORT_TIMEOUT_SECONDS = 120
+PLAN_IMPORT_STALE_SECONDS = 15 * 60
+
+# Plan uploads are read in chunks; past the spool size they are buffered on disk, not in memory
+PLAN_IMPORT_MAX_BYTES = int(os.environ.get('PLAN_IMPORT_MAX_BYTES', str(20 * 1024 * 1024)))
+PLAN_IMPORT_SPOOL_BYTES = 1024 * 1024
+PLAN_IMPORT_CHUNK_BYTES = 64 * 1024
+
+# Text plans the local parser is at least this confident about skip the LLM
+PLAN_PARSER_MIN_CONFIDENCE = float(os.environ.get('PLAN_PARSER_MIN_CONFIDENCE', str(MIN_CONFIDENCE)))
+
+# Parsed plans are cached by content hash; MongoDB keeps the most recently used entries
+PLAN_CACHE_MAX_ENTRIES = int(os.environ.get('PLAN_CACHE_MAX_ENTRIES', '5000'))
+PLAN_CACHE_MEMORY_SIZE = 256
+PLAN_CACHE_MEMORY_TTL_SECONDS = 300
+
+# Emergent Auth URL (override to point tests at a local stub)
+EMERGENT_AUTH_URL = os.environ.get('EMERGENT_AUTH_URL', "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data")
+EMERGENT_AUTH_TIMEOUT_SECONDS = 5.0
+EMERGENT_AUTH_MAX_CONNECTIONS = int(os.environ.get('EMERGENT_AUTH_MAX_CONNECTIONS', '20'))
+EMERGENT_AUTH_SESSION_CACHE_SECONDS = 60
+# Consecutive failures before logins stop calling the auth service, and for how long
+EMERGENT_AUTH_BREAKER_FAILURES = 5
+EMERGENT_AUTH_BREAKER_RESET_SECONDS = 30
+
+# Face login index: set FACE_INDEX_LISTS > 0 to enable approximate (IVF) search
+FACE_MATCH_THRESHOLD = 0.6
+FACE_INDEX_LISTS = int(os.environ.get('FACE_INDEX_LISTS', '0'))
+FACE_INDEX_PROBES = int(os.environ.get('FACE_INDEX_PROBES', '8'))
+FACE_INDEX_SYNC_SECONDS = 5
+
+# Calendar date ranges
+CALENDAR_DEFAULT_DAYS = 365
+CALENDAR_MAX_DAYS = 731
+
+# Leaderboard reads re-sync from MongoDB at most this often unless this worker wrote
+LEADERBOARD_SYNC_SECONDS = 2
+LEADERBOARD_PAGE_MAX = 100
+
+# Bulk workout import limits
+IMPORT_MAX_BYTES = 50 * 1024 * 1024
+IMPORT_MAX_WORKOUTS = 20000
+IMPORT_CHUNK_SIZE = 500
+IMPORT_MAX_ERRORS = 100
+
+# Workouts fetched per cursor batch while exporting
+EXPORT_BATCH_SIZE = 500
+
+# Largest page GET /workouts will return
+WORKOUTS_PAGE_MAX = 200
+
+# Largest page GET /exercises/{name}/history will return
+EXERCISE_HISTORY_MAX = 200
+
+# Authenticated-user cache; other workers' writes become visible after the TTL
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', '10000'))
+USER_CACHE_TTL_SECONDS = float(os.environ.get('USER_CACHE_TTL_SECONDS', '30'))
+
+# Cookie session cache; a logout on another worker takes effect here after the TTL
+SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', '10000'))
+SESSION_CACHE_TTL_SECONDS = float(os.environ.get('SESSION_CACHE_TTL_SECONDS', '60'))
+SESSION_NEGATIVE_TTL_SECONDS = 10
+SESSION_DAYS = 7
 
 # Create the main app
 app = FastAPI(title="Warrior's Way API")
@@ -113,7 +211,8 @@ class WorkoutResponse(BaseModel):
     xp_earned: int
     stats_gained: dict
     created_at: str
-    details: dict
+    session_category: Optional[str] = None
+    details: dict = Field(default_factory=dict)  # Omitted by the summary view
 
 class Achievement(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -142,13 +241,24 @@ class StatsUpdate(BaseModel):
     endurance: Optional[int] = None
     agility: Optional[int] = None
 
+class TimezoneUpdate(BaseModel):
+    timezone: str  # IANA name, e.g. "Europe/Paris"
+
 # ==================== HELPERS ====================
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+password_hasher = PasswordHasher(rounds=BCRYPT_ROUNDS, workers=BCRYPT_WORKERS, max_pending=BCRYPT_MAX_PENDING)
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please try again")
+
+async def verify_password(password: str, hashed: str) -> bool:
+    try:
+        return await password_hasher.verify(password, hashed)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please try again")
 
 def create_token(user_id: str, expires_delta: timedelta = None) -> str:
     if expires_delta is None:
@@ -176,47 +286,191 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-def calculate_xp_to_level(level: int) -> int:
-    # Harder progression: Level 1 = 100, Level 2 = 250, Level 3 = 450, etc.
-    return 100 + (level - 1) * 150
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
 
-def calculate_workout_xp(workout_type: str, details: dict) -> tuple:
-    """Calculate XP and stat gains from workout"""
-    xp = 0
-    stats = {"strength": 0, "endurance": 0, "agility": 0}
-    
-    if workout_type == "weightlifting":
-        # XP based on total volume (sets * reps * weight)
-        total_volume = 0
-        for e in details.get('exercises', []):
-            sets = e.get('sets', 0)
-            # Handle rep ranges like "8-12" - use the higher number for XP calc
-            reps_str = str(e.get('reps', '0'))
-            if '-' in reps_str:
-                reps = int(reps_str.split('-')[-1])  # Use higher end of range
-            else:
-                try:
-                    reps = int(reps_str)
-                except:
-                    reps = 10
-            weight = e.get('weight', 0)
-            total_volume += sets * reps * weight
-        
-        xp = min(int(total_volume / 100) + len(details.get('exercises', [])) * 5, 50)
-        stats["strength"] = min(len(details.get('exercises', [])), 3)
-        stats["agility"] = 1 if len(details.get('exercises', [])) >= 3 else 0
-    
-    elif workout_type == "cardio":
-        duration = details.get('duration_minutes', 0)
-        distance = details.get('distance_km', 0)
-        xp = min(int(duration / 2) + int(distance * 5), 50)
-        stats["endurance"] = min(int(duration / 10), 3)
-        stats["agility"] = 1 if duration >= 20 else 0
+async def load_user(user_id: str) -> Optional[dict]:
+    """Fetch a user document, served from the user cache when possible"""
+    user = user_cache.get(user_id)
+    if user is None:
+        user = await db.users.find_one({"id": user_id}, {"_id": 0, "face_descriptor": 0})
+        if not user:
+            return None
+        user_cache.set(user_id, user)
+    return dict(user)
+
+session_store = SessionStore(
+    db.user_sessions,
+    maxsize=SESSION_CACHE_SIZE,
+    ttl=SESSION_CACHE_TTL_SECONDS,
+    negative_ttl=SESSION_NEGATIVE_TTL_SECONDS
+)
+
+def invalidate_user(user_id: str):
+    """Drop a cached user after any write to their document"""
+    user_cache.pop(user_id)
+
+UTC_ZONE = ZoneInfo("UTC")
+
+def user_zone(user: dict) -> ZoneInfo:
+    """The user's time zone for local dates, UTC when unset or no longer known"""
+    try:
+        return ZoneInfo(user.get('timezone') or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return UTC_ZONE
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    if not ADMIN_API_KEY or x_admin_key != ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+async def generate_unique_username(base: str) -> str:
+    """Pick a free username, suffixing digits when the base is already taken"""
+    base = base or "Warrior"
+    username = base
+    while await db.users.find_one({"username": username}, {"_id": 0, "id": 1}):
+        username = f"{base}{uuid.uuid4().int % 10000:04d}"
+    return username
+
+# ==================== DATABASE INDEXES ====================
+
+# Every query the API issues should be served by one of these
+DB_INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("username", ASCENDING)], unique=True),
+        IndexModel([("progress_updated_at", ASCENDING)], sparse=True),
+        IndexModel([("face_registered_at", ASCENDING)], sparse=True),
+    ],
+    "workouts": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        # Keyset pagination on (created_at, id), optionally filtered by type or category
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("workout_type", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("session_category", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "quest_progress": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "achievements": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], unique=True),
+    ],
+    "training_plans": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("is_active", ASCENDING)]),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "workout_stats": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "exercise_sessions": [
+        IndexModel([("workout_id", ASCENDING), ("exercise", ASCENDING)], unique=True),
+        # Per-exercise history, newest first
+        IndexModel([("user_id", ASCENDING), ("exercise", ASCENDING), ("performed_at", DESCENDING)]),
+    ],
+    "exercise_records": [
+        IndexModel([("user_id", ASCENDING), ("exercise", ASCENDING)], unique=True),
+    ],
+    "plan_import_jobs": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=7 * 24 * 60 * 60),
+    ],
+    "plan_import_cache": [
+        IndexModel([("key", ASCENDING)], unique=True),
+        # LRU eviction order
+        IndexModel([("last_used_at", ASCENDING)]),
+    ],
+    "user_sessions": [
+        IndexModel([("session_token", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)], unique=True),
+        # Expired sessions are removed by MongoDB's TTL monitor
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+async def ensure_indexes():
+    """Create any missing indexes; a conflicting index is logged, not fatal"""
+    for collection, indexes in DB_INDEXES.items():
+        for index in indexes:
+            try:
+                await db[collection].create_indexes([index])
+            except (DuplicateKeyError, OperationFailure) as e:
+                logger.error(f"Failed to create index {index.document['name']} on {collection}: {str(e)}")
+
+async def collect_index_stats() -> dict:
+    """Per-index usage counters plus server-wide collection scan metrics"""
+    collections = {}
+    for collection in DB_INDEXES:
+        stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        collections[collection] = sorted([
+            {
+                "name": s['name'],
+                "key": dict(s['key']),
+                "ops": s['accesses']['ops'],
+                "since": s['accesses']['since'].isoformat()
+            }
+            for s in stats
+        ], key=lambda s: s['ops'])
     
-    return max(xp, 10), stats  # Minimum 10 XP per workout
+    query_executor = {}
+    try:
+        server_status = await db.command("serverStatus")
+        query_executor = server_status.get("metrics", {}).get("queryExecutor", {})
+    except OperationFailure as e:
+        logger.warning(f"serverStatus unavailable: {str(e)}")
+    
+    return {"collections": collections, "query_executor": query_executor}
+
+# ==================== FACE INDEX ====================
+
+face_index = FaceIndex(threshold=FACE_MATCH_THRESHOLD, n_lists=FACE_INDEX_LISTS, n_probe=FACE_INDEX_PROBES)
+face_index_synced_at: Optional[datetime] = None
+face_index_checked_at: Optional[datetime] = None
+
+async def load_face_index():
+    """Build the face index from every enrolled user"""
+    global face_index_synced_at, face_index_checked_at
+    started = datetime.now(timezone.utc)
+    cursor = db.users.find(
+        {"face_descriptor": {"$exists": True}},
+        {"_id": 0, "id": 1, "face_descriptor": 1}
+    ).batch_size(1000)
+    face_index.build([(u['id'], u['face_descriptor']) async for u in cursor])
+    face_index_synced_at = face_index_checked_at = started
+    logger.info(f"Face index loaded: {len(face_index)} descriptors (approximate={face_index.approximate})")
+
+async def sync_face_index(force: bool = False) -> int:
+    """Pull descriptors registered through other workers since the last sync"""
+    global face_index_synced_at, face_index_checked_at
+    now = datetime.now(timezone.utc)
+    if face_index_synced_at is None:
+        await load_face_index()
+        return len(face_index)
+    if not force and now - face_index_checked_at < timedelta(seconds=FACE_INDEX_SYNC_SECONDS):
+        return 0
+    face_index_checked_at = now
+    
+    updated = await db.users.find(
+        {"face_registered_at": {"$gt": face_index_synced_at}},
+        {"_id": 0, "id": 1, "face_descriptor": 1, "face_registered_at": 1}
+    ).to_list(None)
+    for user in updated:
+        face_index.upsert(user['id'], user['face_descriptor'])
+        registered_at = user['face_registered_at']
+        if registered_at.tzinfo is None:
+            registered_at = registered_at.replace(tzinfo=timezone.utc)
+        face_index_synced_at = max(face_index_synced_at, registered_at)
+    return len(updated)
 
 # ==================== AUTH ROUTES ====================
 
+oauth_client = OAuthSessionClient(
+    EMERGENT_AUTH_URL,
+    timeout=EMERGENT_AUTH_TIMEOUT_SECONDS,
+    max_connections=EMERGENT_AUTH_MAX_CONNECTIONS,
+    cache_ttl=EMERGENT_AUTH_SESSION_CACHE_SECONDS,
+    breaker=CircuitBreaker(EMERGENT_AUTH_BREAKER_FAILURES, EMERGENT_AUTH_BREAKER_RESET_SECONDS)
+)
+
 # Google OAuth session exchange
 @api_router.post("/auth/google/session")
 async def google_oauth_session(request: Request, response: Response):
@@ -228,16 +482,14 @@ async def google_oauth_session(request: Request, response: Response):
         raise HTTPException(status_code=400, detail="session_id required")
     
     # Call Emergent Auth to get user data
-    async with httpx.AsyncClient() as client_http:
-        auth_response = await client_http.get(
-            EMERGENT_AUTH_URL,
-            headers={"X-Session-ID": session_id}
-        )
-        
-        if auth_response.status_code != 200:
-            raise HTTPException(status_code=401, detail="Invalid session")
-        
-        google_data = auth_response.json()
+    try:
+        google_data = await oauth_client.fetch_session(session_id)
+    except AuthServiceUnavailable as e:
+        logger.error(f"Google session exchange failed: {str(e)}")
+        raise HTTPException(status_code=503, detail="Sign-in service unavailable, please try again shortly")
+    
+    if google_data is None:
+        raise HTTPException(status_code=401, detail="Invalid session")
     
     email = google_data.get("email")
     name = google_data.get("name", "Warrior")
@@ -252,6 +504,7 @@ async def google_oauth_session(request: Request, response: Response):
         # Update picture if changed
         if picture and picture != existing_user.get('picture'):
             await db.users.update_one({"id": user_id}, {"$set": {"picture": picture}})
+            invalidate_user(user_id)
     else:
         # Create new user
         user_id = str(uuid.uuid4())
@@ -260,10 +513,11 @@ async def google_oauth_session(request: Request, response: Response):
         user_doc = {
             "id": user_id,
             "email": email,
-            "username": name.replace(" ", ""),
+            "username": await generate_unique_username(name.replace(" ", "")),
             "password_hash": None,  # Google users don't have password
             "auth_provider": "google",
             "picture": picture,
+            "lifetime_xp": 0,
             "level": 1,
             "xp": 0,
             "xp_to_next_level": 100,
@@ -271,26 +525,17 @@ async def google_oauth_session(request: Request, response: Response):
             "endurance": 10,
             "agility": 10,
             "total_workouts": 0,
-            "created_at": now
+            "created_at": now,
+            "progress_updated_at": datetime.now(timezone.utc)
         }
         
         await db.users.insert_one(user_doc)
-        await initialize_achievements(user_id)
-        await initialize_quests(user_id)
+        mark_leaderboard_stale()
         existing_user = user_doc
     
     # Store session
-    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
-    await db.user_sessions.update_one(
-        {"user_id": user_id},
-        {"$set": {
-            "user_id": user_id,
-            "session_token": session_token,
-            "expires_at": expires_at,
-            "created_at": datetime.now(timezone.utc)
-        }},
-        upsert=True
-    )
+    expires_at = datetime.now(timezone.utc) + timedelta(days=SESSION_DAYS)
+    await session_store.create(user_id, session_token, expires_at)
     
     # Set cookie
     response.set_cookie(
@@ -300,7 +545,7 @@ async def google_oauth_session(request: Request, response: Response):
         secure=True,
         samesite="none",
         path="/",
-        max_age=7 * 24 * 60 * 60
+        max_age=SESSION_DAYS * 24 * 60 * 60
     )
     
     user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
@@ -313,18 +558,12 @@ async def get_current_user_flexible(request: Request, credentials: HTTPAuthoriza
     # Try cookie first (Google OAuth)
     session_token = request.cookies.get("session_token")
     if session_token:
-        session = await db.user_sessions.find_one({"session_token": session_token}, {"_id": 0})
+        session = await session_store.get(session_token)
         if session:
-            expires_at = session.get("expires_at")
-            if isinstance(expires_at, str):
-                expires_at = datetime.fromisoformat(expires_at)
-            if expires_at.tzinfo is None:
-                expires_at = expires_at.replace(tzinfo=timezone.utc)
-            
-            if expires_at > datetime.now(timezone.utc):
-                user = await db.users.find_one({"id": session["user_id"]}, {"_id": 0, "password_hash": 0})
-                if user:
-                    return user
+            user = await load_user(session["user_id"])
+            if user:
+                user.pop("password_hash", None)
+                return user
     
     # Fall back to JWT (email/password auth)
     if credentials:
@@ -332,8 +571,9 @@ async def get_current_user_flexible(request: Request, credentials: HTTPAuthoriza
             payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
             user_id = payload.get("sub")
             if user_id:
-                user = await db.users.find_one({"id": user_id}, {"_id": 0, "password_hash": 0})
+                user = await load_user(user_id)
                 if user:
+                    user.pop("password_hash", None)
                     return user
         except:
             pass
@@ -350,7 +590,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
+        user = await load_user(user_id)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -378,7 +618,8 @@ async def register(user_data: UserCreate):
         "id": user_id,
         "email": user_data.email,
         "username": user_data.username,
-        "password_hash": hash_password(user_data.password),
+        "password_hash": await hash_password(user_data.password),
+        "lifetime_xp": 0,
         "level": 1,
         "xp": 0,
         "xp_to_next_level": 100,
@@ -386,16 +627,16 @@ async def register(user_data: UserCreate):
         "endurance": 10,
         "agility": 10,
         "total_workouts": 0,
-        "created_at": now
+        "created_at": now,
+        "progress_updated_at": datetime.now(timezone.utc)
     }
     
-    await db.users.insert_one(user_doc)
-    
-    # Initialize achievements
-    await initialize_achievements(user_id)
-    
-    # Initialize quests
-    await initialize_quests(user_id)
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        # Lost a race with a concurrent registration for the same email/username
+        raise HTTPException(status_code=400, detail="Email or username already registered")
+    mark_leaderboard_stale()
     
     token = create_token(user_id)
     
@@ -424,16 +665,18 @@ async def register_face(face_data: FaceRegister, current_user: dict = Depends(ge
     # Store face descriptor
     await db.users.update_one(
         {"id": current_user['id']},
-        {"$set": {"face_descriptor": face_data.face_descriptor}}
+        {"$set": {
+            "face_descriptor": face_data.face_descriptor,
+            "face_registered_at": datetime.now(timezone.utc)
+        }}
     )
+    face_index.upsert(current_user['id'], face_data.face_descriptor)
     
     return {"message": "Face registered successfully"}
 
 @api_router.post("/auth/face/login", response_model=TokenResponse)
 async def login_with_face(face_data: FaceLogin):
     """Login using facial recognition"""
-    import numpy as np
-    
     # Validate face descriptor length (should be 128-dimensional)
     if len(face_data.face_descriptor) != 128:
         raise HTTPException(
@@ -441,35 +684,27 @@ async def login_with_face(face_data: FaceLogin):
             detail=f"Invalid face descriptor: expected 128 dimensions, got {len(face_data.face_descriptor)}"
         )
     
-    # Get all users with face descriptors
-    query = {"face_descriptor": {"$exists": True}}
-    if face_data.username:
-        query["username"] = face_data.username
+    await sync_face_index()
     
-    users = await db.users.find(query, {"_id": 0}).to_list(1000)
+    # Restrict the search to a single account when a username hint is given
+    candidates = None
+    if face_data.username:
+        hinted = await db.users.find_one(
+            {"username": face_data.username, "face_descriptor": {"$exists": True}},
+            {"_id": 0, "id": 1}
+        )
+        candidates = [hinted['id']] if hinted else []
     
-    if not users:
+    if not len(face_index) or candidates == []:
         raise HTTPException(status_code=404, detail="No registered faces found")
     
-    # Find best match using cosine similarity
-    input_descriptor = np.array(face_data.face_descriptor)
-    best_match = None
-    best_similarity = 0.6  # Threshold for matching
-    
-    for user in users:
-        stored_descriptor = np.array(user['face_descriptor'])
-        # Skip if stored descriptor has wrong dimensions
-        if len(stored_descriptor) != 128:
-            continue
-        # Cosine similarity
-        similarity = np.dot(input_descriptor, stored_descriptor) / (
-            np.linalg.norm(input_descriptor) * np.linalg.norm(stored_descriptor)
-        )
-        
-        if similarity > best_similarity:
-            best_similarity = similarity
-            best_match = user
+    match = face_index.search(face_data.face_descriptor, candidates)
+    if not match:
+        # Another worker may have enrolled this face since our last sync
+        if await sync_face_index(force=True):
+            match = face_index.search(face_data.face_descriptor, candidates)
     
+    best_match = await db.users.find_one({"id": match[0]}, {"_id": 0}) if match else None
     if not best_match:
         raise HTTPException(status_code=401, detail="Face not recognized")
     
@@ -505,9 +740,18 @@ async def login(credentials: UserLogin):
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not verify_password(credentials.password, user['password_hash']):
+    # Google accounts have no password
+    if not user.get('password_hash') or not await verify_password(credentials.password, user['password_hash']):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    if password_hasher.needs_rehash(user['password_hash']):
+        new_hash = await hash_password(credentials.password)
+        await db.users.update_one(
+            {"id": user['id'], "password_hash": user['password_hash']},
+            {"$set": {"password_hash": new_hash}}
+        )
+        invalidate_user(user['id'])
+    
     # Set token expiry based on remember_me
     token_expiry_days = 30 if credentials.remember_me else 7
     token = create_token(user['id'], expires_delta=timedelta(days=token_expiry_days))
@@ -543,61 +787,63 @@ async def get_me(request: Request, credentials: HTTPAuthorizationCredentials = D
         "agility": current_user['agility'],
         "total_workouts": current_user['total_workouts'],
         "created_at": current_user['created_at'],
-        "picture": current_user.get('picture')
+        "picture": current_user.get('picture'),
+        "timezone": current_user.get('timezone', "UTC"),
+        "streaks": streak_view(current_user.get('streaks'), datetime.now(user_zone(current_user)).date())
     }
 
+@api_router.put("/auth/me/timezone")
+async def update_timezone(update: TimezoneUpdate, current_user: dict = Depends(get_current_user)):
+    """Set the time zone workouts are dated in for streaks; streaks are replayed in the new zone"""
+    try:
+        zone = ZoneInfo(update.timezone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown time zone: {update.timezone}")
+    
+    await db.users.update_one({"id": current_user['id']}, {"$set": {"timezone": update.timezone}})
+    streaks = await rebuild_streaks(current_user['id'], zone)
+    invalidate_user(current_user['id'])
+    return {"timezone": update.timezone, "streaks": streak_view(streaks, datetime.now(zone).date())}
+
 @api_router.post("/auth/logout")
 async def logout(request: Request, response: Response):
     session_token = request.cookies.get("session_token")
     if session_token:
-        await db.user_sessions.delete_one({"session_token": session_token})
+        await session_store.delete(session_token)
     response.delete_cookie("session_token", path="/")
     return {"message": "Logged out"}
 
 # ==================== WORKOUT ROUTES ====================
 
-@api_router.post("/workouts/weightlifting", response_model=WorkoutResponse)
-async def log_weightlifting(session: WeightliftingSession, current_user: dict = Depends(get_current_user)):
-    workout_id = str(uuid.uuid4())
-    now = datetime.now(timezone.utc).isoformat()
-    
+def canonicalize_exercises(exercises: List[dict]) -> List[dict]:
+    """Store exercises under their catalog names so per-exercise stats don't fragment"""
+    for exercise in exercises:
+        if isinstance(exercise, dict) and exercise.get('name'):
+            exercise['name'] = exercise_catalog.canonical_name(exercise['name'])
+    return exercises
+
+def build_weightlifting_workout(user_id: str, session: WeightliftingSession, created_at: str) -> dict:
     details = {
-        "exercises": [e.model_dump() for e in session.exercises],
+        "exercises": canonicalize_exercises([e.model_dump() for e in session.exercises]),
         "notes": session.notes,
         "session_category": session.session_category or "full"
     }
     
     xp_earned, stats_gained = calculate_workout_xp("weightlifting", details)
     
-    workout_doc = {
-        "id": workout_id,
-        "user_id": current_user['id'],
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
         "workout_type": "weightlifting",
         "session_category": session.session_category or "full",
         "xp_earned": xp_earned,
         "stats_gained": stats_gained,
-        "created_at": now,
+        "volume": calculate_workout_volume(details),
+        "created_at": created_at,
         "details": details
     }
-    
-    await db.workouts.insert_one(workout_doc)
-    
-    # Update user stats
-    await update_user_stats(current_user['id'], xp_earned, stats_gained)
-    
-    # Check achievements
-    await check_achievements(current_user['id'])
-    
-    # Update quest progress
-    await update_quest_progress(current_user['id'], "weightlifting")
-    
-    return WorkoutResponse(**workout_doc)
 
-@api_router.post("/workouts/cardio", response_model=WorkoutResponse)
-async def log_cardio(session: CardioSession, current_user: dict = Depends(get_current_user)):
-    workout_id = str(uuid.uuid4())
-    now = datetime.now(timezone.utc).isoformat()
-    
+def build_cardio_workout(user_id: str, session: CardioSession, created_at: str) -> dict:
     details = {
         "activity": session.activity,
         "duration_minutes": session.duration_minutes,
@@ -607,37 +853,463 @@ async def log_cardio(session: CardioSession, current_user: dict = Depends(get_cu
     
     xp_earned, stats_gained = calculate_workout_xp("cardio", details)
     
-    workout_doc = {
-        "id": workout_id,
-        "user_id": current_user['id'],
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
         "workout_type": "cardio",
         "xp_earned": xp_earned,
         "stats_gained": stats_gained,
-        "created_at": now,
+        "created_at": created_at,
         "details": details
     }
+
+@api_router.post("/workouts/weightlifting", response_model=WorkoutResponse)
+async def log_weightlifting(session: WeightliftingSession, current_user: dict = Depends(get_current_user)):
+    now = datetime.now(timezone.utc).isoformat()
+    workout_doc = build_weightlifting_workout(current_user['id'], session, now)
     
-    await db.workouts.insert_one(workout_doc)
-    
-    # Update user stats
-    await update_user_stats(current_user['id'], xp_earned, stats_gained)
+    # Insert the workout and apply XP, stats, quests and achievements
+    await commit_workouts(current_user['id'], [workout_doc], user_zone(current_user))
     
-    # Check achievements
-    await check_achievements(current_user['id'])
+    return WorkoutResponse(**workout_doc)
+
+@api_router.post("/workouts/cardio", response_model=WorkoutResponse)
+async def log_cardio(session: CardioSession, current_user: dict = Depends(get_current_user)):
+    now = datetime.now(timezone.utc).isoformat()
+    workout_doc = build_cardio_workout(current_user['id'], session, now)
     
-    # Update quest progress
-    await update_quest_progress(current_user['id'], "cardio")
+    # Insert the workout and apply XP, stats, quests and achievements
+    await commit_workouts(current_user['id'], [workout_doc], user_zone(current_user))
     
     return WorkoutResponse(**workout_doc)
 
+# ==================== WORKOUT IMPORT ====================
+
+IMPORT_CSV_HEADER = ["date", "workout_type", "session_category", "exercise", "sets", "reps", "weight", "activity", "duration_minutes", "distance_km", "notes"]
+
+def parse_import_timestamp(value) -> str:
+    """Normalise an imported date/datetime to the UTC ISO format workouts are stored in"""
+    if not value:
+        return datetime.now(timezone.utc).isoformat()
+    parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    parsed = parsed.astimezone(timezone.utc)
+    if parsed > datetime.now(timezone.utc) + timedelta(minutes=5):
+        raise ValueError(f"date {value} is in the future")
+    return parsed.isoformat()
+
+def build_imported_workout(user_id: str, record: dict) -> dict:
+    """Validate one imported session with the same models as the logging endpoints"""
+    if not isinstance(record, dict):
+        raise ValueError("expected a JSON object")
+    created_at = parse_import_timestamp(record.get("created_at") or record.get("date"))
+    workout_type = record.get("workout_type")
+    if workout_type == "weightlifting":
+        return build_weightlifting_workout(user_id, WeightliftingSession.model_validate(record), created_at)
+    if workout_type == "cardio":
+        return build_cardio_workout(user_id, CardioSession.model_validate(record), created_at)
+    raise ValueError("workout_type must be 'weightlifting' or 'cardio'")
+
+async def iter_request_lines(request: Request):
+    """Decode a streamed request body line by line without buffering it whole"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > IMPORT_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Import is limited to {IMPORT_MAX_BYTES // (1024 * 1024)} MB")
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+async def iter_ndjson_records(lines):
+    """Yield (line number, session record) for every non-empty JSON line"""
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if line.strip():
+            yield line_no, line
+
+async def iter_csv_records(lines):
+    """
+    Yield (line number, session record) from CSV rows.
+    
+    Weightlifting sessions span consecutive rows (one exercise per row) that
+    share date, session_category and notes; each cardio row is one session.
+    """
+    header = None
+    pending = None  # (line number, session key, record)
+    line_no = 0
+    partial = ""
+    
+    async for line in lines:
+        line_no += 1
+        # A quoted field containing a newline continues on the next line
+        partial = f"{partial}\n{line}" if partial else line
+        if partial.count('"') % 2:
+            continue
+        row_text, partial = partial, ""
+        if not row_text.strip():
+            continue
+        
+        values = next(csv.reader([row_text]))
+        if header is None:
+            header = [column.strip().lower() for column in values]
+            missing = {"date", "workout_type"} - set(header)
+            if missing:
+                raise HTTPException(status_code=400, detail=f"CSV header is missing columns: {', '.join(sorted(missing))}")
+            continue
+        
+        row = {key: value.strip() for key, value in zip(header, values) if value.strip()}
+        if row.get("workout_type") == "weightlifting":
+            key = (row.get("date"), row.get("session_category"), row.get("notes"))
+            exercise = {field: row.get(field) for field in ("sets", "reps", "weight") if field in row}
+            exercise["name"] = row.get("exercise")
+            if pending and pending[1] == key:
+                pending[2]["exercises"].append(exercise)
+                continue
+            if pending:
+                yield pending[0], pending[2]
+            pending = (line_no, key, {
+                "workout_type": "weightlifting",
+                "date": row.get("date"),
+                "session_category": row.get("session_category") or "full",
+                "notes": row.get("notes"),
+                "exercises": [exercise]
+            })
+        else:
+            if pending:
+                yield pending[0], pending[2]
+                pending = None
+            yield line_no, row
+    
+    if pending:
+        yield pending[0], pending[2]
+
+async def insert_import_chunk(user_id: str, chunk: List[dict], summary: dict, now: datetime):
+    """Insert a chunk of imported workouts and add the ones that were stored to the summary"""
+    inserted = []
+    try:
+        await db.workouts.insert_many(chunk, ordered=False)
+        inserted = chunk
+    except BulkWriteError as e:
+        failed = {error['index'] for error in e.details.get('writeErrors', [])}
+        inserted = [workout for index, workout in enumerate(chunk) if index not in failed]
+        raise
+    finally:
+        if inserted:
+            await index_exercise_sessions(user_id, inserted)
+            for workout in inserted:
+                add_to_workout_summary(summary, workout, now)
+
+@api_router.post("/workouts/import")
+async def import_workouts(request: Request, format: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """
+    Bulk-import workout history streamed as NDJSON (one session per line) or
+    CSV (columns: IMPORT_CSV_HEADER).
+    
+    Workouts are inserted in chunks as they stream in; XP, level, stats,
+    achievements and quests are then applied once for the whole import,
+    including when the import stops partway (oversized body, bad CSV header,
+    client disconnect, write error) for the workouts stored until then.
+    """
+    format = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    
+    lines = iter_request_lines(request)
+    records = iter_csv_records(lines) if format == "csv" else iter_ndjson_records(lines)
+    
+    user_id = current_user['id']
+    now = datetime.now(timezone.utc)
+    summary = new_workout_summary(user_zone(current_user))
+    chunk = []
+    errors = []
+    skipped = 0
+    
+    try:
+        async for line_no, record in records:
+            if summary['count'] + len(chunk) >= IMPORT_MAX_WORKOUTS:
+                skipped += 1
+                continue
+            try:
+                if isinstance(record, str):
+                    record = json.loads(record)
+                workout = build_imported_workout(user_id, record)
+            except ValueError as e:
+                # json and pydantic validation errors are both ValueErrors
+                skipped += 1
+                if len(errors) < IMPORT_MAX_ERRORS:
+                    message = e.errors()[0]['msg'] if isinstance(e, ValidationError) else str(e)
+                    errors.append({"line": line_no, "error": message})
+                continue
+            
+            chunk.append(workout)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                await insert_import_chunk(user_id, chunk, summary, now)
+                chunk = []
+        
+        if chunk:
+            await insert_import_chunk(user_id, chunk, summary, now)
+    finally:
+        # Workouts already stored must not be left without their effects
+        if summary['count']:
+            await apply_workout_effects(user_id, summary)
+    
+    return {
+        "imported": summary['count'],
+        "skipped": skipped,
+        "xp_earned": summary['xp_earned'],
+        "errors": errors
+    }
+
+# ==================== WORKOUT EXPORT ====================
+
+EXPORT_CSV_HEADER = ["date", "workout_id", "workout_type", "session_category", "exercise", "set", "reps", "weight", "tempo", "activity", "duration_minutes", "distance_km", "notes", "xp_earned"]
+
+def workout_csv_rows(workout: dict):
+    """One row per set for weightlifting (using per-set weights when recorded), one row per cardio session"""
+    details = workout.get('details') or {}
+    base = {
+        "date": workout['created_at'],
+        "workout_id": workout['id'],
+        "workout_type": workout['workout_type'],
+        "session_category": workout.get('session_category'),
+        "notes": details.get('notes'),
+        "xp_earned": workout.get('xp_earned')
+    }
+    
+    if workout['workout_type'] != "weightlifting":
+        yield {
+            **base,
+            "activity": details.get('activity'),
+            "duration_minutes": details.get('duration_minutes'),
+            "distance_km": details.get('distance_km')
+        }
+        return
+    
+    for exercise in details.get('exercises', []):
+        weights = exercise.get('weights') if exercise.get('useSameWeight') is False else None
+        for set_index in range(exercise.get('sets', 0)):
+            weight = weights[set_index] if weights and set_index < len(weights) else exercise.get('weight')
+            yield {
+                **base,
+                "exercise": exercise.get('name'),
+                "set": set_index + 1,
+                "reps": exercise.get('reps'),
+                "weight": weight,
+                "tempo": exercise.get('tempo')
+            }
+
+async def iter_workout_export(user_id: str, export_format: str):
+    """Encode the user's full history oldest-first from a server-side cursor, one batch at a time"""
+    cursor = db.workouts.find({"user_id": user_id}, {"_id": 0}).sort(
+        [("created_at", 1), ("id", 1)]
+    ).batch_size(EXPORT_BATCH_SIZE)
+    
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_HEADER, extrasaction="ignore")
+    if export_format == "csv":
+        writer.writeheader()
+    
+    pending = 0
+    async for workout in cursor:
+        if export_format == "csv":
+            writer.writerows(workout_csv_rows(workout))
+        else:
+            buffer.write(json.dumps(workout) + "\n")
+        pending += 1
+        if pending >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+async def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+@api_router.get("/workouts/export")
+async def export_workouts(format: str = "ndjson", gzip: bool = False, current_user: dict = Depends(get_current_user)):
+    """Stream the complete workout history as NDJSON or per-set CSV, optionally gzipped"""
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    
+    body = iter_workout_export(current_user['id'], format)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"workouts.{format}"
+    if gzip:
+        body = gzip_stream(body)
+        media_type = "application/gzip"
+        filename += ".gz"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def encode_workout_cursor(workout: dict) -> str:
+    raw = json.dumps([workout['created_at'], workout['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_workout_cursor(cursor: str) -> tuple:
+    try:
+        created_at, workout_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return str(created_at), str(workout_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @api_router.get("/workouts", response_model=List[WorkoutResponse])
-async def get_workouts(limit: int = 20, current_user: dict = Depends(get_current_user)):
-    workouts = await db.workouts.find(
-        {"user_id": current_user['id']}, 
-        {"_id": 0}
-    ).sort("created_at", -1).limit(limit).to_list(limit)
+async def get_workouts(
+    response: Response,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    workout_type: Optional[str] = None,
+    session_category: Optional[str] = None,
+    view: str = "full",
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Newest-first workout history with keyset pagination.
+    
+    When more results exist the opaque cursor for the next page is returned
+    in the X-Next-Cursor header; `view=summary` leaves out exercise details.
+    """
+    if view not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="view must be 'full' or 'summary'")
+    limit = max(1, min(limit, WORKOUTS_PAGE_MAX))
+    
+    query = {"user_id": current_user['id']}
+    if workout_type:
+        query["workout_type"] = workout_type
+    if session_category:
+        query["session_category"] = session_category
+    
+    created_at = {}
+    if start:
+        created_at["$gte"] = (start if start.tzinfo else start.replace(tzinfo=timezone.utc)).astimezone(timezone.utc).isoformat()
+    if end:
+        created_at["$lt"] = (end if end.tzinfo else end.replace(tzinfo=timezone.utc)).astimezone(timezone.utc).isoformat()
+    if created_at:
+        query["created_at"] = created_at
+    
+    if cursor:
+        cursor_created_at, cursor_id = decode_workout_cursor(cursor)
+        query["$or"] = [
+            {"created_at": {"$lt": cursor_created_at}},
+            {"created_at": cursor_created_at, "id": {"$lt": cursor_id}}
+        ]
+    
+    projection = {"_id": 0}
+    if view == "summary":
+        projection["details"] = 0
+    
+    # One extra document tells us whether another page exists
+    workouts = await db.workouts.find(query, projection).sort(
+        [("created_at", -1), ("id", -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    
+    if len(workouts) > limit:
+        workouts = workouts[:limit]
+        response.headers["X-Next-Cursor"] = encode_workout_cursor(workouts[-1])
     return workouts
 
+@api_router.get("/workouts/stats")
+async def get_workout_stats(current_user: dict = Depends(get_current_user)):
+    stats = await load_workout_stats(current_user['id'])
+    by_type = stats.get('by_type', {})
+    by_category = stats.get('by_category', {})
+    
+    return {
+        "total_workouts": stats.get('total_workouts', 0),
+        "weightlifting_count": by_type.get('weightlifting', 0),
+        "cardio_count": by_type.get('cardio', 0),
+        "push_count": by_category.get('push', 0),
+        "pull_count": by_category.get('pull', 0),
+        "legs_count": by_category.get('legs', 0),
+        "full_count": by_category.get('full', 0),
+        "total_xp_earned": stats.get('total_xp_earned', 0)
+    }
+
+@api_router.get("/workouts/calendar")
+async def get_workout_calendar(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    tz: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Per-day workout aggregates (count, types, XP, volume) for calendar views; days are in the user's time zone unless `tz` is given"""
+    try:
+        zone = ZoneInfo(tz) if tz else user_zone(current_user)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown time zone: {tz}")
+    
+    end = end or datetime.now(zone).date()
+    start = start or end - timedelta(days=CALENDAR_DEFAULT_DAYS - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {CALENDAR_MAX_DAYS} days")
+    
+    # Local day boundaries converted to UTC so the (user_id, created_at) index serves the range
+    range_start = datetime.combine(start, datetime.min.time(), zone).astimezone(timezone.utc)
+    range_end = datetime.combine(end + timedelta(days=1), datetime.min.time(), zone).astimezone(timezone.utc)
+    
+    pipeline = [
+        {"$match": {
+            "user_id": current_user['id'],
+            "created_at": {"$gte": range_start.isoformat(), "$lt": range_end.isoformat()}
+        }},
+        {"$group": {
+            "_id": {"$dateToString": {
+                "format": "%Y-%m-%d",
+                "date": {"$dateFromString": {"dateString": "$created_at"}},
+                "timezone": zone.key
+            }},
+            "count": {"$sum": 1},
+            "xp": {"$sum": "$xp_earned"},
+            "volume": {"$sum": {"$ifNull": ["$volume", 0]}},
+            "types": {"$push": "$workout_type"},
+            "categories": {"$push": "$session_category"}
+        }},
+        {"$sort": {"_id": 1}}
+    ]
+    
+    days = []
+    async for bucket in db.workouts.aggregate(pipeline):
+        types, categories = {}, {}
+        for workout_type in bucket['types']:
+            types[workout_type] = types.get(workout_type, 0) + 1
+        for category in bucket['categories']:
+            if category:
+                categories[category] = categories.get(category, 0) + 1
+        days.append({
+            "date": bucket['_id'],
+            "count": bucket['count'],
+            "xp": bucket['xp'],
+            "volume": bucket['volume'],
+            "types": types,
+            "categories": categories
+        })
+    
+    return {"start": start.isoformat(), "end": end.isoformat(), "timezone": zone.key, "days": days}
+
 @api_router.get("/workouts/{workout_id}", response_model=WorkoutResponse)
 async def get_workout(workout_id: str, current_user: dict = Depends(get_current_user)):
     workout = await db.workouts.find_one(
@@ -648,6 +1320,18 @@ async def get_workout(workout_id: str, current_user: dict = Depends(get_current_
         raise HTTPException(status_code=404, detail="Workout not found")
     return workout
 
+def validate_workout_details(workout: dict, details) -> dict:
+    """Edited details checked and normalised with the same models as the logging endpoints"""
+    if not isinstance(details, dict):
+        raise HTTPException(status_code=400, detail="details must be an object")
+    try:
+        if workout['workout_type'] == "weightlifting":
+            session = WeightliftingSession.model_validate({"session_category": workout.get('session_category'), **details})
+            return build_weightlifting_workout(workout['user_id'], session, workout['created_at'])['details']
+        return build_cardio_workout(workout['user_id'], CardioSession.model_validate(details), workout['created_at'])['details']
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid details: {e.errors()[0]['msg']}")
+
 @api_router.put("/workouts/{workout_id}")
 async def update_workout(workout_id: str, update_data: dict, current_user: dict = Depends(get_current_user)):
     """Update workout details (notes, exercises, etc)"""
@@ -661,6 +1345,13 @@ async def update_workout(workout_id: str, update_data: dict, current_user: dict
     # Update allowed fields
     allowed_fields = ["details", "notes"]
     update_fields = {k: v for k, v in update_data.items() if k in allowed_fields}
+    # Validate before writing so the stats and exercise index never see bad input
+    if update_fields.get("notes") is not None and not isinstance(update_fields["notes"], str):
+        raise HTTPException(status_code=400, detail="notes must be a string")
+    if "details" in update_fields:
+        update_fields["details"] = validate_workout_details(workout, update_fields["details"])
+        if workout['workout_type'] == "weightlifting":
+            update_fields["volume"] = calculate_workout_volume(update_fields["details"])
     
     if update_fields:
         await db.workouts.update_one(
@@ -669,67 +1360,487 @@ async def update_workout(workout_id: str, update_data: dict, current_user: dict
         )
     
     updated_workout = await db.workouts.find_one({"id": workout_id}, {"_id": 0})
+    await apply_workout_stats(current_user['id'], added=[updated_workout], removed=[workout])
+    if "details" in update_fields:
+        await reindex_workout_exercises(current_user['id'], workout, updated_workout)
     return updated_workout
 
-@api_router.get("/workouts/stats")
-async def get_workout_stats(current_user: dict = Depends(get_current_user)):
-    total_workouts = await db.workouts.count_documents({"user_id": current_user['id']})
-    weightlifting_count = await db.workouts.count_documents({"user_id": current_user['id'], "workout_type": "weightlifting"})
-    cardio_count = await db.workouts.count_documents({"user_id": current_user['id'], "workout_type": "cardio"})
-    
-    # Count by session category
-    push_count = await db.workouts.count_documents({"user_id": current_user['id'], "session_category": "push"})
-    pull_count = await db.workouts.count_documents({"user_id": current_user['id'], "session_category": "pull"})
-    legs_count = await db.workouts.count_documents({"user_id": current_user['id'], "session_category": "legs"})
-    full_count = await db.workouts.count_documents({"user_id": current_user['id'], "session_category": "full"})
-    
-    # Get total XP earned from workouts
-    pipeline = [
-        {"$match": {"user_id": current_user['id']}},
-        {"$group": {"_id": None, "total_xp": {"$sum": "$xp_earned"}}}
-    ]
-    result = await db.workouts.aggregate(pipeline).to_list(1)
-    total_xp_earned = result[0]['total_xp'] if result else 0
+# ==================== WORKOUT COMMIT ENGINE ====================
+
+USER_PROGRESS_FIELDS = {"_id": 0, "lifetime_xp": 1, "level": 1, "xp": 1, "xp_to_next_level": 1, "strength": 1, "endurance": 1, "agility": 1, "total_workouts": 1, "streaks": 1}
+
+LEVEL_STAGES = level_stages()
+
+async def grant_progress(user_id: str, xp: int, increments: dict = None, periods: dict = None) -> Optional[tuple]:
+    """
+    Add XP, counters and a streak period to a user in one atomic pipeline update.
     
-    return {
-        "total_workouts": total_workouts,
-        "weightlifting_count": weightlifting_count,
-        "cardio_count": cardio_count,
-        "push_count": push_count,
-        "pull_count": pull_count,
-        "legs_count": legs_count,
-        "full_count": full_count,
-        "total_xp_earned": total_xp_earned
+    Only lifetime_xp is accumulated; level, xp and xp_to_next_level are
+    derived from it in the same update, so no XP source can leave a user
+    with xp above their level threshold. Returns the user's progress
+    (before, after) the update; `after` is derived from the pre-image with
+    the same formulas the pipeline applies.
+    """
+    increments = increments or {}
+    fields = {
+        "lifetime_xp": {"$add": [LIFETIME_XP_EXPR, xp]},
+        "progress_updated_at": datetime.now(timezone.utc)
     }
+    for field, value in increments.items():
+        fields[field] = {"$add": [{"$ifNull": [f"${field}", 0]}, value]}
+    pipeline = [{"$set": fields}, *LEVEL_STAGES]
+    if periods:
+        pipeline += streak_stages(periods)
+    
+    before = await db.users.find_one_and_update(
+        {"id": user_id},
+        pipeline,
+        projection=USER_PROGRESS_FIELDS,
+        return_document=ReturnDocument.BEFORE
+    )
+    if not before:
+        return None
+    lifetime_xp = lifetime_xp_of(before)
+    before = {**before, **level_fields(lifetime_xp)}
+    after = {
+        **before,
+        **{field: before.get(field, 0) + value for field, value in increments.items()},
+        **level_fields(lifetime_xp + xp)
+    }
+    if periods:
+        after['streaks'] = advance_streaks(before.get('streaks'), periods)
+    return before, after
+
+async def migrate_lifetime_xp() -> int:
+    """Derive lifetime_xp for users that predate it, re-levelling any xp left above the threshold"""
+    result = await db.users.update_many(
+        {"lifetime_xp": {"$exists": False}},
+        [{"$set": {"lifetime_xp": LIFETIME_XP_EXPR}}, *LEVEL_STAGES]
+    )
+    return result.modified_count
 
-# ==================== USER STATS HELPERS ====================
+def new_workout_summary(zone: ZoneInfo = UTC_ZONE) -> dict:
+    """Accumulator for the combined effect of a batch of workouts; `zone` is the user's time zone"""
+    return {
+        "zone": zone,
+        "days": set(),
+        "count": 0,
+        "xp_earned": 0,
+        "stats_gained": {"strength": 0, "endurance": 0, "agility": 0},
+        "stats_increments": {},
+        "quest_progress": {quest_type: 0 for quest_type in QUEST_TYPES}
+    }
 
-async def update_user_stats(user_id: str, xp: int, stats: dict):
-    user = await db.users.find_one({"id": user_id}, {"_id": 0})
-    if not user:
+def add_to_workout_summary(summary: dict, workout: dict, now: datetime = None) -> dict:
+    now = now or datetime.now(timezone.utc)
+    summary['count'] += 1
+    summary['xp_earned'] += workout['xp_earned']
+    for stat in summary['stats_gained']:
+        summary['stats_gained'][stat] += workout['stats_gained'].get(stat, 0)
+    merge_increments(summary['stats_increments'], workout_stats_increments(workout))
+    summary['days'].add(local_date(workout['created_at'], summary['zone']))
+    
+    # Backdated workouts only count towards quests whose period they fall in
+    for quest_type in summary['quest_progress']:
+        if workout['created_at'] >= quest_period_start(quest_type, now).isoformat():
+            summary['quest_progress'][quest_type] += 1
+    return summary
+
+async def commit_workouts(user_id: str, workouts: List[dict], zone: ZoneInfo = UTC_ZONE):
+    """Persist workouts and apply their effects (see apply_workout_effects)"""
+    if not workouts:
+        return
+    if len(workouts) == 1:
+        await db.workouts.insert_one(workouts[0])
+    else:
+        await db.workouts.insert_many(workouts)
+    await index_exercise_sessions(user_id, workouts)
+    
+    summary = new_workout_summary(zone)
+    for workout in workouts:
+        add_to_workout_summary(summary, workout)
+    await apply_workout_effects(user_id, summary)
+
+async def apply_workout_effects(user_id: str, summary: dict):
+    """
+    Apply XP, stats, quest and achievement effects of already-inserted workouts.
+    
+    XP, stats and counters are added in one atomic update whose before/after
+    values feed the achievement rule index, and quest/achievement rewards are
+    claimed with guarded updates so concurrent logs can neither lose nor
+    double-grant them.
+    """
+    if not summary['count']:
         return
     
-    new_xp = user['xp'] + xp
-    new_level = user['level']
-    new_xp_to_next = user['xp_to_next_level']
-    
-    # Level up check
-    while new_xp >= new_xp_to_next:
-        new_xp -= new_xp_to_next
-        new_level += 1
-        new_xp_to_next = calculate_xp_to_level(new_level)
-    
-    update_data = {
-        "xp": new_xp,
-        "level": new_level,
-        "xp_to_next_level": new_xp_to_next,
-        "strength": user['strength'] + stats.get('strength', 0),
-        "endurance": user['endurance'] + stats.get('endurance', 0),
-        "agility": user['agility'] + stats.get('agility', 0),
-        "total_workouts": user['total_workouts'] + 1
+    stats = await apply_stats_increments(user_id, summary['stats_increments'])
+    quest_xp = await advance_quests(user_id, summary['quest_progress'])
+    
+    # Workouts on a single local day advance the streaks in O(1) in the same
+    # update; batches spanning several days are replayed from history
+    periods = streak_periods(next(iter(summary['days']))) if len(summary['days']) == 1 else None
+    progress = await grant_progress(
+        user_id,
+        summary['xp_earned'] + quest_xp,
+        {"total_workouts": summary['count'], **summary['stats_gained']},
+        periods
+    )
+    if not progress:
+        return
+    before, after = progress
+    last_day = ((before.get('streaks') or {}).get('daily') or {}).get('last')
+    if not periods or (last_day is not None and periods['daily'] < last_day):
+        after['streaks'] = await rebuild_streaks(user_id, summary['zone'])
+    
+    # Each update is atomic, so concurrent batches see disjoint before/after ranges
+    total_volume = (stats or {}).get('total_volume', 0)
+    await unlock_achievements(
+        user_id,
+        {**before, **streak_metrics(before.get('streaks')), "total_volume": total_volume - summary['stats_increments'].get('total_volume', 0)},
+        {**after, **streak_metrics(after.get('streaks')), "total_volume": total_volume}
+    )
+    invalidate_user(user_id)
+    mark_leaderboard_stale()
+
+# ==================== STREAKS ====================
+
+async def rebuild_streaks(user_id: str, zone: ZoneInfo = UTC_ZONE) -> dict:
+    """Replay a user's streaks from the local dates of their whole workout history"""
+    cursor = db.workouts.find({"user_id": user_id}, {"_id": 0, "created_at": 1}).batch_size(1000)
+    days = set()
+    async for workout in cursor:
+        days.add(local_date(workout['created_at'], zone))
+    streaks = replay_streaks(days)
+    await db.users.update_one({"id": user_id}, {"$set": {"streaks": streaks}})
+    return streaks
+
+# ==================== WORKOUT STATS ====================
+
+def workout_stats_increments(workout: dict, sign: int = 1) -> dict:
+    """$inc paths a single workout contributes to its owner's workout_stats document"""
+    created_at = datetime.fromisoformat(workout['created_at'])
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    created_at = created_at.astimezone(timezone.utc)
+    iso_year, iso_week, _ = created_at.isocalendar()
+    day = created_at.date().isoformat()
+    week = f"{iso_year}-W{iso_week:02d}"
+    xp = workout.get('xp_earned', 0)
+    
+    increments = {
+        "total_workouts": sign,
+        "total_xp_earned": sign * xp,
+        f"by_type.{workout['workout_type']}": sign,
+        f"days.{day}.count": sign,
+        f"days.{day}.xp": sign * xp,
+        f"weeks.{week}.count": sign,
+        f"weeks.{week}.xp": sign * xp,
     }
+    if workout.get('session_category'):
+        increments[f"by_category.{workout['session_category']}"] = sign
+    if workout.get('volume'):
+        increments["total_volume"] = sign * workout['volume']
+    return increments
+
+def merge_increments(target: dict, increments: dict) -> dict:
+    for path, value in increments.items():
+        target[path] = target.get(path, 0) + value
+    return target
+
+async def apply_workout_stats(user_id: str, added: List[dict] = (), removed: List[dict] = ()):
+    """Incrementally fold added/removed (or edited: both) workouts into workout_stats"""
+    increments = {}
+    for workout in added:
+        merge_increments(increments, workout_stats_increments(workout))
+    for workout in removed:
+        merge_increments(increments, workout_stats_increments(workout, sign=-1))
+    await apply_stats_increments(user_id, increments)
+
+async def apply_stats_increments(user_id: str, increments: dict) -> Optional[dict]:
+    """$inc the user's workout_stats; returns the updated totals, or None if nothing changed"""
+    increments = {path: value for path, value in increments.items() if value}
+    if not increments:
+        return None
+    
+    return await db.workout_stats.find_one_and_update(
+        {"user_id": user_id},
+        {"$inc": increments, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        projection={"_id": 0, "total_workouts": 1, "total_volume": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+
+async def rebuild_workout_stats(user_id: str) -> dict:
+    """Recompute a user's workout_stats document from their full workout history"""
+    increments = {}
+    volume_backfill = []
+    cursor = db.workouts.find(
+        {"user_id": user_id},
+        {"_id": 0, "id": 1, "workout_type": 1, "session_category": 1, "xp_earned": 1, "created_at": 1, "volume": 1, "details": 1}
+    ).batch_size(1000)
+    async for workout in cursor:
+        # Workouts logged before volume was stored get it backfilled for the calendar
+        if workout['workout_type'] == "weightlifting" and "volume" not in workout:
+            workout['volume'] = calculate_workout_volume(workout.get('details') or {})
+            volume_backfill.append(UpdateOne({"id": workout['id']}, {"$set": {"volume": workout['volume']}}))
+        merge_increments(increments, workout_stats_increments(workout))
+    if volume_backfill:
+        await db.workouts.bulk_write(volume_backfill, ordered=False)
+    
+    # Expand dotted paths into the nested document $inc would have produced
+    now = datetime.now(timezone.utc)
+    stats = {"user_id": user_id, "updated_at": now, "rebuilt_at": now}
+    for path, value in increments.items():
+        node = stats
+        *parents, leaf = path.split(".")
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = value
+    
+    await db.workout_stats.replace_one({"user_id": user_id}, stats, upsert=True)
+    return stats
+
+async def load_workout_stats(user_id: str) -> dict:
+    """Read the materialized stats, backfilling users that predate them"""
+    stats = await db.workout_stats.find_one({"user_id": user_id}, {"_id": 0})
+    if not stats or "rebuilt_at" not in stats:
+        stats = await rebuild_workout_stats(user_id)
+    return stats
+
+# ==================== EXERCISE RECORDS ====================
+
+async def index_exercise_sessions(user_id: str, workouts: List[dict]):
+    """Add inserted workouts to the per-exercise sessions and fold them into the user's records"""
+    sessions = [session for workout in workouts for session in workout_exercise_sessions(workout)]
+    if not sessions:
+        return
+    # insert_many adds _id to the documents it is given
+    await db.exercise_sessions.insert_many([dict(session) for session in sessions], ordered=False)
+    
+    now = datetime.now(timezone.utc)
+    await db.exercise_records.bulk_write([
+        UpdateOne({"user_id": user_id, "exercise": exercise}, record_update_pipeline(record, now), upsert=True)
+        for exercise, record in fold_sessions(sessions).items()
+    ], ordered=False)
+
+async def rebuild_exercise_record(user_id: str, exercise: str):
+    """Recompute one record from its sessions; records can't be un-maxed incrementally"""
+    sessions = await db.exercise_sessions.find(
+        {"user_id": user_id, "exercise": exercise},
+        {"_id": 0}
+    ).to_list(None)
+    record = fold_sessions(sessions).get(exercise)
+    if not record:
+        await db.exercise_records.delete_one({"user_id": user_id, "exercise": exercise})
+        return
+    await db.exercise_records.replace_one(
+        {"user_id": user_id, "exercise": exercise},
+        {
+            "user_id": user_id,
+            "exercise": exercise,
+            **record,
+            "best_e1rm": record['best_set']['e1rm'],
+            "updated_at": datetime.now(timezone.utc)
+        },
+        upsert=True
+    )
+
+async def reindex_workout_exercises(user_id: str, old: dict, new: dict):
+    """Replace an edited workout's sessions and recompute the records they touched"""
+    await db.exercise_sessions.delete_many({"workout_id": old['id']})
+    sessions = workout_exercise_sessions(new)
+    if sessions:
+        await db.exercise_sessions.insert_many(sessions, ordered=False)
+    touched = {session['exercise'] for session in workout_exercise_sessions(old)}
+    touched |= {session['exercise'] for session in sessions}
+    for exercise in touched:
+        await rebuild_exercise_record(user_id, exercise)
+
+async def rebuild_exercise_index(user_id: str) -> int:
+    """Rebuild a user's sessions and records from their full workout history"""
+    await db.exercise_sessions.delete_many({"user_id": user_id})
+    await db.exercise_records.delete_many({"user_id": user_id})
+    cursor = db.workouts.find(
+        {"user_id": user_id, "workout_type": "weightlifting"},
+        {"_id": 0, "id": 1, "user_id": 1, "workout_type": 1, "created_at": 1, "details": 1}
+    ).batch_size(1000)
+    batch = []
+    async for workout in cursor:
+        batch.append(workout)
+        if len(batch) == 1000:
+            await index_exercise_sessions(user_id, batch)
+            batch = []
+    await index_exercise_sessions(user_id, batch)
+    return await db.exercise_records.count_documents({"user_id": user_id})
+
+async def canonicalize_stored_exercises(user_id: Optional[str] = None) -> int:
+    """Rewrite exercise names in logged workouts to their catalog names; returns workouts changed"""
+    query = {"workout_type": "weightlifting"}
+    if user_id:
+        query["user_id"] = user_id
+    cursor = db.workouts.find(query, {"_id": 0, "id": 1, "details.exercises": 1}).batch_size(1000)
+    operations = []
+    changed = 0
+    async for workout in cursor:
+        exercises = (workout.get('details') or {}).get('exercises') or []
+        names = [exercise.get('name') for exercise in exercises]
+        canonicalize_exercises(exercises)
+        if names == [exercise.get('name') for exercise in exercises]:
+            continue
+        operations.append(UpdateOne({"id": workout['id']}, {"$set": {"details.exercises": exercises}}))
+        if len(operations) == 1000:
+            await db.workouts.bulk_write(operations, ordered=False)
+            changed += len(operations)
+            operations = []
+    if operations:
+        await db.workouts.bulk_write(operations, ordered=False)
+        changed += len(operations)
+    return changed
+
+@api_router.get("/exercises/search")
+async def search_exercises(q: str = "", limit: int = 10):
+    """Exercise catalog autocomplete; misspellings fall back to trigram matches"""
+    return exercise_catalog.search(q, max(1, min(limit, 50)))
+
+@api_router.get("/records")
+async def get_records(current_user: dict = Depends(get_current_user)):
+    """The user's personal record for every exercise they have logged, strongest first"""
+    records = await db.exercise_records.find(
+        {"user_id": current_user['id']},
+        {"_id": 0, "user_id": 0}
+    ).to_list(None)
+    records.sort(key=lambda record: (-record['best_e1rm'], record['exercise']))
+    return records
+
+@api_router.get("/exercises/{name}/history")
+async def get_exercise_history(
+    name: str,
+    limit: int = 50,
+    before: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """An exercise's record and its sessions newest first; page with `before`"""
+    exercise = exercise_key(name)
+    record = await db.exercise_records.find_one(
+        {"user_id": current_user['id'], "exercise": exercise},
+        {"_id": 0, "user_id": 0}
+    )
+    if not record:
+        raise HTTPException(status_code=404, detail="No sessions logged for this exercise")
+    
+    query = {"user_id": current_user['id'], "exercise": exercise}
+    if before:
+        query["performed_at"] = {"$lt": (before if before.tzinfo else before.replace(tzinfo=timezone.utc)).astimezone(timezone.utc).isoformat()}
+    limit = max(1, min(limit, EXERCISE_HISTORY_MAX))
+    sessions = await db.exercise_sessions.find(
+        query,
+        {"_id": 0, "user_id": 0, "exercise": 0}
+    ).sort("performed_at", -1).limit(limit).to_list(limit)
+    return {"exercise": exercise, "record": record, "sessions": sessions}
+
+# ==================== XP RECOMPUTE ====================
+
+RECOMPUTE_BATCH_SIZE = 1000
+
+async def recompute_progress(user_id: Optional[str] = None, apply: bool = True) -> dict:
+    """
+    Replay workout history through the current XP formulas and level curve.
+    
+    All workouts (or one user's) are rescored in a single vectorized pass.
+    XP and stats that did not come from workouts (quest and achievement
+    rewards, starting stats) are carried over as the difference between the
+    user's current totals and their workouts' stored rewards. Users whose
+    progress changes while this runs are skipped and can be recomputed again.
+    """
+    started = datetime.now(timezone.utc)
+    columns = WorkoutColumns()
+    cursor = db.workouts.find(
+        {"user_id": user_id} if user_id else {},
+        {"_id": 0, "id": 1, "user_id": 1, "workout_type": 1, "details": 1, "xp_earned": 1, "stats_gained": 1, "volume": 1}
+    ).batch_size(RECOMPUTE_BATCH_SIZE)
+    async for workout in cursor:
+        columns.append(workout)
+    columns.freeze()
+    
+    rewards = workout_rewards(columns)
+    is_weights = columns.workout_type == TYPE_WEIGHTLIFTING
+    changed = np.zeros(len(columns), dtype=bool)
+    for field in ("xp", "strength", "endurance", "agility"):
+        changed |= rewards[field] != columns.stored[field]
+    changed |= is_weights & (rewards['volume'] != columns.stored['volume'])
+    
+    users = {}
+    for i in range(0, len(columns.user_ids), RECOMPUTE_BATCH_SIZE):
+        batch = columns.user_ids[i:i + RECOMPUTE_BATCH_SIZE]
+        async for user in db.users.find({"id": {"$in": batch}}, {**USER_PROGRESS_FIELDS, "id": 1}):
+            users[user['id']] = user
+    
+    stored_totals = {field: per_user(columns, columns.stored[field]) for field in ("xp", "strength", "endurance", "agility")}
+    new_totals = {field: per_user(columns, rewards[field]) for field in ("xp", "strength", "endurance", "agility")}
+    
+    # Users whose stored totals match their (possibly rescored) workouts
+    settled = np.zeros(len(columns.user_ids), dtype=bool)
+    updated_users, skipped_users = [], 0
+    for code, uid in enumerate(columns.user_ids):
+        user = users.get(uid)
+        if not user:
+            continue
+        bonus_xp = max(lifetime_xp_of(user) - int(stored_totals['xp'][code]), 0)
+        progress = {
+            **level_fields(bonus_xp + int(new_totals['xp'][code])),
+            **{
+                stat: int(user[stat] - stored_totals[stat][code] + new_totals[stat][code])
+                for stat in ("strength", "endurance", "agility")
+            }
+        }
+        if all(user.get(field) == value for field, value in progress.items()):
+            settled[code] = True
+            continue
+        if not apply:
+            updated_users.append(uid)
+            continue
+        result = await db.users.update_one(
+            {"id": uid, **{field: user.get(field) for field in (*progress, "total_workouts")}},
+            {"$set": {**progress, "progress_updated_at": datetime.now(timezone.utc)}}
+        )
+        if result.modified_count:
+            settled[code] = True
+            updated_users.append(uid)
+            invalidate_user(uid)
+        else:
+            skipped_users += 1
+    
+    # Workouts are only rewritten for settled users, so a skipped user's
+    # stored rewards still add up to their current totals
+    if apply:
+        changed &= settled[columns.user]
+        operations = []
+        for row in np.flatnonzero(changed):
+            fields = {
+                "xp_earned": int(rewards['xp'][row]),
+                "stats_gained": {stat: int(rewards[stat][row]) for stat in ("strength", "endurance", "agility")}
+            }
+            if is_weights[row]:
+                fields["volume"] = float(rewards['volume'][row])
+            operations.append(UpdateOne({"id": columns.workout_ids[row]}, {"$set": fields}))
+            if len(operations) == RECOMPUTE_BATCH_SIZE:
+                await db.workouts.bulk_write(operations, ordered=False)
+                operations = []
+        if operations:
+            await db.workouts.bulk_write(operations, ordered=False)
+        for code in np.unique(columns.user[changed]):
+            await rebuild_workout_stats(columns.user_ids[code])
+        if updated_users:
+            mark_leaderboard_stale()
     
-    await db.users.update_one({"id": user_id}, {"$set": update_data})
+    return {
+        "workouts": len(columns),
+        "workouts_changed": int(changed.sum()),
+        "users": len(users),
+        "users_changed": len(updated_users),
+        "users_skipped": skipped_users,
+        "seconds": round((datetime.now(timezone.utc) - started).total_seconds(), 3)
+    }
 
 # ==================== ACHIEVEMENTS ====================
 
@@ -745,54 +1856,122 @@ ACHIEVEMENTS = [
     {"id": "endurance_50", "name": "Marathoner", "description": "Reach 50 Endurance", "icon": "flame", "xp_reward": 150, "condition": {"endurance": 50}},
     {"id": "level_5", "name": "Apprentice", "description": "Reach Level 5", "icon": "badge", "xp_reward": 100, "condition": {"level": 5}},
     {"id": "level_10", "name": "Master", "description": "Reach Level 10", "icon": "gem", "xp_reward": 250, "condition": {"level": 10}},
+    {"id": "volume_10k", "name": "Iron Mover", "description": "Lift 10,000 kg of total volume", "icon": "dumbbell", "xp_reward": 100, "condition": {"total_volume": 10000}},
+    {"id": "volume_100k", "name": "Heavy Lifter", "description": "Lift 100,000 kg of total volume", "icon": "mountain", "xp_reward": 300, "condition": {"total_volume": 100000}},
+    {"id": "streak_3", "name": "On Fire", "description": "Train 3 days in a row", "icon": "flame", "xp_reward": 50, "condition": {"daily_streak": 3}},
+    {"id": "streak_7", "name": "Unbreakable", "description": "Train 7 days in a row", "icon": "shield", "xp_reward": 150, "condition": {"daily_streak": 7}},
+    {"id": "weekly_streak_4", "name": "Creature of Habit", "description": "Train every week for 4 weeks", "icon": "star", "xp_reward": 100, "condition": {"weekly_streak": 4}},
 ]
 
-async def initialize_achievements(user_id: str):
-    for ach in ACHIEVEMENTS:
-        doc = {
+achievement_rules = AchievementRules(ACHIEVEMENTS)
+
+async def load_unlocked_achievements(user_id: str) -> dict:
+    """{achievement id: unlocked_at} for the user's unlocked achievements"""
+    unlocked = await db.achievements.find(
+        {"user_id": user_id, "unlocked": True},
+        {"_id": 0, "id": 1, "unlocked_at": 1}
+    ).to_list(None)
+    return {ach['id']: ach.get('unlocked_at') for ach in unlocked}
+
+async def claim_achievements(user_id: str, achievements: List[dict]) -> List[dict]:
+    """
+    Record unlocks in one unordered bulk write; returns the ones this call claimed.
+    
+    Only unlocks are stored. Each upsert is guarded on unlocked != True, so an
+    achievement that is already unlocked fails on the unique (user_id, id)
+    index instead of being granted twice, while locked placeholders written by
+    older versions are upgraded in place.
+    """
+    if not achievements:
+        return []
+    unlocked_at = datetime.now(timezone.utc).isoformat()
+    operations = [
+        UpdateOne(
+            {"user_id": user_id, "id": ach['id'], "unlocked": {"$ne": True}},
+            {"$set": {"unlocked": True, "unlocked_at": unlocked_at}},
+            upsert=True
+        )
+        for ach in achievements
+    ]
+    try:
+        await db.achievements.bulk_write(operations, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get('writeErrors', [])
+        if any(error['code'] != 11000 for error in errors):
+            raise
+        taken = {error['index'] for error in errors}
+        return [ach for i, ach in enumerate(achievements) if i not in taken]
+    return list(achievements)
+
+async def unlock_achievements(user_id: str, before: dict, after: dict) -> int:
+    """Unlock the achievements whose thresholds progress crossed and grant their XP; returns XP granted"""
+    granted = 0
+    crossed = achievement_rules.crossed(before, after)
+    while crossed:
+        claimed = await claim_achievements(user_id, crossed)
+        xp_reward = sum(ach['xp_reward'] for ach in claimed)
+        if not xp_reward:
+            break
+        progress = await grant_progress(user_id, xp_reward)
+        granted += xp_reward
+        if not progress:
+            break
+        # Reward XP can level the user up past further level achievements
+        level = progress[1]['level']
+        crossed = achievement_rules.crossed(after, {**after, "level": level})
+        after = {**after, "level": level}
+    return granted
+
+async def load_achievement_progress(user_id: str) -> Optional[dict]:
+    """Current value of every metric achievement conditions can watch"""
+    user = await db.users.find_one({"id": user_id}, USER_PROGRESS_FIELDS)
+    if not user:
+        return None
+    stats = await load_workout_stats(user_id)
+    return {**user, **streak_metrics(user.get('streaks')), "total_volume": stats.get('total_volume', 0)}
+
+async def recheck_achievements(user_id: str) -> int:
+    """Backfill every achievement the user already qualifies for; returns XP granted"""
+    progress = await load_achievement_progress(user_id)
+    granted = 0
+    while progress:
+        claimed = await claim_achievements(user_id, achievement_rules.satisfied(progress))
+        xp_reward = sum(ach['xp_reward'] for ach in claimed)
+        if not xp_reward:
+            break
+        granted_progress = await grant_progress(user_id, xp_reward)
+        granted += xp_reward
+        progress = granted_progress and {**progress, "level": granted_progress[1]['level']}
+    if granted:
+        invalidate_user(user_id)
+        mark_leaderboard_stale()
+    return granted
+
+@api_router.get("/achievements", response_model=List[Achievement])
+async def get_achievements(current_user: dict = Depends(get_current_user)):
+    """The achievement catalogue with the user's unlock state"""
+    unlocked = await load_unlocked_achievements(current_user['id'])
+    return [
+        {
             "id": ach['id'],
-            "user_id": user_id,
             "name": ach['name'],
             "description": ach['description'],
             "icon": ach['icon'],
             "xp_reward": ach['xp_reward'],
-            "condition": ach['condition'],
-            "unlocked": False,
-            "unlocked_at": None
+            "unlocked": ach['id'] in unlocked,
+            "unlocked_at": unlocked.get(ach['id'])
         }
-        await db.achievements.insert_one(doc)
-
-async def check_achievements(user_id: str):
-    user = await db.users.find_one({"id": user_id}, {"_id": 0})
-    if not user:
-        return
-    
-    achievements = await db.achievements.find({"user_id": user_id, "unlocked": False}, {"_id": 0}).to_list(100)
-    
-    for ach in achievements:
-        condition = ach.get('condition', {})
-        unlocked = True
-        
-        for key, value in condition.items():
-            if user.get(key, 0) < value:
-                unlocked = False
-                break
-        
-        if unlocked:
-            await db.achievements.update_one(
-                {"id": ach['id'], "user_id": user_id},
-                {"$set": {"unlocked": True, "unlocked_at": datetime.now(timezone.utc).isoformat()}}
-            )
-            # Grant XP reward
-            await db.users.update_one(
-                {"id": user_id},
-                {"$inc": {"xp": ach['xp_reward']}}
-            )
+        for ach in ACHIEVEMENTS
+    ]
 
-@api_router.get("/achievements", response_model=List[Achievement])
-async def get_achievements(current_user: dict = Depends(get_current_user)):
-    achievements = await db.achievements.find({"user_id": current_user['id']}, {"_id": 0, "condition": 0, "user_id": 0}).to_list(100)
-    return achievements
+async def prune_legacy_achievements() -> int:
+    """Delete the locked placeholder documents older versions created at signup"""
+    result = await db.achievements.delete_many({"unlocked": False})
+    await db.achievements.update_many(
+        {},
+        {"$unset": {"name": "", "description": "", "icon": "", "xp_reward": "", "condition": ""}}
+    )
+    return result.deleted_count
 
 # ==================== QUESTS ====================
 
@@ -805,121 +1984,195 @@ QUEST_TEMPLATES = [
     {"id": "weekly_legend", "name": "Legendary Grind", "description": "Complete 14 workouts this week", "quest_type": "weekly", "target": 14, "xp_reward": 1000},
 ]
 
-async def initialize_quests(user_id: str):
-    now = datetime.now(timezone.utc)
+QUEST_TYPES = ("daily", "weekly")
+
+def quest_period_start(quest_type: str, now: datetime) -> datetime:
+    """Start of the current daily or weekly (Monday-based) quest period, in UTC"""
+    midnight = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if quest_type == 'daily':
+        return midnight
+    return midnight - timedelta(days=midnight.weekday())
+
+def quest_period_end(quest_type: str, now: datetime) -> datetime:
+    return quest_period_start(quest_type, now) + timedelta(days=1 if quest_type == 'daily' else 7)
+
+def quest_periods(now: datetime) -> dict:
+    """Period keys (the period's start date) identifying the current daily and weekly quests"""
+    return {quest_type: quest_period_start(quest_type, now).date().isoformat() for quest_type in QUEST_TYPES}
+
+async def advance_quests(user_id: str, progress: dict, now: datetime = None) -> int:
+    """
+    Add progress ({quest_type: workouts}) to the user's quest counters and
+    claim quests that became complete; returns XP earned.
+    
+    quest_progress keeps one counter per quest type, tagged with its period.
+    A single pipeline upsert adds to counters still in the current period
+    and restarts counters left over from an earlier one, so quests roll over
+    without a refresh job.
+    """
+    now = now or datetime.now(timezone.utc)
+    periods = quest_periods(now)
+    progress = {quest_type: n for quest_type, n in progress.items() if n}
+    if not progress:
+        return 0
+    
+    rollover = {
+        quest_type: {"$cond": [
+            {"$eq": [f"${quest_type}.period", periods[quest_type]]},
+            {"period": periods[quest_type], "count": {"$add": [f"${quest_type}.count", n]}, "claimed": f"${quest_type}.claimed"},
+            {"period": periods[quest_type], "count": n, "claimed": {"$literal": []}}
+        ]}
+        for quest_type, n in progress.items()
+    }
+    counters = await db.quest_progress.find_one_and_update(
+        {"user_id": user_id},
+        [{"$set": {"user_id": user_id, **rollover}}],
+        projection={"_id": 0},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
     
+    xp_reward = 0
     for quest in QUEST_TEMPLATES:
-        if quest['quest_type'] == 'daily':
-            expires = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-        else:
-            expires = (now + timedelta(days=7 - now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-        
-        doc = {
-            "id": f"{quest['id']}_{user_id}",
-            "user_id": user_id,
-            "template_id": quest['id'],
-            "name": quest['name'],
-            "description": quest['description'],
-            "quest_type": quest['quest_type'],
-            "target": quest['target'],
-            "progress": 0,
-            "xp_reward": quest['xp_reward'],
-            "completed": False,
-            "expires_at": expires.isoformat()
-        }
-        await db.quests.insert_one(doc)
-
-async def update_quest_progress(user_id: str, workout_type: str):
+        counter = counters.get(quest['quest_type'])
+        if quest['quest_type'] not in progress or counter['count'] < quest['target'] or quest['id'] in counter['claimed']:
+            continue
+        # Concurrent logs may both see the target reached; only one claim lands
+        claimed = await db.quest_progress.update_one(
+            {
+                "user_id": user_id,
+                f"{quest['quest_type']}.period": counter['period'],
+                f"{quest['quest_type']}.claimed": {"$ne": quest['id']}
+            },
+            {"$push": {f"{quest['quest_type']}.claimed": quest['id']}}
+        )
+        if claimed.modified_count:
+            xp_reward += quest['xp_reward']
+    return xp_reward
+
+async def migrate_legacy_quests() -> int:
+    """
+    Fold current-period progress from the old per-quest documents in `quests`
+    into quest_progress; counters that already exist are left alone.
+    """
     now = datetime.now(timezone.utc)
-    
-    # Get active quests
-    quests = await db.quests.find({
-        "user_id": user_id,
-        "completed": False,
-        "expires_at": {"$gt": now.isoformat()}
-    }, {"_id": 0}).to_list(100)
-    
-    for quest in quests:
-        new_progress = quest['progress'] + 1
-        completed = new_progress >= quest['target']
-        
-        await db.quests.update_one(
-            {"id": quest['id'], "user_id": user_id},
-            {"$set": {"progress": new_progress, "completed": completed}}
+    periods = quest_periods(now)
+    counters = {}
+    async for quest in db.quests.find(
+        {"expires_at": {"$gt": now.isoformat()}},
+        {"_id": 0, "user_id": 1, "template_id": 1, "quest_type": 1, "progress": 1, "completed": 1}
+    ):
+        if quest.get('quest_type') not in periods:
+            continue
+        counter = counters.setdefault(quest['user_id'], {}).setdefault(
+            quest['quest_type'], {"period": periods[quest['quest_type']], "count": 0, "claimed": []}
         )
-        
-        if completed:
-            # Grant XP reward
-            await db.users.update_one(
-                {"id": user_id},
-                {"$inc": {"xp": quest['xp_reward']}}
-            )
+        counter['count'] = max(counter['count'], quest.get('progress', 0))
+        if quest.get('completed') and quest['template_id'] not in counter['claimed']:
+            counter['claimed'].append(quest['template_id'])
+    
+    for user_id, by_type in counters.items():
+        await db.quest_progress.update_one(
+            {"user_id": user_id},
+            {"$setOnInsert": {"user_id": user_id, **by_type}},
+            upsert=True
+        )
+    return len(counters)
 
 @api_router.get("/quests", response_model=List[Quest])
 async def get_quests(current_user: dict = Depends(get_current_user)):
+    """Current daily and weekly quests; counters from an earlier period read as zero"""
     now = datetime.now(timezone.utc)
-    quests = await db.quests.find({
-        "user_id": current_user['id'],
-        "expires_at": {"$gt": now.isoformat()}
-    }, {"_id": 0, "user_id": 0, "template_id": 0}).to_list(100)
+    periods = quest_periods(now)
+    counters = await db.quest_progress.find_one({"user_id": current_user['id']}, {"_id": 0}) or {}
+    
+    quests = []
+    for quest in QUEST_TEMPLATES:
+        counter = counters.get(quest['quest_type'])
+        if not counter or counter['period'] != periods[quest['quest_type']]:
+            counter = {"count": 0, "claimed": []}
+        quests.append({
+            "id": f"{quest['id']}_{periods[quest['quest_type']]}",
+            "name": quest['name'],
+            "description": quest['description'],
+            "quest_type": quest['quest_type'],
+            "target": quest['target'],
+            "progress": counter['count'],
+            "xp_reward": quest['xp_reward'],
+            "completed": quest['id'] in counter['claimed'],
+            "expires_at": quest_period_end(quest['quest_type'], now).isoformat()
+        })
     return quests
 
 @api_router.post("/quests/refresh")
 async def refresh_quests(current_user: dict = Depends(get_current_user)):
-    """Refresh expired quests"""
-    now = datetime.now(timezone.utc)
-    
-    # Delete expired quests
-    await db.quests.delete_many({
-        "user_id": current_user['id'],
-        "expires_at": {"$lt": now.isoformat()}
-    })
-    
-    # Check which quests exist
-    existing = await db.quests.find({"user_id": current_user['id']}, {"_id": 0, "template_id": 1}).to_list(100)
-    existing_templates = {q['template_id'] for q in existing}
-    
-    # Add missing quests
-    for quest in QUEST_TEMPLATES:
-        if quest['id'] not in existing_templates:
-            if quest['quest_type'] == 'daily':
-                expires = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-            else:
-                expires = (now + timedelta(days=7 - now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            doc = {
-                "id": f"{quest['id']}_{current_user['id']}_{now.isoformat()}",
-                "user_id": current_user['id'],
-                "template_id": quest['id'],
-                "name": quest['name'],
-                "description": quest['description'],
-                "quest_type": quest['quest_type'],
-                "target": quest['target'],
-                "progress": 0,
-                "xp_reward": quest['xp_reward'],
-                "completed": False,
-                "expires_at": expires.isoformat()
-            }
-            await db.quests.insert_one(doc)
-    
+    """Deprecated: quests roll over on their own; kept for older clients"""
     return {"message": "Quests refreshed"}
 
 # ==================== LEADERBOARD ====================
 
+LEADERBOARD_PROJECTION = {"_id": 0, "id": 1, "progress_updated_at": 1, **{field: 1 for field in LEADERBOARD_FIELDS}}
+
+leaderboard = Leaderboard()
+leaderboard_synced_at: Optional[datetime] = None
+leaderboard_checked_at: Optional[datetime] = None
+leaderboard_stale = False
+
+def mark_leaderboard_stale():
+    """Make the next leaderboard read pick up this worker's XP writes immediately"""
+    global leaderboard_stale
+    leaderboard_stale = True
+
+async def load_leaderboard():
+    """Rank every user from MongoDB"""
+    global leaderboard_synced_at, leaderboard_checked_at, leaderboard_stale
+    started = datetime.now(timezone.utc)
+    cursor = db.users.find({}, LEADERBOARD_PROJECTION).batch_size(5000)
+    leaderboard.load([u async for u in cursor])
+    leaderboard_synced_at = leaderboard_checked_at = started
+    leaderboard_stale = False
+    logger.info(f"Leaderboard loaded: {len(leaderboard)} users")
+
+async def sync_leaderboard():
+    """Re-rank users whose progress changed since the last sync (on any worker)"""
+    global leaderboard_synced_at, leaderboard_checked_at, leaderboard_stale
+    now = datetime.now(timezone.utc)
+    if leaderboard_synced_at is None:
+        await load_leaderboard()
+        return
+    if not leaderboard_stale and now - leaderboard_checked_at < timedelta(seconds=LEADERBOARD_SYNC_SECONDS):
+        return
+    leaderboard_checked_at = now
+    leaderboard_stale = False
+    
+    # Overlap the window slightly so writes committed out of timestamp order are not missed
+    since = leaderboard_synced_at - timedelta(seconds=LEADERBOARD_SYNC_SECONDS)
+    async for user in db.users.find({"progress_updated_at": {"$gt": since}}, LEADERBOARD_PROJECTION):
+        leaderboard.update(user)
+        updated_at = user['progress_updated_at']
+        if updated_at.tzinfo is None:
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        leaderboard_synced_at = max(leaderboard_synced_at, updated_at)
+
 @api_router.get("/leaderboard")
-async def get_leaderboard(limit: int = 10):
-    users = await db.users.find({}, {
-        "_id": 0, 
-        "id": 1, 
-        "username": 1, 
-        "level": 1, 
-        "xp": 1, 
-        "strength": 1, 
-        "endurance": 1, 
-        "agility": 1,
-        "total_workouts": 1
-    }).sort("level", -1).limit(limit).to_list(limit)
-    return users
+async def get_leaderboard(limit: int = 10, offset: int = 0):
+    """Users ranked by level, then XP; ties share a rank"""
+    await sync_leaderboard()
+    limit = max(1, min(limit, LEADERBOARD_PAGE_MAX))
+    return leaderboard.page(max(0, offset), limit)
+
+@api_router.get("/leaderboard/me")
+async def get_my_leaderboard_position(radius: int = 3, current_user: dict = Depends(get_current_user)):
+    """The current user's rank and the users directly around them"""
+    await sync_leaderboard()
+    if current_user['id'] not in leaderboard:
+        leaderboard.update(current_user)
+    radius = max(0, min(radius, LEADERBOARD_PAGE_MAX // 2))
+    return {
+        "rank": leaderboard.rank(current_user['id']),
+        "total": len(leaderboard),
+        "neighbours": leaderboard.around(current_user['id'], radius)
+    }
 
 # ==================== TRAINING PLAN MODELS ====================
 
@@ -952,17 +2205,152 @@ class TrainingPlanUpdate(BaseModel):
     exercises: Optional[List[PlanExercise]] = None
     is_active: Optional[bool] = None
 
+# ==================== TRAINING PLAN IMPORT JOBS ====================
+
+plan_backend = create_plan_backend(PLAN_IMPORT_BACKEND, EMERGENT_LLM_KEY)
+plan_cache = TTLCache(maxsize=PLAN_CACHE_MEMORY_SIZE, ttl=PLAN_CACHE_MEMORY_TTL_SECONDS)
+
+async def save_imported_plan(user_id: str, plan_data: dict) -> dict:
+    """Store a parsed plan as the user's new active plan"""
+    plan_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+    
+    # Deactivate existing active plans
+    await db.training_plans.update_many(
+        {"user_id": user_id, "is_active": True},
+        {"$set": {"is_active": False}}
+    )
+    
+    plan_doc = {
+        "id": plan_id,
+        "user_id": user_id,
+        "name": plan_data.get('plan_name', 'Imported Plan'),
+        # plan_data may be shared with the plan cache; canonicalize a copy
+        "exercises": canonicalize_exercises(copy.deepcopy(plan_data.get('exercises', []))),
+        "is_active": True,
+        "created_at": now,
+        "updated_at": now
+    }
+    
+    await db.training_plans.insert_one(plan_doc)
+    return plan_doc
+
+async def get_cached_plan(key: str) -> Optional[dict]:
+    """Parsed plan for an upload seen before, refreshing its LRU position"""
+    now = datetime.now(timezone.utc)
+    plan_data = plan_cache.get(key)
+    if plan_data is not None:
+        await db.plan_import_cache.update_one({"key": key}, {"$set": {"last_used_at": now}, "$inc": {"hits": 1}})
+        return plan_data
+    
+    entry = await db.plan_import_cache.find_one_and_update(
+        {"key": key},
+        {"$set": {"last_used_at": now}, "$inc": {"hits": 1}},
+        projection={"_id": 0, "plan_data": 1}
+    )
+    if not entry:
+        return None
+    plan_cache.set(key, entry['plan_data'])
+    return entry['plan_data']
+
+async def store_cached_plan(key: str, plan_data: dict):
+    now = datetime.now(timezone.utc)
+    await db.plan_import_cache.update_one(
+        {"key": key},
+        {"$set": {"plan_data": plan_data, "last_used_at": now}, "$setOnInsert": {"created_at": now, "hits": 0}},
+        upsert=True
+    )
+    plan_cache.set(key, plan_data)
+    
+    # Evict least recently used entries beyond the size bound
+    excess = await db.plan_import_cache.estimated_document_count() - PLAN_CACHE_MAX_ENTRIES
+    if excess > 0:
+        stale = await db.plan_import_cache.find({}, {"_id": 0, "key": 1}).sort("last_used_at", ASCENDING).limit(excess).to_list(excess)
+        stale_keys = [entry['key'] for entry in stale]
+        await db.plan_import_cache.delete_many({"key": {"$in": stale_keys}})
+        for stale_key in stale_keys:
+            plan_cache.pop(stale_key)
+
+async def process_plan_import(job: dict, attempt: int):
+    await db.plan_import_jobs.update_one(
+        {"id": job['id']},
+        {"$set": {"status": "processing", "attempts": attempt, "updated_at": datetime.now(timezone.utc)}}
+    )
+    
+    # An identical upload may have finished while this one was queued
+    plan_data = await get_cached_plan(job['cache_key'])
+    if plan_data is not None:
+        await db.plan_import_jobs.update_one({"id": job['id']}, {"$set": {"source": "cache"}})
+    else:
+        response = await asyncio.wait_for(
+            plan_backend.extract(
+                job['upload'],
+                job['content_type'],
+                job['filename'],
+                session_id=f"plan-import-{job['user_id']}-{job['id']}"
+            ),
+            timeout=PLAN_IMPORT_TIMEOUT_SECONDS
+        )
+        plan_data = parse_plan_response(response)
+        if plan_data.get('exercises'):
+            await store_cached_plan(job['cache_key'], plan_data)
+    
+    plan_doc = await save_imported_plan(job['user_id'], plan_data)
+    
+    await db.plan_import_jobs.update_one(
+        {"id": job['id']},
+        {"$set": {"status": "completed", "plan_id": plan_doc['id'], "error": None, "updated_at": datetime.now(timezone.utc)}}
+    )
+
+async def fail_plan_import(job: dict, error: Exception):
+    logger.error(f"Failed to import training plan: {str(error)}")
+    await db.plan_import_jobs.update_one(
+        {"id": job['id']},
+        {"$set": {"status": "failed", "error": f"Failed to process file: {str(error)}", "updated_at": datetime.now(timezone.utc)}}
+    )
+
+def release_plan_upload(job: dict):
+    job['upload'].close()
+
+plan_import_queue = JobQueue(
+    process_plan_import,
+    fail_plan_import,
+    workers=PLAN_IMPORT_WORKERS,
+    max_size=PLAN_IMPORT_QUEUE_SIZE,
+    max_attempts=PLAN_IMPORT_MAX_ATTEMPTS,
+    on_done=release_plan_upload
+)
+
+async def read_plan_upload(file: UploadFile, content_type: str) -> PlanUpload:
+    """Copy an upload into a PlanUpload chunk by chunk, enforcing the size limit"""
+    too_large = HTTPException(status_code=413, detail=f"File too large, the limit is {PLAN_IMPORT_MAX_BYTES / (1024 * 1024):.0f} MB")
+    if file.size is not None and file.size > PLAN_IMPORT_MAX_BYTES:
+        raise too_large
+    
+    upload = PlanUpload(plan_cache_digest(content_type, plan_backend), spool_bytes=PLAN_IMPORT_SPOOL_BYTES)
+    try:
+        while chunk := await file.read(PLAN_IMPORT_CHUNK_BYTES):
+            upload.write(chunk)
+            if upload.size > PLAN_IMPORT_MAX_BYTES:
+                raise too_large
+    except BaseException:
+        upload.close()
+        raise
+    return upload
+
 # ==================== TRAINING PLAN ROUTES ====================
 
-@api_router.post("/plans/import")
+@api_router.post("/plans/import", status_code=202)
 async def import_training_plan(
+    response: Response,
     file: UploadFile = File(...),
     current_user: dict = Depends(get_current_user)
 ):
-    """Import a training plan from PDF or image using AI"""
+    """Queue a training plan import from PDF, image or text; poll the returned job for the result.
     
-    if not EMERGENT_LLM_KEY:
-        raise HTTPException(status_code=500, detail="AI service not configured")
+    Well-formed text plans are parsed locally and files imported before are
+    answered from the plan cache; both complete without queueing.
+    """
     
     # Validate file type
     allowed_types = ['application/pdf', 'image/jpeg', 'image/png', 'image/jpg', 'image/webp', 'text/plain']
@@ -976,128 +2364,95 @@ async def import_training_plan(
     if content_type not in allowed_types:
         raise HTTPException(status_code=400, detail=f"File type {content_type} not supported. Use PDF, images (JPG, PNG), or text files")
     
+    upload = await read_plan_upload(file, content_type)
     try:
-        from emergentintegrations.llm.chat import LlmChat, UserMessage, FileContentWithMimeType
-        
-        # Save uploaded file temporarily
-        file_content = await file.read()
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as tmp:
-            tmp.write(file_content)
-            tmp_path = tmp.name
-        
-        # Initialize AI chat with Gemini (supports file attachments)
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=f"plan-import-{current_user['id']}-{uuid.uuid4()}",
-            system_message="""You are a fitness training plan analyzer. Extract exercise information from uploaded documents and categorize them by muscle group.
-            
-            Return ONLY a valid JSON object in this exact format:
-            {
-                "plan_name": "Name of the training plan or 'Imported Plan'",
-                "exercises": [
-                    {"name": "Exercise Name", "sets": 3, "reps": "8-12", "weight": 0, "notes": "any notes", "category": "push"},
-                    ...
-                ]
-            }
-            
-            IMPORTANT RULES:
-            - Extract all exercises you can find
-            - Use standard exercise names (e.g., "Bench Press", "Incline Bench Press", "Squat", "Deadlift")
-            - PRESERVE REP RANGES: If the plan shows "8-12" or "10-15" reps, keep the FULL range as a string like "8-12", do NOT simplify to just one number
-            - For sets, use the exact number shown (e.g., 4 sets = 4)
-            - Format examples: "4x8-12" means sets: 4, reps: "8-12" | "3x10" means sets: 3, reps: "10"
-            - Weight should be in kg, use 0 if not specified
-            - If sets/reps are not specified at all, use reasonable defaults (3 sets, "10" reps)
-            
-            CATEGORIZATION RULES:
-            - "push" category: Bench Press, Overhead Press, Incline Press, Decline Press, Dumbbell Press, Dips, Tricep Extensions, Chest Fly, Shoulder Raises, Push-ups, Cable Crossover
-            - "pull" category: Pull-ups, Chin-ups, Rows (Barbell Row, Dumbbell Row, Cable Row, T-Bar Row), Lat Pulldown, Face Pulls, Bicep Curls, Hammer Curls, Shrugs, Deadlift (conventional, sumo, Romanian)
-            - "legs" category: Squat, Front Squat, Leg Press, Lunges, Bulgarian Split Squat, Leg Curls, Leg Extensions, Calf Raises, Glute Bridges, Hip Thrusts, Leg Raise, Step-ups
-            - If unsure or mixed compound movement, use the primary muscle group (e.g., Deadlift = "pull" because of back emphasis)
-            
-            Return ONLY the JSON, no other text"""
-        ).with_model("gemini", "gemini-2.5-flash")
-        
-        # Create file attachment - for text files, read content directly
-        if content_type == 'text/plain':
-            text_content = file_content.decode('utf-8', errors='ignore')
-            user_message = UserMessage(
-                text=f"Please analyze this training plan text and extract all exercises with their sets, reps, and weights. Return the data as JSON.\n\nTraining Plan Content:\n{text_content}"
-            )
-        else:
-            file_attachment = FileContentWithMimeType(
-                file_path=tmp_path,
-                mime_type=content_type
-            )
-            user_message = UserMessage(
-                text="Please analyze this training plan document and extract all exercises with their sets, reps, and weights. Return the data as JSON.",
-                file_contents=[file_attachment]
-            )
-        
-        response = await chat.send_message(user_message)
-        
-        # Clean up temp file
-        os.unlink(tmp_path)
-        
-        # Parse AI response
-        import json
-        
-        # Try to extract JSON from response
-        response_text = response.strip()
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        
-        try:
-            plan_data = json.loads(response_text.strip())
-        except json.JSONDecodeError:
-            # Try to find JSON in the response
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', response_text)
-            if json_match:
-                plan_data = json.loads(json_match.group())
-            else:
-                raise HTTPException(status_code=500, detail="Failed to parse AI response")
-        
-        # Create the training plan
-        plan_id = str(uuid.uuid4())
-        now = datetime.now(timezone.utc).isoformat()
-        
-        # Deactivate existing active plans
-        await db.training_plans.update_many(
-            {"user_id": current_user['id'], "is_active": True},
-            {"$set": {"is_active": False}}
-        )
-        
-        plan_doc = {
-            "id": plan_id,
-            "user_id": current_user['id'],
-            "name": plan_data.get('plan_name', 'Imported Plan'),
-            "exercises": plan_data.get('exercises', []),
-            "is_active": True,
-            "created_at": now,
-            "updated_at": now
-        }
-        
-        await db.training_plans.insert_one(plan_doc)
-        
-        return {
-            "message": "Training plan imported successfully",
-            "plan": {
-                "id": plan_id,
-                "name": plan_doc['name'],
-                "exercises": plan_doc['exercises'],
-                "is_active": True
+        return await start_plan_import(upload, file.filename, content_type, current_user['id'], response)
+    except BaseException:
+        upload.close()
+        raise
+
+async def start_plan_import(upload: PlanUpload, filename: str, content_type: str, user_id: str, response: Response) -> dict:
+    """Answer an upload locally or from the cache, else queue it; the queue then owns `upload`"""
+    now = datetime.now(timezone.utc)
+    job_doc = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "status": "queued",
+        "filename": filename,
+        "content_type": content_type,
+        "size": upload.size,
+        "cache_key": upload.key,
+        "source": "model",
+        "attempts": 0,
+        "error": None,
+        "plan_id": None,
+        "created_at": now,
+        "updated_at": now
+    }
+    
+    plan_data, source = None, None
+    if content_type == 'text/plain':
+        parsed, confidence = parse_text_plan(upload.read().decode('utf-8', errors='ignore'))
+        if confidence >= PLAN_PARSER_MIN_CONFIDENCE:
+            plan_data, source = parsed, "parser"
+    if plan_data is None:
+        plan_data, source = await get_cached_plan(upload.key), "cache"
+    
+    if plan_data is not None:
+        upload.close()
+        plan_doc = await save_imported_plan(user_id, plan_data)
+        job_doc.update({"status": "completed", "source": source, "plan_id": plan_doc['id']})
+        await db.plan_import_jobs.insert_one(job_doc)
+        response.status_code = 200
+        return await plan_import_job_result(job_doc)
+    
+    if not plan_backend.configured:
+        raise HTTPException(status_code=500, detail="AI service not configured")
+    
+    await db.plan_import_jobs.insert_one(job_doc)
+    
+    try:
+        plan_import_queue.submit({**job_doc, "upload": upload})
+    except asyncio.QueueFull:
+        await db.plan_import_jobs.delete_one({"id": job_doc['id']})
+        raise HTTPException(status_code=503, detail="Too many plan imports in progress, please retry shortly")
+    
+    return {"job_id": job_doc['id'], "status": "queued"}
+
+@api_router.get("/plans/import/{job_id}")
+async def get_plan_import_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Status of a plan import job, including the plan once it has completed"""
+    job = await db.plan_import_jobs.find_one({"id": job_id, "user_id": current_user['id']}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    
+    updated_at = job['updated_at'].replace(tzinfo=timezone.utc)
+    if job['status'] in ("queued", "processing") and datetime.now(timezone.utc) - updated_at > timedelta(seconds=PLAN_IMPORT_STALE_SECONDS):
+        # The worker holding this job went away (e.g. a restart)
+        job['status'] = "failed"
+        job['error'] = "Import was interrupted, please upload the file again"
+    
+    return await plan_import_job_result(job)
+
+async def plan_import_job_result(job: dict) -> dict:
+    result = {
+        "job_id": job['id'],
+        "status": job['status'],
+        "attempts": job['attempts'],
+        "source": job.get('source', "model"),
+        "error": job['error']
+    }
+    if job['status'] == "completed":
+        plan = await db.training_plans.find_one({"id": job['plan_id']}, {"_id": 0})
+        if plan:
+            result["message"] = "Training plan imported successfully"
+            result["plan"] = {
+                "id": plan['id'],
+                "name": plan['name'],
+                "exercises": plan['exercises'],
+                "is_active": plan['is_active']
             }
-        }
-        
-    except Exception as e:
-        logger.error(f"Failed to import training plan: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Failed to process file: {str(e)}")
+    return result
 
 @api_router.post("/plans", response_model=TrainingPlan)
 async def create_training_plan(plan: TrainingPlanCreate, current_user: dict = Depends(get_current_user)):
@@ -1115,7 +2470,7 @@ async def create_training_plan(plan: TrainingPlanCreate, current_user: dict = De
         "id": plan_id,
         "user_id": current_user['id'],
         "name": plan.name,
-        "exercises": [e.model_dump() for e in plan.exercises],
+        "exercises": canonicalize_exercises([e.model_dump() for e in plan.exercises]),
         "is_active": True,
         "created_at": now,
         "updated_at": now
@@ -1158,7 +2513,7 @@ async def update_training_plan(
     if update.name is not None:
         update_data["name"] = update.name
     if update.exercises is not None:
-        update_data["exercises"] = [e.model_dump() for e in update.exercises]
+        update_data["exercises"] = canonicalize_exercises([e.model_dump() for e in update.exercises])
     if update.is_active is not None:
         if update.is_active:
             # Deactivate other plans first
@@ -1191,6 +2546,25 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+# ==================== ADMIN ROUTES ====================
+
+@api_router.get("/admin/indexes", dependencies=[Depends(require_admin)])
+async def get_index_stats():
+    """Index usage since server start; indexes with few ops are listed first"""
+    return await collect_index_stats()
+
+@api_router.get("/admin/metrics", dependencies=[Depends(require_admin)])
+async def get_metrics():
+    """In-process cache and queue counters for this worker"""
+    return {
+        "user_cache": user_cache.stats(),
+        "session_cache": session_store.stats(),
+        "plan_import_queue": plan_import_queue.stats(),
+        "plan_cache": plan_cache.stats(),
+        "oauth_client": oauth_client.stats(),
+        "password_hasher": password_hasher.stats()
+    }
+
 # Include the router
 app.include_router(api_router)
 
@@ -1200,6 +2574,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -1209,6 +2584,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def startup_db_client():
+    await ensure_indexes()
+    # Both in-memory indexes fall back to loading lazily on first use
+    try:
+        await load_face_index()
+    except Exception as e:
+        logger.error(f"Failed to load face index: {str(e)}")
+    try:
+        await load_leaderboard()
+    except Exception as e:
+        logger.error(f"Failed to load leaderboard: {str(e)}")
+    plan_import_queue.start()
+    oauth_client.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await plan_import_queue.stop()
+    await oauth_client.close()
+    password_hasher.shutdown()
     client.close()
@@ -0,0 +1,78 @@
+"""
+Cookie session store: MongoDB `user_sessions` with an in-process LRU in front.
+
+Valid sessions are cached for a short TTL and unknown tokens are cached
+as misses for a shorter one, so repeated cookie-authenticated requests
+skip the database. Expired documents are removed by MongoDB's TTL index
+on `expires_at`; cached entries are also checked against `expires_at` so
+a session never outlives its expiry here.
+"""
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from pymongo import ReturnDocument
+
+from cache import TTLCache
+
+_MISSING = object()
+
+
+def _aware(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class SessionStore:
+
+    def __init__(self, collection, maxsize: int = 10000, ttl: float = 60.0, negative_ttl: float = 10.0, clock: Callable[[], float] = time.monotonic):
+        self.collection = collection
+        self.negative_ttl = negative_ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+
+    async def get(self, session_token: str) -> Optional[dict]:
+        """The live session for a token as {"user_id", "expires_at"}, else None"""
+        session = self._cache.get(session_token, _MISSING)
+        if session is _MISSING:
+            doc = await self.collection.find_one(
+                {"session_token": session_token},
+                {"_id": 0, "user_id": 1, "expires_at": 1}
+            )
+            if doc:
+                session = {"user_id": doc["user_id"], "expires_at": _aware(doc["expires_at"])}
+                self._cache.set(session_token, session)
+            else:
+                session = None
+                self._cache.set(session_token, None, ttl=self.negative_ttl)
+
+        if session is None or session["expires_at"] <= datetime.now(timezone.utc):
+            return None
+        return session
+
+    async def create(self, user_id: str, session_token: str, expires_at: datetime):
+        """Start a session, replacing the user's previous one"""
+        previous = await self.collection.find_one_and_update(
+            {"user_id": user_id},
+            {"$set": {
+                "user_id": user_id,
+                "session_token": session_token,
+                "expires_at": expires_at,
+                "created_at": datetime.now(timezone.utc)
+            }},
+            projection={"_id": 0, "session_token": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous and previous.get("session_token") != session_token:
+            self._cache.pop(previous["session_token"])
+        self._cache.set(session_token, {"user_id": user_id, "expires_at": _aware(expires_at)})
+
+    async def delete(self, session_token: str):
+        await self.collection.delete_one({"session_token": session_token})
+        self._cache.set(session_token, None, ttl=self.negative_ttl)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
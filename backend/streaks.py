@@ -0,0 +1,94 @@
+"""
+Daily and weekly workout streaks.
+
+A streak is kept per user as {"current", "longest", "last"} for each kind,
+where `last` is the most recent period with a workout: the local date's
+ordinal for daily streaks, and the Monday-based week number for weekly
+ones. Logging a workout in the period after `last` extends the streak; any
+later period restarts it; the same period changes nothing. Each update is
+O(1), and `streak_stages` expresses it as an update pipeline so it can be
+applied in the same atomic write as the workout's XP.
+
+Workouts dated before `last` (imports, backfills) can bridge gaps, so those
+go through `replay_streaks` over the user's workout dates instead.
+"""
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo
+
+STREAK_KINDS = ("daily", "weekly")
+
+
+def local_date(created_at: str, zone: ZoneInfo) -> date:
+    moment = datetime.fromisoformat(created_at)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(zone).date()
+
+
+def streak_periods(day: date) -> dict:
+    """Daily and weekly period numbers of a local date"""
+    ordinal = day.toordinal()
+    # date.fromordinal(1) is a Monday
+    return {"daily": ordinal, "weekly": (ordinal - 1) // 7}
+
+
+def advance_streak(streak: Optional[dict], period: int) -> dict:
+    """The streak after a workout in `period`"""
+    streak = streak or {"current": 0, "longest": 0, "last": None}
+    last = streak.get('last')
+    if last is not None and period <= last:
+        return streak
+    current = streak['current'] + 1 if last is not None and period == last + 1 else 1
+    return {"current": current, "longest": max(streak['longest'], current), "last": period}
+
+
+def advance_streaks(streaks: Optional[dict], periods: dict) -> dict:
+    streaks = streaks or {}
+    return {kind: advance_streak(streaks.get(kind), periods[kind]) for kind in STREAK_KINDS}
+
+
+def replay_streaks(days: Iterable[date]) -> dict:
+    """Streaks from scratch over a user's workout dates"""
+    streaks = {}
+    for day in sorted(set(days)):
+        streaks = advance_streaks(streaks, streak_periods(day))
+    return streaks
+
+
+def streak_view(streaks: Optional[dict], today: date) -> dict:
+    """Streaks as shown to the user: a current streak is 0 once its next period has passed"""
+    periods = streak_periods(today)
+    view = {}
+    for kind in STREAK_KINDS:
+        streak = (streaks or {}).get(kind) or {"current": 0, "longest": 0, "last": None}
+        alive = streak['last'] is not None and streak['last'] >= periods[kind] - 1
+        view[kind] = {
+            "current": streak['current'] if alive else 0,
+            "longest": streak['longest'],
+            "active": streak['last'] == periods[kind],
+        }
+    return view
+
+
+def streak_metrics(streaks: Optional[dict]) -> dict:
+    """Achievement metrics for the streak rules"""
+    streaks = streaks or {}
+    return {f"{kind}_streak": (streaks.get(kind) or {}).get('longest', 0) for kind in STREAK_KINDS}
+
+
+def _advance_expr(kind: str, period: int) -> dict:
+    streak = {"$ifNull": [f"$streaks.{kind}", {"current": 0, "longest": 0, "last": None}]}
+    return {"$let": {"vars": {"s": streak}, "in": {"$cond": [
+        {"$and": [{"$ne": [{"$ifNull": ["$$s.last", None]}, None]}, {"$lte": [period, "$$s.last"]}]},
+        "$$s",
+        {"$let": {
+            "vars": {"c": {"$cond": [{"$eq": [period, {"$add": ["$$s.last", 1]}]}, {"$add": ["$$s.current", 1]}, 1]}},
+            "in": {"current": "$$c", "longest": {"$max": ["$$s.longest", "$$c"]}, "last": period}
+        }}
+    ]}}}
+
+
+def streak_stages(periods: dict) -> list:
+    """Pipeline stages applying advance_streaks() to the stored streaks"""
+    return [{"$set": {"streaks": {kind: _advance_expr(kind, periods[kind]) for kind in STREAK_KINDS}}}]
@@ -0,0 +1,48 @@
+"""
+Unit tests for the threshold-indexed achievement rules
+Tests: crossing detection, multi-metric conditions, backfill
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from achievements import AchievementRules
+
+RULES = AchievementRules([
+    {"id": "w1", "condition": {"total_workouts": 1}},
+    {"id": "w5", "condition": {"total_workouts": 5}},
+    {"id": "w10", "condition": {"total_workouts": 10}},
+    {"id": "s20", "condition": {"strength": 20}},
+    {"id": "combo", "condition": {"total_workouts": 5, "strength": 20}},
+])
+
+
+def _ids(achievements):
+    return sorted(ach["id"] for ach in achievements)
+
+
+def test_only_crossed_thresholds_are_returned():
+    assert _ids(RULES.crossed({"total_workouts": 0}, {"total_workouts": 1})) == ["w1"]
+    assert _ids(RULES.crossed({"total_workouts": 1}, {"total_workouts": 4})) == []
+    assert _ids(RULES.crossed({"total_workouts": 4}, {"total_workouts": 10})) == ["w10", "w5"]
+
+
+def test_threshold_reached_exactly_counts_once():
+    assert _ids(RULES.crossed({"total_workouts": 4}, {"total_workouts": 5})) == ["w5"]
+    assert _ids(RULES.crossed({"total_workouts": 5}, {"total_workouts": 6})) == []
+
+
+def test_multi_metric_condition_needs_every_metric():
+    assert _ids(RULES.crossed({"total_workouts": 4, "strength": 10}, {"total_workouts": 5, "strength": 10})) == ["w5"]
+    # Crossing the second metric later completes it
+    assert _ids(RULES.crossed({"total_workouts": 5, "strength": 19}, {"total_workouts": 5, "strength": 20})) == ["combo", "s20"]
+
+
+def test_decreasing_metric_crosses_nothing():
+    assert RULES.crossed({"total_workouts": 10}, {"total_workouts": 3}) == []
+
+
+def test_satisfied_lists_every_met_rule():
+    assert _ids(RULES.satisfied({"total_workouts": 7, "strength": 25})) == ["combo", "s20", "w1", "w5"]
+    assert RULES.satisfied({}) == []
@@ -0,0 +1,145 @@
+"""
+Unit tests for the pooled OAuth session client
+Tests: session caching, coalescing concurrent lookups, cancellation, invalid responses, circuit breaker
+"""
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_client import AuthServiceUnavailable, CircuitBreaker, OAuthSessionClient
+
+
+class StubAuthService:
+    """Stands in for the Emergent auth endpoint"""
+
+    def __init__(self, status_code=200, delay=0.0):
+        self.status_code = status_code
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        session_id = request.headers["X-Session-ID"]
+        return httpx.Response(self.status_code, json={"email": f"{session_id}@example.com", "session_token": f"token-{session_id}"})
+
+
+def _client(stub, **kwargs):
+    return OAuthSessionClient("http://auth.test/session-data", transport=httpx.MockTransport(stub), **kwargs)
+
+
+class TestSessionLookup:
+
+    def test_returns_user_data_and_caches_it(self):
+        stub = StubAuthService()
+
+        async def scenario():
+            client = _client(stub)
+            first = await client.fetch_session("abc")
+            second = await client.fetch_session("abc")
+            await client.close()
+            return first, second
+
+        first, second = asyncio.run(scenario())
+        assert first["email"] == "abc@example.com"
+        assert second == first
+        assert stub.calls == 1
+
+    def test_concurrent_lookups_share_one_request(self):
+        stub = StubAuthService(delay=0.05)
+
+        async def scenario():
+            client = _client(stub)
+            results = await asyncio.gather(*(client.fetch_session("abc") for _ in range(10)))
+            await client.close()
+            return results, client.coalesced
+
+        results, coalesced = asyncio.run(scenario())
+        assert stub.calls == 1
+        assert coalesced == 9
+        assert all(r["session_token"] == "token-abc" for r in results)
+
+    def test_rejected_session_is_none_and_not_cached(self):
+        stub = StubAuthService(status_code=401)
+
+        async def scenario():
+            client = _client(stub)
+            results = [await client.fetch_session("bad"), await client.fetch_session("bad")]
+            await client.close()
+            return results
+
+        assert asyncio.run(scenario()) == [None, None]
+        assert stub.calls == 2
+
+    def test_cancelled_lookup_does_not_strand_waiters(self):
+        stub = StubAuthService(delay=0.05)
+
+        async def scenario():
+            client = _client(stub)
+            leader = asyncio.create_task(client.fetch_session("abc"))
+            await asyncio.sleep(0.01)
+            waiter = asyncio.create_task(client.fetch_session("abc"))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            result = await asyncio.wait_for(waiter, timeout=3)
+            await client.close()
+            return leader, result, client.stats()
+
+        leader, result, stats = asyncio.run(scenario())
+        assert leader.cancelled()
+        assert result["session_token"] == "token-abc"
+        assert stats["in_flight"] == 0
+
+    def test_non_json_response_is_unavailable(self):
+        async def scenario():
+            client = _client(lambda request: httpx.Response(200, text="<html>maintenance</html>"))
+            with pytest.raises(AuthServiceUnavailable):
+                await client.fetch_session("abc")
+            failures = client.breaker.failures
+            await client.close()
+            return failures
+
+        assert asyncio.run(scenario()) == 1
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_failures_and_recovers(self):
+        now = [0.0]
+        stub = StubAuthService(status_code=502)
+
+        async def scenario():
+            client = _client(stub, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0]))
+            for session_id in ("a", "b"):
+                with pytest.raises(AuthServiceUnavailable):
+                    await client.fetch_session(session_id)
+            assert client.breaker.state == "open"
+
+            # Rejected without touching the service
+            with pytest.raises(AuthServiceUnavailable):
+                await client.fetch_session("c")
+            assert stub.calls == 2
+
+            now[0] = 11
+            stub.status_code = 200
+            assert (await client.fetch_session("d"))["email"] == "d@example.com"
+            assert client.breaker.state == "closed"
+            await client.close()
+
+        asyncio.run(scenario())
+
+    def test_failed_trial_reopens(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        now[0] = 10
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
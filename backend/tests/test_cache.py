@@ -0,0 +1,63 @@
+"""
+Unit tests for the TTL/LRU cache
+Tests: TTL expiry, per-entry TTL, LRU eviction order, hit/miss/eviction counters
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import TTLCache
+
+
+def _cache(maxsize=3, ttl=10):
+    now = [0.0]
+    return TTLCache(maxsize=maxsize, ttl=ttl, clock=lambda: now[0]), now
+
+
+def test_entries_expire_after_ttl():
+    cache, now = _cache()
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=2)
+    now[0] = 1.9
+    assert cache.get("a") == 1
+    assert cache.get("b") == 2
+    now[0] = 2
+    assert cache.get("b") is None
+    assert "b" not in cache
+    now[0] = 10
+    assert cache.get("a", "gone") == "gone"
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted_first():
+    cache, now = _cache(maxsize=3)
+    for key in "abc":
+        cache.set(key, key)
+    cache.get("a")
+    cache.set("d", "d")
+    assert "b" not in cache
+    assert all(key in cache for key in "acd")
+
+    # Re-setting also refreshes recency
+    cache.set("c", "c2")
+    cache.set("e", "e")
+    assert "a" not in cache
+    assert cache.get("c") == "c2"
+
+
+def test_counters():
+    cache, now = _cache(maxsize=2)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("missing")
+    cache.set("b", 2)
+    cache.set("c", 3)
+    now[0] = 20
+    cache.get("c")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 2, 1)
+    assert stats["hit_rate"] == round(1 / 3, 4)
+    assert stats["size"] == 1
+
+    assert TTLCache(maxsize=1, ttl=1).stats()["hit_rate"] == 0.0
@@ -0,0 +1,57 @@
+"""
+Unit tests for the exercise catalog
+Tests: alias and spelling resolution, unknown exercises, autocomplete
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exercise_catalog import ExerciseCatalog, compact_key, exercise_catalog
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("bench press", "Bench Press"),
+    ("Barbell Bench", "Bench Press"),
+    ("BB bench", "Bench Press"),
+    ("benchpres", "Bench Press"),
+    ("pull ups", "Pull-ups"),
+    ("PULLUPS", "Pull-ups"),
+    ("squats", "Squat"),
+    ("RDL", "Romanian Deadlift"),
+    ("hamer curl", "Hammer Curls"),
+])
+def test_resolves_to_catalog_name(text, expected):
+    assert exercise_catalog.resolve(text) == expected
+
+
+def test_unknown_exercise_keeps_its_name():
+    assert exercise_catalog.resolve("Zercher Squat") is None
+    assert exercise_catalog.canonical_name("  Zercher   Squat ") == "Zercher Squat"
+    assert exercise_catalog.resolve("") is None
+
+
+def test_compact_key():
+    assert compact_key("Pull-ups") == compact_key("pullups") == compact_key("Pull Up") == "pullup"
+    assert compact_key("Bench Press") == "benchpress"
+
+
+def test_search_prefers_names_starting_with_query():
+    names = [hit["name"] for hit in exercise_catalog.search("squ")]
+    assert names[0] == "Squat"
+    assert set(names) >= {"Front Squat", "Bulgarian Split Squat"}
+    assert all(hit["match"] == "prefix" for hit in exercise_catalog.search("squ"))
+
+
+def test_search_matches_later_words_and_misspellings():
+    assert "Bench Press" in [hit["name"] for hit in exercise_catalog.search("press")]
+    hits = exercise_catalog.search("dedlift")
+    assert hits[0] == {"name": "Deadlift", "category": "pull", "match": "fuzzy"}
+    assert exercise_catalog.search("  ") == []
+
+
+def test_alias_must_point_at_catalog_name():
+    with pytest.raises(ValueError):
+        ExerciseCatalog({"push": ("Bench Press",)}, {"Bench": "Flat Bench Press"})
@@ -0,0 +1,59 @@
+"""
+Unit tests for per-exercise sessions and records
+Tests: e1RM, per-set weights, merging repeated exercises, folding sessions
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exercise_records import epley_e1rm, exercise_key, exercise_sets, fold_sessions, workout_exercise_sessions
+
+
+def _workout(workout_id, created_at, exercises):
+    return {"id": workout_id, "user_id": "u1", "workout_type": "weightlifting", "created_at": created_at, "details": {"exercises": exercises}}
+
+
+def test_epley():
+    assert epley_e1rm(100, 1) == 100
+    assert epley_e1rm(100, 5) == 116.67
+    assert epley_e1rm(0, 10) == 0
+
+
+def test_exercise_key_ignores_case_spacing_and_aliases():
+    assert exercise_key("  Bench   Press ") == exercise_key("barbell bench") == "bench press"
+    assert exercise_key("Zercher  Squat") == "zercher squat"
+
+
+def test_per_set_weights():
+    exercise = {"sets": 3, "reps": "8-10", "weight": 50, "useSameWeight": False, "weights": [50, 60]}
+    assert exercise_sets(exercise) == [(50.0, 10), (60.0, 10), (50.0, 10)]
+
+
+def test_repeated_exercise_is_one_session():
+    sessions = workout_exercise_sessions(_workout("w1", "2026-01-01T10:00:00+00:00", [
+        {"name": "Squat", "sets": 2, "reps": "5", "weight": 100},
+        {"name": "squat", "sets": 1, "reps": "1", "weight": 130},
+        {"name": "Plank", "sets": 0, "reps": "1", "weight": 0},
+    ]))
+    assert len(sessions) == 1
+    session = sessions[0]
+    assert (session['sets'], session['reps'], session['volume'], session['top_weight']) == (3, 11, 1130.0, 130.0)
+    assert session['best_set'] == {"weight": 130.0, "reps": 1, "e1rm": 130.0}
+
+
+def test_cardio_has_no_sessions():
+    assert workout_exercise_sessions({"id": "c", "user_id": "u1", "workout_type": "cardio", "created_at": "x", "details": {}}) == []
+
+
+def test_fold_sessions_keeps_best_and_latest():
+    sessions = workout_exercise_sessions(_workout("w1", "2026-01-02T00:00:00+00:00", [{"name": "Bench", "sets": 3, "reps": "5", "weight": 80}]))
+    sessions += workout_exercise_sessions(_workout("w2", "2026-01-01T00:00:00+00:00", [{"name": "Bench", "sets": 1, "reps": "3", "weight": 90}]))
+    # "Bench" is a catalog alias
+    record = fold_sessions(sessions)["bench press"]
+    assert record['best_set']['workout_id'] == "w2"
+    assert record['top_weight'] == 90
+    assert record['best_session_volume'] == 1200
+    assert record['total_volume'] == 1470
+    assert record['sessions'] == 2
+    assert record['last_performed_at'] == "2026-01-02T00:00:00+00:00"
@@ -0,0 +1,97 @@
+"""
+Unit tests for the in-process face descriptor index
+Tests: exact search, threshold semantics, username-hint candidates, IVF mode
+"""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from face_index import FaceIndex
+
+
+def _descriptors(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=(n, 128))
+
+
+def _linear_scan(entries, query, threshold=0.6):
+    """Reference implementation matching the original login loop"""
+    best_match, best_similarity = None, threshold
+    query = np.array(query)
+    for user_id, stored in entries:
+        stored = np.array(stored)
+        similarity = np.dot(query, stored) / (np.linalg.norm(query) * np.linalg.norm(stored))
+        if similarity > best_similarity:
+            best_similarity, best_match = similarity, user_id
+    return best_match
+
+
+class TestExactSearch:
+    """Exact mode must agree with the original linear scan"""
+
+    def test_matches_linear_scan(self):
+        vectors = _descriptors(500)
+        entries = [(f"user-{i}", v) for i, v in enumerate(vectors)]
+        index = FaceIndex()
+        index.build(entries)
+
+        rng = np.random.default_rng(1)
+        for i in range(0, 500, 25):
+            query = vectors[i] + rng.normal(size=128) * 0.3
+            match = index.search(query)
+            assert match is not None
+            assert match[0] == _linear_scan(entries, query)
+
+    def test_below_threshold_returns_none(self):
+        index = FaceIndex()
+        index.build([("a", [1.0] + [0.0] * 127)])
+        assert index.search([0.0, 1.0] + [0.0] * 126) is None
+
+    def test_invalid_descriptors_are_skipped(self):
+        index = FaceIndex()
+        index.build([("short", [0.1] * 64), ("zero", [0.0] * 128), ("ok", [0.1] * 128)])
+        assert len(index) == 1
+        assert index.search([0.0] * 128) is None
+
+    def test_upsert_and_remove(self):
+        vectors = _descriptors(3)
+        index = FaceIndex()
+        index.build([("a", vectors[0]), ("b", vectors[1])])
+
+        index.upsert("c", vectors[2])
+        assert index.search(vectors[2])[0] == "c"
+
+        index.remove("a")
+        assert "a" not in index
+        assert index.search(vectors[0]) is None
+        assert index.search(vectors[1])[0] == "b"
+
+    def test_candidates_restrict_search(self):
+        vectors = _descriptors(2)
+        index = FaceIndex()
+        index.build([("a", vectors[0]), ("b", vectors[1])])
+        assert index.search(vectors[0], candidates=["b"]) is None
+        assert index.search(vectors[0], candidates=["a"])[0] == "a"
+
+
+class TestApproximateSearch:
+    """IVF mode should find near-duplicate descriptors"""
+
+    def test_ivf_finds_enrolled_face(self):
+        vectors = _descriptors(2000)
+        index = FaceIndex(n_lists=16, n_probe=4, min_points_per_list=10)
+        index.build([(f"user-{i}", v) for i, v in enumerate(vectors)])
+        assert index.approximate
+
+        rng = np.random.default_rng(2)
+        for i in range(0, 2000, 100):
+            query = vectors[i] + rng.normal(size=128) * 0.1
+            assert index.search(query)[0] == f"user-{i}"
+
+    def test_small_index_stays_exact(self):
+        index = FaceIndex(n_lists=16)
+        index.build([(f"user-{i}", v) for i, v in enumerate(_descriptors(10))])
+        assert not index.approximate
@@ -0,0 +1,61 @@
+"""
+Unit tests for the in-memory leaderboard
+Tests: shared ranks for ties, re-ranking, removal, neighbourhood at both ends
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leaderboard import Leaderboard
+
+
+def _user(user_id, level, xp=0):
+    return {"id": user_id, "username": user_id, "level": level, "xp": xp}
+
+
+def _board(*users):
+    board = Leaderboard()
+    board.load(users)
+    return board
+
+
+def test_ties_share_a_rank():
+    board = _board(_user("c", 3, 10), _user("a", 5, 20), _user("b", 5, 20))
+    assert [(row['id'], row['rank']) for row in board.page()] == [("a", 1), ("b", 1), ("c", 3)]
+    assert board.rank("b") == 1
+    assert board.rank("c") == 3
+    assert board.rank("missing") is None
+
+
+def test_update_reranks_user():
+    board = _board(_user("a", 5), _user("b", 4), _user("c", 3))
+    board.update(_user("c", 6))
+    assert [row['id'] for row in board.page()] == ["c", "a", "b"]
+    assert board.rank("c") == 1
+    assert board.rank("b") == 3
+
+    # Same level and XP: entry refreshed in place
+    board.update({**_user("a", 5), "total_workouts": 7})
+    assert board.page()[1]['total_workouts'] == 7
+    assert len(board) == 3
+
+    board.update(_user("d", 1))
+    assert board.rank("d") == 4
+
+
+def test_remove():
+    board = _board(_user("a", 5), _user("b", 5), _user("c", 3))
+    board.remove("a")
+    board.remove("missing")
+    assert "a" not in board
+    assert len(board) == 2
+    assert [(row['id'], row['rank']) for row in board.page()] == [("b", 1), ("c", 2)]
+
+
+def test_around_clips_at_both_ends():
+    board = _board(*(_user(f"u{i}", 20 - i) for i in range(10)))
+    assert [row['id'] for row in board.around("u0", radius=2)] == ["u0", "u1", "u2"]
+    assert [row['id'] for row in board.around("u9", radius=2)] == ["u7", "u8", "u9"]
+    assert [row['rank'] for row in board.around("u5", radius=1)] == [5, 6, 7]
+    assert board.around("missing") == []
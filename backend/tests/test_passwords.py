@@ -0,0 +1,44 @@
+"""
+Unit tests for the thread-pooled bcrypt hasher
+Tests: hash/verify round trip, cost detection for rehash, load shedding
+"""
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import PasswordHasher, PasswordHasherBusy
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(rounds=4)
+
+    async def scenario():
+        hashed = await hasher.hash("pw123456")
+        return hashed, await hasher.verify("pw123456", hashed), await hasher.verify("wrong", hashed)
+
+    hashed, ok, wrong = asyncio.run(scenario())
+    assert hashed.startswith("$2b$04$")
+    assert ok and not wrong
+    assert hasher.stats()["completed"] == 3
+    hasher.shutdown()
+
+
+def test_needs_rehash_when_cost_changes():
+    hasher = PasswordHasher(rounds=12)
+    assert not hasher.needs_rehash("$2b$12$" + "a" * 53)
+    assert hasher.needs_rehash("$2b$10$" + "a" * 53)
+    assert hasher.needs_rehash("not-a-bcrypt-hash")
+
+
+def test_rejects_when_queue_is_full():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=1)
+
+    async def scenario():
+        return await asyncio.gather(hasher.hash("a"), hasher.hash("b"), return_exceptions=True)
+
+    first, second = asyncio.run(scenario())
+    assert isinstance(first, str)
+    assert isinstance(second, PasswordHasherBusy)
+    hasher.shutdown()
@@ -0,0 +1,154 @@
+"""
+Unit tests for the training plan import pipeline
+Tests: AI response parsing, prompt version, fake LLM backend, job queue retries and failures
+"""
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plan_import import (
+    PLAN_IMPORT_SYSTEM_PROMPT, PLAN_PROMPT_VERSION, FakePlanBackend, GeminiPlanBackend, JobQueue, PlanImportError,
+    PlanUpload, parse_plan_response, plan_cache_digest, plan_cache_key,
+)
+
+
+class TestParsePlanResponse:
+    """Model responses arrive with or without code fences"""
+
+    def test_plain_json(self):
+        plan = parse_plan_response('{"plan_name": "PPL", "exercises": []}')
+        assert plan["plan_name"] == "PPL"
+
+    def test_fenced_json(self):
+        plan = parse_plan_response('```json\n{"plan_name": "PPL", "exercises": []}\n```')
+        assert plan["plan_name"] == "PPL"
+
+    def test_json_inside_chatter(self):
+        plan = parse_plan_response('Here you go: {"plan_name": "PPL", "exercises": []} enjoy!')
+        assert plan["plan_name"] == "PPL"
+
+    def test_garbage_raises(self):
+        with pytest.raises(PlanImportError):
+            parse_plan_response("no json here")
+
+
+class TestFakeBackend:
+
+    def test_echoes_text_lines(self):
+        backend = FakePlanBackend()
+        response = asyncio.run(backend.extract(PlanUpload.from_bytes(b"Squat\n\nLunges\n"), "text/plain", "legs.txt", "s"))
+        plan = json.loads(response)
+        assert plan["plan_name"] == "legs"
+        assert [e["name"] for e in plan["exercises"]] == ["Squat", "Lunges"]
+
+
+class TestPlanCacheKey:
+    """Cache keys address content, not filenames"""
+
+    def test_same_bytes_same_key(self):
+        backend = FakePlanBackend()
+        assert plan_cache_key(b"Squat", "text/plain", backend) == plan_cache_key(b"Squat", "text/plain", backend)
+
+    def test_key_covers_content_type_and_model(self):
+        key = plan_cache_key(b"Squat", "text/plain", FakePlanBackend())
+        assert key != plan_cache_key(b"Squat!", "text/plain", FakePlanBackend())
+        assert key != plan_cache_key(b"Squat", "application/pdf", FakePlanBackend())
+        assert key != plan_cache_key(b"Squat", "text/plain", GeminiPlanBackend("key"))
+
+    def test_prompt_version_is_pinned(self):
+        # The prompt is rendered from plan_parser.EXERCISE_CATEGORIES; changing it
+        # invalidates every cached plan, so update this pin only on purpose
+        assert "Lateral Raises" in PLAN_IMPORT_SYSTEM_PROMPT
+        assert PLAN_PROMPT_VERSION == "cbde7d6c50fe3779"
+
+
+class TestPlanUpload:
+    """Uploads are hashed while written and spill to disk past the spool size"""
+
+    def test_streamed_key_matches_cache_key(self):
+        backend = FakePlanBackend()
+        upload = PlanUpload(plan_cache_digest("application/pdf", backend), spool_bytes=16)
+        for chunk in (b"%PDF-1.4 ", b"x" * 100, b" %%EOF"):
+            upload.write(chunk)
+        content = b"%PDF-1.4 " + b"x" * 100 + b" %%EOF"
+        assert upload.size == len(content)
+        assert upload.read() == content
+        assert upload.key == plan_cache_key(content, "application/pdf", backend)
+        upload.close()
+
+    def test_named_copy_is_removed(self):
+        upload = PlanUpload.from_bytes(b"plan")
+        with upload.as_path(suffix=".pdf") as path:
+            with open(path, "rb") as f:
+                assert f.read() == b"plan"
+        assert not os.path.exists(path)
+
+    def test_named_copy_is_removed_on_error(self):
+        upload = PlanUpload.from_bytes(b"plan")
+        with pytest.raises(RuntimeError):
+            with upload.as_path() as path:
+                raise RuntimeError("model call failed")
+        assert not os.path.exists(path)
+
+
+class TestJobQueue:
+    """Jobs are retried with backoff and reported once they finally fail"""
+
+    def _run(self, handler, max_attempts=3):
+        failed = []
+
+        async def on_failure(job, error):
+            failed.append((job["id"], str(error)))
+
+        async def scenario():
+            queue = JobQueue(handler, on_failure, workers=2, max_attempts=max_attempts, retry_delay=0.001)
+            queue.start()
+            for i in range(4):
+                queue.submit({"id": i})
+            await queue._queue.join()
+            await queue.stop()
+            return queue.stats()
+
+        return asyncio.run(scenario()), failed
+
+    def test_retries_until_success(self):
+        attempts = {}
+
+        async def handler(job, attempt):
+            attempts[job["id"]] = attempt
+            if attempt < 2:
+                raise RuntimeError("flaky")
+
+        stats, failed = self._run(handler)
+        assert failed == []
+        assert stats["completed"] == 4
+        assert stats["retries"] == 4
+        assert set(attempts.values()) == {2}
+
+    def test_gives_up_after_max_attempts(self):
+        async def handler(job, attempt):
+            raise RuntimeError("down")
+
+        stats, failed = self._run(handler, max_attempts=2)
+        assert stats["failed"] == 4
+        assert sorted(job_id for job_id, _ in failed) == [0, 1, 2, 3]
+
+    def test_submit_raises_when_full(self):
+        async def scenario():
+            async def handler(job, attempt):
+                pass
+
+            async def on_failure(job, error):
+                pass
+
+            queue = JobQueue(handler, on_failure, max_size=1)
+            queue.submit({"id": 1})
+            with pytest.raises(asyncio.QueueFull):
+                queue.submit({"id": 2})
+
+        asyncio.run(scenario())
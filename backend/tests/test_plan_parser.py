@@ -0,0 +1,67 @@
+"""
+Unit tests for the local plain-text training plan parser
+Tests: sets x reps schemes, weights and units, categories, confidence routing
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plan_parser import MIN_CONFIDENCE, categorize_exercise, parse_exercise_line, parse_text_plan
+
+
+class TestExerciseLines:
+
+    def test_rep_range_and_kg(self):
+        exercise, score = parse_exercise_line("Bench Press 4x8-12 @ 80kg")
+        assert (exercise["name"], exercise["sets"], exercise["reps"], exercise["weight"]) == ("Bench Press", 4, "8-12", 80.0)
+        assert exercise["category"] == "push"
+        assert score == 1.0
+
+    def test_sets_of_reps_in_pounds(self):
+        exercise, _ = parse_exercise_line("Barbell Row 3 sets of 10 reps 135 lbs")
+        assert (exercise["sets"], exercise["reps"], exercise["weight"]) == (3, "10", 61.2)
+
+    def test_weight_before_scheme_and_notes(self):
+        exercise, _ = parse_exercise_line("Squat 100kg 5x5 (pause at bottom)")
+        assert (exercise["name"], exercise["weight"], exercise["notes"]) == ("Squat", 100.0, "pause at bottom")
+
+    def test_line_without_scheme(self):
+        assert parse_exercise_line("Rest 90 seconds between sets") is None
+
+    def test_unknown_exercise_scores_lower(self):
+        _, score = parse_exercise_line("Zercher carry 3x20")
+        assert score < 1.0
+
+
+class TestCategories:
+
+    def test_longest_name_wins(self):
+        assert categorize_exercise("Leg Curls") == "legs"
+        assert categorize_exercise("Hammer Curls") == "pull"
+        assert categorize_exercise("Leg Press") == "legs"
+
+    def test_section_overrides_fallback_only(self):
+        assert categorize_exercise("Nordic Curls") == "legs"
+        assert categorize_exercise("Cable Kickbacks", section="legs") == "legs"
+        assert categorize_exercise("Deadlift", section="legs") == "pull"
+
+
+class TestTextPlans:
+
+    def test_well_formed_plan_is_confident(self):
+        plan, confidence = parse_text_plan("Push Day\n1. Bench Press 4x8-12\n2. Dips 3x10\n")
+        assert plan["plan_name"] == "Push Day"
+        assert [e["name"] for e in plan["exercises"]] == ["Bench Press", "Dips"]
+        assert confidence >= MIN_CONFIDENCE
+
+    def test_prose_falls_back_to_llm(self):
+        _, confidence = parse_text_plan(
+            "Warm up well, then work up to a heavy single on squats before back-off sets.\n"
+        )
+        assert confidence < MIN_CONFIDENCE
+
+    def test_empty_plan(self):
+        plan, confidence = parse_text_plan("")
+        assert plan == {"plan_name": "Imported Plan", "exercises": []}
+        assert confidence == 0.0
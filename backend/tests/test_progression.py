@@ -0,0 +1,43 @@
+"""
+Unit tests for the closed-form level curve
+Tests: cumulative thresholds, inverse at level boundaries, legacy documents
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from progression import level_fields, level_for, lifetime_xp_of, progress_for, xp_to_level, xp_to_reach
+
+
+def test_thresholds_are_the_running_sum_of_level_costs():
+    total = 0
+    for level in range(1, 200):
+        assert xp_to_reach(level) == total
+        total += xp_to_level(level)
+    n = 41
+    assert xp_to_reach(n + 1) == 75 * n * n + 25 * n
+
+
+def test_level_for_matches_boundaries():
+    for level in range(1, 2000):
+        start = xp_to_reach(level)
+        assert level_for(start) == level
+        assert level_for(start + xp_to_level(level) - 1) == level
+    assert level_for(0) == 1
+    assert level_for(-5) == 1
+
+
+def test_progress_for():
+    assert progress_for(0) == (1, 0, 100)
+    assert progress_for(99) == (1, 99, 100)
+    assert progress_for(100) == (2, 0, 250)
+    assert progress_for(349) == (2, 249, 250)
+    assert level_fields(350) == {"lifetime_xp": 350, "level": 3, "xp": 0, "xp_to_next_level": 400}
+
+
+def test_lifetime_xp_of_legacy_user():
+    assert lifetime_xp_of({"lifetime_xp": 1234, "level": 1, "xp": 0}) == 1234
+    assert lifetime_xp_of({"level": 3, "xp": 50}) == 400
+    # xp left above the threshold by older reward grants still counts
+    assert level_for(lifetime_xp_of({"level": 1, "xp": 500})) == 3
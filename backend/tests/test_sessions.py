@@ -0,0 +1,127 @@
+"""
+Unit tests for the cached cookie session store
+Tests: cached misses, cache expiry, session expiry, logout, replacing a user's previous session
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sessions import SessionStore
+
+
+class FakeSessions:
+    """Just enough of a motor collection for SessionStore, counting reads"""
+
+    def __init__(self):
+        self.docs = []
+        self.reads = 0
+
+    def _match(self, query):
+        return next((doc for doc in self.docs if all(doc.get(k) == v for k, v in query.items())), None)
+
+    async def find_one(self, query, projection=None):
+        self.reads += 1
+        doc = self._match(query)
+        return dict(doc) if doc else None
+
+    async def find_one_and_update(self, query, update, projection=None, upsert=False, return_document=None):
+        doc = self._match(query)
+        before = dict(doc) if doc else None
+        if doc is None and upsert:
+            doc = {}
+            self.docs.append(doc)
+        doc.update(update["$set"])
+        return before
+
+    async def delete_one(self, query):
+        doc = self._match(query)
+        if doc:
+            self.docs.remove(doc)
+
+
+def _store(**kwargs):
+    now = [0.0]
+    collection = FakeSessions()
+    store = SessionStore(collection, ttl=60, negative_ttl=10, clock=lambda: now[0], **kwargs)
+    return store, collection, now
+
+
+def _in(hours):
+    return datetime.now(timezone.utc) + timedelta(hours=hours)
+
+
+def test_unknown_token_is_cached_as_a_miss():
+    store, collection, now = _store()
+
+    async def scenario():
+        assert await store.get("nope") is None
+        assert await store.get("nope") is None
+        assert collection.reads == 1
+
+        # A cached miss hides a new document until the negative TTL runs out
+        collection.docs.append({"user_id": "u1", "session_token": "nope", "expires_at": _in(1)})
+        assert await store.get("nope") is None
+        now[0] = 11
+        assert (await store.get("nope"))["user_id"] == "u1"
+        assert collection.reads == 2
+
+    asyncio.run(scenario())
+
+
+def test_cached_session_is_reloaded_after_ttl():
+    store, collection, now = _store()
+
+    async def scenario():
+        collection.docs.append({"user_id": "u1", "session_token": "t1", "expires_at": _in(1).isoformat()})
+        assert (await store.get("t1"))["user_id"] == "u1"
+        assert (await store.get("t1"))["user_id"] == "u1"
+        assert collection.reads == 1
+
+        collection.docs.clear()
+        now[0] = 61
+        assert await store.get("t1") is None
+        assert collection.reads == 2
+
+    asyncio.run(scenario())
+
+
+def test_cached_session_never_outlives_its_expiry():
+    store, collection, now = _store()
+
+    async def scenario():
+        await store.create("u1", "t1", datetime.now(timezone.utc) - timedelta(seconds=1))
+        assert await store.get("t1") is None
+        assert collection.reads == 0
+
+    asyncio.run(scenario())
+
+
+def test_logout_invalidates_cached_session():
+    store, collection, now = _store()
+
+    async def scenario():
+        await store.create("u1", "t1", _in(1))
+        assert (await store.get("t1"))["user_id"] == "u1"
+        await store.delete("t1")
+        assert await store.get("t1") is None
+        assert collection.docs == []
+        assert collection.reads == 0
+
+    asyncio.run(scenario())
+
+
+def test_create_replaces_previous_token():
+    store, collection, now = _store()
+
+    async def scenario():
+        await store.create("u1", "old", _in(1))
+        assert (await store.get("old"))["user_id"] == "u1"
+        await store.create("u1", "new", _in(1))
+        assert await store.get("old") is None
+        assert (await store.get("new"))["user_id"] == "u1"
+        assert len(collection.docs) == 1
+
+    asyncio.run(scenario())
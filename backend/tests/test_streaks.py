@@ -0,0 +1,84 @@
+"""
+Unit tests for daily and weekly streaks
+Tests: advancing, same period, gaps, backdated periods, replay, expiry, week numbering, local dates
+"""
+import os
+import sys
+from datetime import date, timedelta
+from zoneinfo import ZoneInfo
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaks import advance_streak, advance_streaks, local_date, replay_streaks, streak_metrics, streak_periods, streak_view
+
+
+def test_consecutive_periods_extend_the_streak():
+    streak = None
+    for period in (10, 11, 12):
+        streak = advance_streak(streak, period)
+    assert streak == {"current": 3, "longest": 3, "last": 12}
+
+
+def test_same_period_changes_nothing():
+    streak = advance_streak(None, 10)
+    assert advance_streak(streak, 10) == streak
+
+
+def test_gap_restarts_but_keeps_longest():
+    streak = None
+    for period in (1, 2, 3, 7, 8):
+        streak = advance_streak(streak, period)
+    assert streak == {"current": 2, "longest": 3, "last": 8}
+
+
+def test_backdated_period_is_ignored_incrementally():
+    streak = advance_streak(advance_streak(None, 5), 7)
+    assert advance_streak(streak, 6) == streak
+
+
+def test_replay_bridges_backdated_gaps():
+    start = date(2026, 3, 2)
+    days = [start, start + timedelta(days=2), start + timedelta(days=1), start]
+    streaks = replay_streaks(days)
+    assert streaks['daily'] == {"current": 3, "longest": 3, "last": start.toordinal() + 2}
+    assert streaks['weekly']['current'] == 1
+    assert replay_streaks([]) == {}
+
+
+def test_replay_matches_incremental_updates_in_order():
+    days = [date(2026, 1, 1) + timedelta(days=offset) for offset in (0, 1, 2, 5, 9, 10, 20, 30)]
+    streaks = {}
+    for day in days:
+        streaks = advance_streaks(streaks, streak_periods(day))
+    assert replay_streaks(reversed(days)) == streaks
+
+
+def test_weeks_start_on_monday():
+    monday = date(2026, 3, 2)
+    assert monday.weekday() == 0
+    assert streak_periods(monday)['weekly'] == streak_periods(monday + timedelta(days=6))['weekly']
+    assert streak_periods(monday + timedelta(days=7))['weekly'] == streak_periods(monday)['weekly'] + 1
+    assert streak_periods(monday - timedelta(days=1))['weekly'] == streak_periods(monday)['weekly'] - 1
+
+
+def test_view_expires_current_streak_after_a_missed_period():
+    today = date(2026, 3, 10)
+    streaks = replay_streaks([today - timedelta(days=2), today - timedelta(days=1)])
+    view = streak_view(streaks, today)
+    assert view['daily'] == {"current": 2, "longest": 2, "active": False}
+    view = streak_view(streaks, today + timedelta(days=1))
+    assert view['daily'] == {"current": 0, "longest": 2, "active": False}
+    assert streak_view(None, today)['weekly'] == {"current": 0, "longest": 0, "active": False}
+
+
+def test_local_date_uses_the_users_zone():
+    created_at = "2026-03-02T23:30:00+00:00"
+    assert local_date(created_at, ZoneInfo("UTC")) == date(2026, 3, 2)
+    assert local_date(created_at, ZoneInfo("Europe/Paris")) == date(2026, 3, 3)
+    assert local_date("2026-03-02T23:30:00", ZoneInfo("America/New_York")) == date(2026, 3, 2)
+
+
+def test_metrics_use_longest_streaks():
+    streaks = {"daily": {"current": 1, "longest": 4, "last": 9}}
+    assert streak_metrics(streaks) == {"daily_streak": 4, "weekly_streak": 0}
+    assert streak_metrics(None) == {"daily_streak": 0, "weekly_streak": 0}
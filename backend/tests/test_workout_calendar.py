@@ -0,0 +1,64 @@
+"""
+Unit tests for the workout calendar route
+Tests: days grouped in the user's saved time zone by default, explicit tz override
+"""
+import asyncio
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+
+import server
+
+
+class RecordingWorkouts:
+    """Captures the aggregation pipeline and returns one day bucket"""
+
+    def __init__(self):
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+
+        async def buckets():
+            yield {"_id": "2026-03-02", "count": 1, "xp": 10, "volume": 0, "types": ["cardio"], "categories": [None]}
+        return buckets()
+
+
+class FakeDatabase:
+
+    def __init__(self):
+        self.workouts = RecordingWorkouts()
+
+
+def _calendar(monkeypatch, user, tz=None):
+    database = FakeDatabase()
+    monkeypatch.setattr(server, "db", database)
+    result = asyncio.run(server.get_workout_calendar(start=date(2026, 3, 1), end=date(2026, 3, 31), tz=tz, current_user=user))
+    group = database.workouts.pipelines[0][1]["$group"]
+    return result, group["_id"]["$dateToString"]["timezone"], database.workouts.pipelines[0][0]["$match"]["created_at"]
+
+
+def test_defaults_to_the_users_saved_zone(monkeypatch):
+    result, group_zone, created_at = _calendar(monkeypatch, {"id": "u1", "timezone": "Europe/Paris"})
+    assert group_zone == "Europe/Paris"
+    assert result["timezone"] == "Europe/Paris"
+    # The range and the grouping use the same zone: local midnight in Paris
+    assert created_at["$gte"] == "2026-02-28T23:00:00+00:00"
+    assert result["days"][0]["date"] == "2026-03-02"
+
+
+def test_falls_back_to_utc_without_a_saved_zone(monkeypatch):
+    result, group_zone, created_at = _calendar(monkeypatch, {"id": "u1"})
+    assert group_zone == "UTC"
+    assert result["timezone"] == "UTC"
+    assert created_at["$gte"] == "2026-03-01T00:00:00+00:00"
+
+
+def test_explicit_tz_overrides_the_saved_zone(monkeypatch):
+    result, group_zone, _ = _calendar(monkeypatch, {"id": "u1", "timezone": "Europe/Paris"}, tz="America/New_York")
+    assert group_zone == "America/New_York"
+    assert result["timezone"] == "America/New_York"
@@ -0,0 +1,81 @@
+"""
+Unit tests for the streaming workout import
+Tests: effects of workouts stored before an import stops partway
+"""
+import asyncio
+import json
+import os
+import sys
+
+import mongomock_motor
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+
+import server
+
+USER = {"id": "user-1", "level": 1, "xp": 0, "lifetime_xp": 0, "xp_to_next_level": 100,
+        "strength": 0, "endurance": 0, "agility": 0, "total_workouts": 0}
+
+
+def streamed_request(body: bytes, chunk_size: int = 64) -> Request:
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def receive():
+        if chunks:
+            chunk = chunks.pop(0)
+            return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+        return {"type": "http.disconnect"}
+
+    scope = {"type": "http", "method": "POST", "path": "/api/workouts/import", "headers": [(b"content-type", b"application/x-ndjson")]}
+    return Request(scope, receive)
+
+
+def ndjson(count: int) -> bytes:
+    lines = [json.dumps({"workout_type": "cardio", "date": f"2025-01-{day + 1:02d}", "activity": "running", "duration_minutes": 30})
+             for day in range(count)]
+    return "\n".join(lines).encode()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    database = mongomock_motor.AsyncMongoMockClient()["test_database"]
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "IMPORT_CHUNK_SIZE", 2)
+    asyncio.run(database.users.insert_one(dict(USER)))
+    return database
+
+
+def test_oversized_import_applies_effects_of_stored_chunks(db, monkeypatch):
+    body = ndjson(10)
+    # Fails once about half the body has streamed in
+    monkeypatch.setattr(server, "IMPORT_MAX_BYTES", len(body) // 2)
+
+    async def scenario():
+        with pytest.raises(HTTPException) as error:
+            await server.import_workouts(streamed_request(body), "ndjson", dict(USER))
+        assert error.value.status_code == 413
+        stored = await db.workouts.count_documents({"user_id": USER['id']})
+        user = await db.users.find_one({"id": USER['id']})
+        return stored, user
+
+    stored, user = asyncio.run(scenario())
+    assert 0 < stored < 10
+    assert user['total_workouts'] == stored
+    assert user['lifetime_xp'] > 0
+
+
+def test_completed_import_applies_effects_once(db):
+    async def scenario():
+        result = await server.import_workouts(streamed_request(ndjson(5)), "ndjson", dict(USER))
+        return result, await db.users.find_one({"id": USER['id']})
+
+    result, user = asyncio.run(scenario())
+    assert result['imported'] == 5
+    assert user['total_workouts'] == 5
+    # Quest rewards can come on top of the workouts' own XP
+    assert user['lifetime_xp'] >= result['xp_earned'] > 0
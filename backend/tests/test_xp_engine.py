@@ -0,0 +1,62 @@
+"""
+Unit tests for the scalar and batched XP formulas
+Tests: reps parsing, missing cardio fields, vectorized parity
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from xp_engine import WorkoutColumns, calculate_workout_volume, calculate_workout_xp, parse_reps, per_user, workout_rewards
+
+
+class TestParseReps:
+
+    def test_plain_and_ranges(self):
+        assert parse_reps("8") == 8
+        assert parse_reps(12) == 12
+        assert parse_reps("8-12") == 12
+
+    def test_unreadable_falls_back(self):
+        assert parse_reps("AMRAP") == 10
+        assert parse_reps("8-max") == 10
+        assert parse_reps(None) == 10
+        assert parse_reps("") == 10
+
+
+def test_volume_ignores_missing_numbers():
+    details = {"exercises": [{"sets": 3, "reps": "10", "weight": None}, {"sets": 2, "reps": "5", "weight": 100}]}
+    assert calculate_workout_volume(details) == 1000
+
+
+def test_cardio_without_distance():
+    xp, stats = calculate_workout_xp("cardio", {"duration_minutes": 30, "distance_km": None})
+    assert xp == 15
+    assert stats == {"strength": 0, "endurance": 3, "agility": 1}
+
+
+def test_vectorized_matches_scalar():
+    rng = random.Random(3)
+    workouts = []
+    for i in range(500):
+        if rng.random() < 0.6:
+            details = {"exercises": [
+                {"sets": rng.randint(1, 5), "reps": rng.choice(["5", "8-12", "AMRAP", 10]), "weight": rng.choice([0, 22.5, 100, None])}
+                for _ in range(rng.randint(0, 5))
+            ]}
+            workout_type = "weightlifting"
+        else:
+            details = {"duration_minutes": rng.randint(0, 120), "distance_km": rng.choice([None, 0.4, 5, 42.2])}
+            workout_type = rng.choice(["cardio", "yoga"])
+        workouts.append({"id": str(i), "user_id": f"u{i % 7}", "workout_type": workout_type, "details": details})
+
+    columns = WorkoutColumns.from_workouts(workouts)
+    rewards = workout_rewards(columns)
+    for row, workout in enumerate(workouts):
+        xp, stats = calculate_workout_xp(workout["workout_type"], workout["details"])
+        assert rewards["xp"][row] == xp
+        for stat, value in stats.items():
+            assert rewards[stat][row] == value
+    assert per_user(columns, rewards["xp"]).sum() == rewards["xp"].sum()
+
@@ -0,0 +1,195 @@
+"""
+Workout XP formulas, scalar and batched.
+
+`calculate_workout_xp` scores one workout as it is logged. `WorkoutColumns`
+loads many workouts into flat NumPy columns (one row per workout plus one
+per weightlifting exercise) so `workout_rewards` can score a whole history
+with array arithmetic. Both paths share the same formulas and must agree
+exactly; the recompute command relies on it.
+"""
+from array import array
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+DEFAULT_REPS = 10
+MIN_WORKOUT_XP = 10
+MAX_WORKOUT_XP = 50
+
+# Rewards stored on each workout document, kept to diff against a recompute
+STORED_FIELDS = ("xp", "strength", "endurance", "agility", "volume")
+
+TYPE_OTHER, TYPE_WEIGHTLIFTING, TYPE_CARDIO = 0, 1, 2
+WORKOUT_TYPE_CODES = {"weightlifting": TYPE_WEIGHTLIFTING, "cardio": TYPE_CARDIO}
+
+_reps_cache: Dict[str, int] = {}
+
+
+def parse_reps(value) -> int:
+    """Reps of one set: ranges like "8-12" count their upper end, anything unreadable (AMRAP) counts 10"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    text = str(value if value is not None else "").strip()
+    reps = _reps_cache.get(text)
+    if reps is None:
+        try:
+            reps = int(float(text.rsplit('-', 1)[-1]))
+        except (ValueError, OverflowError):
+            reps = DEFAULT_REPS
+        if len(_reps_cache) < 4096:
+            _reps_cache[text] = reps
+    return reps
+
+
+def _number(value) -> float:
+    """Numeric form of an optional field; None and junk count as 0"""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def calculate_workout_volume(details: dict) -> float:
+    """Total weightlifting volume (sets * reps * weight) of a workout"""
+    total_volume = 0
+    for e in details.get('exercises') or []:
+        total_volume += _number(e.get('sets')) * parse_reps(e.get('reps', '0')) * _number(e.get('weight'))
+    return total_volume
+
+
+def calculate_workout_xp(workout_type: str, details: dict) -> tuple:
+    """Calculate XP and stat gains from workout"""
+    xp = 0
+    stats = {"strength": 0, "endurance": 0, "agility": 0}
+
+    if workout_type == "weightlifting":
+        # XP based on total volume (sets * reps * weight)
+        total_volume = calculate_workout_volume(details)
+        exercises = len(details.get('exercises') or [])
+
+        xp = min(int(total_volume / 100) + exercises * 5, MAX_WORKOUT_XP)
+        stats["strength"] = min(exercises, 3)
+        stats["agility"] = 1 if exercises >= 3 else 0
+
+    elif workout_type == "cardio":
+        duration = _number(details.get('duration_minutes'))
+        distance = _number(details.get('distance_km'))
+        xp = min(int(duration / 2) + int(distance * 5), MAX_WORKOUT_XP)
+        stats["endurance"] = min(int(duration / 10), 3)
+        stats["agility"] = 1 if duration >= 20 else 0
+
+    return max(xp, MIN_WORKOUT_XP), stats  # Minimum 10 XP per workout
+
+
+class WorkoutColumns:
+    """Columnar view of a batch of workouts, grouped by user"""
+
+    def __init__(self):
+        self.user_ids: List[str] = []
+        self._user_codes: Dict[str, int] = {}
+        self.workout_ids: List[str] = []
+        self._user = array('i')
+        self._type = array('b')
+        self._duration = array('d')
+        self._distance = array('d')
+        self._stored = {field: array('d') for field in STORED_FIELDS}
+        self._exercise_workout = array('i')
+        self._sets = array('d')
+        self._reps = array('d')
+        self._weight = array('d')
+
+    @classmethod
+    def from_workouts(cls, workouts: Iterable[dict]) -> "WorkoutColumns":
+        columns = cls()
+        for workout in workouts:
+            columns.append(workout)
+        return columns.freeze()
+
+    def append(self, workout: dict):
+        row = len(self._user)
+        code = self._user_codes.get(workout['user_id'])
+        if code is None:
+            code = self._user_codes[workout['user_id']] = len(self.user_ids)
+            self.user_ids.append(workout['user_id'])
+        details = workout.get('details') or {}
+        workout_type = WORKOUT_TYPE_CODES.get(workout.get('workout_type'), TYPE_OTHER)
+
+        self.workout_ids.append(workout.get('id'))
+        self._user.append(code)
+        self._type.append(workout_type)
+        stats_gained = workout.get('stats_gained') or {}
+        self._stored['xp'].append(_number(workout.get('xp_earned')))
+        for stat in ("strength", "endurance", "agility"):
+            self._stored[stat].append(_number(stats_gained.get(stat)))
+        self._stored['volume'].append(_number(workout.get('volume')))
+        if workout_type == TYPE_CARDIO:
+            self._duration.append(_number(details.get('duration_minutes')))
+            self._distance.append(_number(details.get('distance_km')))
+        else:
+            self._duration.append(0.0)
+            self._distance.append(0.0)
+        if workout_type == TYPE_WEIGHTLIFTING:
+            for e in details.get('exercises') or []:
+                self._exercise_workout.append(row)
+                self._sets.append(_number(e.get('sets')))
+                self._reps.append(parse_reps(e.get('reps', '0')))
+                self._weight.append(_number(e.get('weight')))
+
+    def freeze(self) -> "WorkoutColumns":
+        """Expose the appended rows as NumPy arrays (zero-copy views)"""
+        self.user = np.frombuffer(self._user, dtype=np.int32)
+        self.workout_type = np.frombuffer(self._type, dtype=np.int8)
+        self.duration = np.frombuffer(self._duration, dtype=np.float64)
+        self.distance = np.frombuffer(self._distance, dtype=np.float64)
+        self.stored = {field: np.frombuffer(values, dtype=np.float64) for field, values in self._stored.items()}
+        self.exercise_workout = np.frombuffer(self._exercise_workout, dtype=np.int32)
+        self.sets = np.frombuffer(self._sets, dtype=np.float64)
+        self.reps = np.frombuffer(self._reps, dtype=np.float64)
+        self.weight = np.frombuffer(self._weight, dtype=np.float64)
+        return self
+
+    def __len__(self):
+        return len(self._user)
+
+
+def workout_rewards(columns: WorkoutColumns) -> Dict[str, np.ndarray]:
+    """Per-workout volume, xp and stat gains; the array form of calculate_workout_xp"""
+    rows = len(columns)
+    is_weights = columns.workout_type == TYPE_WEIGHTLIFTING
+    is_cardio = columns.workout_type == TYPE_CARDIO
+
+    volume = np.bincount(columns.exercise_workout, weights=columns.sets * columns.reps * columns.weight, minlength=rows)
+    exercises = np.bincount(columns.exercise_workout, minlength=rows)
+
+    xp = np.zeros(rows, dtype=np.int64)
+    strength = np.zeros(rows, dtype=np.int64)
+    endurance = np.zeros(rows, dtype=np.int64)
+    agility = np.zeros(rows, dtype=np.int64)
+
+    weights_xp = np.minimum(np.trunc(volume / 100).astype(np.int64) + exercises * 5, MAX_WORKOUT_XP)
+    cardio_xp = np.minimum(
+        np.trunc(columns.duration / 2).astype(np.int64) + np.trunc(columns.distance * 5).astype(np.int64),
+        MAX_WORKOUT_XP
+    )
+    np.copyto(xp, weights_xp, where=is_weights)
+    np.copyto(xp, cardio_xp, where=is_cardio)
+    np.maximum(xp, MIN_WORKOUT_XP, out=xp)
+
+    np.copyto(strength, np.minimum(exercises, 3), where=is_weights)
+    np.copyto(agility, (exercises >= 3).astype(np.int64), where=is_weights)
+    np.copyto(endurance, np.minimum(np.trunc(columns.duration / 10).astype(np.int64), 3), where=is_cardio)
+    np.copyto(agility, (columns.duration >= 20).astype(np.int64), where=is_cardio)
+
+    return {
+        "volume": np.where(is_weights, volume, 0.0),
+        "xp": xp,
+        "strength": strength,
+        "endurance": endurance,
+        "agility": agility,
+    }
+
+
+def per_user(columns: WorkoutColumns, values: np.ndarray) -> np.ndarray:
+    """Sum a per-workout column for each user in columns.user_ids"""
+    return np.bincount(columns.user, weights=values, minlength=len(columns.user_ids))
+
@@ -64,9 +64,20 @@ const AuthProvider = ({ children }) => {
     if (token && savedUser) {
       setUser(JSON.parse(savedUser));
       api.get("/auth/me")
-        .then(res => {
-          setUser(res.data);
-          localStorage.setItem("user", JSON.stringify(res.data));
+        .then(async res => {
+          let me = res.data;
+          // Streaks count days in the user's local time zone
+          const timezone = Intl.DateTimeFormat().resolvedOptions().timeZone;
+          if (timezone && me.timezone !== timezone) {
+            try {
+              const update = await api.put("/auth/me/timezone", { timezone });
+              me = { ...me, ...update.data };
+            } catch (e) {
+              console.error("Failed to update time zone", e);
+            }
+          }
+          setUser(me);
+          localStorage.setItem("user", JSON.stringify(me));
         })
         .catch(() => {
           localStorage.removeItem("token");
@@ -29,7 +29,7 @@ export default function Dashboard() {
   const loadDashboardData = async () => {
     try {
       const [workoutsRes, questsRes] = await Promise.all([
-        api.get("/workouts?limit=5"),
+        api.get("/workouts?limit=5&view=summary"),
         api.get("/quests")
       ]);
       setRecentWorkouts(workoutsRes.data);
@@ -135,6 +135,24 @@ export default function Dashboard() {
           </Card>
         </div>
 
+        {/* Streaks */}
+        <div className="grid grid-cols-2 gap-3 mb-6">
+          {[["daily", "Day Streak"], ["weekly", "Week Streak"]].map(([kind, label]) => (
+            <Card key={kind} className="card-elevated">
+              <CardContent className="p-4">
+                <div className="flex items-center gap-2 mb-2">
+                  <Flame className={`w-4 h-4 ${user?.streaks?.[kind]?.active ? "text-[#ff4444]" : "text-[#808080]"}`} />
+                  <p className="text-xs text-[#b3b3b3] font-medium">{label}</p>
+                </div>
+                <p className="text-2xl font-bold text-white" data-testid={`${kind}-streak`}>
+                  {user?.streaks?.[kind]?.current ?? 0}
+                </p>
+                <p className="text-xs text-[#808080]">Best: {user?.streaks?.[kind]?.longest ?? 0}</p>
+              </CardContent>
+            </Card>
+          ))}
+        </div>
+
         {/* Quick Actions */}
         <div className="grid md:grid-cols-3 gap-3 mb-6">
           <div 
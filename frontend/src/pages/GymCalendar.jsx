@@ -1,6 +1,6 @@
 import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
-import { api } from "@/App";
+import { api, useAuth } from "@/App";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { 
@@ -16,23 +16,35 @@ import Navbar from "@/components/Navbar";
 
 export default function GymCalendar() {
   const navigate = useNavigate();
-  const [workouts, setWorkouts] = useState([]);
+  const { user } = useAuth();
+  const [calendarDays, setCalendarDays] = useState({});
   const [loading, setLoading] = useState(true);
   const [currentDate, setCurrentDate] = useState(new Date());
   const [stats, setStats] = useState(null);
 
   useEffect(() => {
-    loadData();
+    api.get("/workouts/stats")
+      .then(res => setStats(res.data))
+      .catch(error => console.error("Failed to load workout stats", error));
   }, []);
 
-  const loadData = async () => {
+  useEffect(() => {
+    loadMonth(currentDate);
+  }, [currentDate]);
+
+  // Days are bucketed in the user's saved time zone, like streaks and quests
+  const loadMonth = async (date) => {
     try {
-      const [workoutsRes, statsRes] = await Promise.all([
-        api.get("/workouts?limit=365"),
-        api.get("/workouts/stats")
-      ]);
-      setWorkouts(workoutsRes.data);
-      setStats(statsRes.data);
+      const res = await api.get("/workouts/calendar", {
+        params: {
+          start: dateKey(new Date(date.getFullYear(), date.getMonth(), 1)),
+          end: dateKey(new Date(date.getFullYear(), date.getMonth() + 1, 0))
+        }
+      });
+      setCalendarDays(prev => res.data.days.reduce((acc, day) => {
+        acc[day.date] = day;
+        return acc;
+      }, { ...prev }));
     } catch (error) {
       console.error("Failed to load calendar data", error);
     } finally {
@@ -40,15 +52,12 @@ export default function GymCalendar() {
     }
   };
 
-  // Get workout dates
-  const workoutDates = workouts.reduce((acc, workout) => {
-    const date = new Date(workout.created_at).toDateString();
-    if (!acc[date]) {
-      acc[date] = [];
-    }
-    acc[date].push(workout);
-    return acc;
-  }, {});
+  // Calendar days are keyed by local date (YYYY-MM-DD)
+  const dateKey = (date) => {
+    const month = String(date.getMonth() + 1).padStart(2, "0");
+    const day = String(date.getDate()).padStart(2, "0");
+    return `${date.getFullYear()}-${month}-${day}`;
+  };
 
   // Calendar helpers
   const getDaysInMonth = (date) => {
@@ -74,59 +83,25 @@ export default function GymCalendar() {
 
   const hasWorkout = (day) => {
     const date = new Date(currentDate.getFullYear(), currentDate.getMonth(), day);
-    return workoutDates[date.toDateString()];
+    return calendarDays[dateKey(date)];
   };
 
   const getWorkoutTypes = (day) => {
     const date = new Date(currentDate.getFullYear(), currentDate.getMonth(), day);
-    const dayWorkouts = workoutDates[date.toDateString()] || [];
-    const types = { 
+    const dayStats = calendarDays[dateKey(date)];
+    return { 
       weightlifting: 0, 
       cardio: 0,
       push: 0,
       pull: 0,
       legs: 0,
-      full: 0
+      full: 0,
+      ...(dayStats?.types || {}),
+      ...(dayStats?.categories || {})
     };
-    dayWorkouts.forEach(w => {
-      types[w.workout_type]++;
-      if (w.session_category) {
-        types[w.session_category]++;
-      }
-    });
-    return types;
-  };
-
-  // Calculate streak
-  const calculateStreak = () => {
-    const sortedDates = Object.keys(workoutDates)
-      .map(d => new Date(d))
-      .sort((a, b) => b - a);
-    
-    if (sortedDates.length === 0) return 0;
-    
-    let streak = 0;
-    const today = new Date();
-    today.setHours(0, 0, 0, 0);
-    
-    for (let date of sortedDates) {
-      const expectedDate = new Date(today);
-      expectedDate.setDate(expectedDate.getDate() - streak);
-      expectedDate.setHours(0, 0, 0, 0);
-      
-      date.setHours(0, 0, 0, 0);
-      
-      if (date.getTime() === expectedDate.getTime()) {
-        streak++;
-      } else {
-        break;
-      }
-    }
-    
-    return streak;
   };
 
-  const currentStreak = calculateStreak();
+  const currentStreak = user?.streaks?.daily?.current ?? 0;
 
   const daysInMonth = getDaysInMonth(currentDate);
   const firstDay = getFirstDayOfMonth(currentDate);
@@ -176,9 +151,9 @@ export default function GymCalendar() {
             <CardContent className="p-4">
               <div className="flex items-center gap-2 mb-1">
                 <Trophy className="w-4 h-4 text-[#00d9ff]" />
-                <p className="text-xs text-[#b3b3b3]">Total Days</p>
+                <p className="text-xs text-[#b3b3b3]">Days this month</p>
               </div>
-              <p className="text-2xl font-bold text-[#00d9ff]">{Object.keys(workoutDates).length}</p>
+              <p className="text-2xl font-bold text-[#00d9ff]">{days.filter(day => hasWorkout(day)).length}</p>
             </CardContent>
           </Card>
 
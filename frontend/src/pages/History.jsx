@@ -22,6 +22,8 @@ export default function History() {
   const navigate = useNavigate();
   const [workouts, setWorkouts] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [expandedId, setExpandedId] = useState(null);
   const [editingId, setEditingId] = useState(null);
   const [editNotes, setEditNotes] = useState("");
@@ -34,6 +36,7 @@ export default function History() {
     try {
       const response = await api.get("/workouts?limit=50");
       setWorkouts(response.data);
+      setNextCursor(response.headers["x-next-cursor"] || null);
     } catch (error) {
       console.error("Failed to load workouts", error);
     } finally {
@@ -41,6 +44,20 @@ export default function History() {
     }
   };
 
+  const loadMoreWorkouts = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await api.get("/workouts", { params: { limit: 50, cursor: nextCursor } });
+      setWorkouts(prev => [...prev, ...response.data]);
+      setNextCursor(response.headers["x-next-cursor"] || null);
+    } catch (error) {
+      toast.error("Failed to load more workouts");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const toggleExpand = (id) => {
     setExpandedId(expandedId === id ? null : id);
   };
@@ -307,6 +324,19 @@ export default function History() {
                 </div>
               </div>
             ))}
+            {nextCursor && (
+              <div className="flex justify-center">
+                <Button
+                  onClick={loadMoreWorkouts}
+                  disabled={loadingMore}
+                  variant="outline"
+                  className="border-[#333333] text-[#b3b3b3] hover:bg-[#262626] hover:text-white"
+                  data-testid="load-more-workouts-btn"
+                >
+                  {loadingMore ? "Loading..." : "Load More"}
+                </Button>
+              </div>
+            )}
           </div>
         )}
       </main>
@@ -1,7 +1,6 @@
 import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import { api } from "@/App";
-import { toast } from "sonner";
 import { Card, CardContent } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { 
@@ -9,9 +8,7 @@ import {
   ArrowLeft, 
   Clock,
   Calendar,
-  RefreshCw,
-  Check,
-  Loader2
+  Check
 } from "lucide-react";
 import Navbar from "@/components/Navbar";
 
@@ -19,7 +16,6 @@ export default function Quests() {
   const navigate = useNavigate();
   const [quests, setQuests] = useState([]);
   const [loading, setLoading] = useState(true);
-  const [refreshing, setRefreshing] = useState(false);
 
   useEffect(() => {
     loadQuests();
@@ -36,19 +32,6 @@ export default function Quests() {
     }
   };
 
-  const refreshQuests = async () => {
-    setRefreshing(true);
-    try {
-      await api.post("/quests/refresh");
-      await loadQuests();
-      toast.success("Quests refreshed!");
-    } catch (error) {
-      toast.error("Failed to refresh quests");
-    } finally {
-      setRefreshing(false);
-    }
-  };
-
   const dailyQuests = quests.filter(q => q.quest_type === "daily");
   const weeklyQuests = quests.filter(q => q.quest_type === "weekly");
 
@@ -167,20 +150,6 @@ export default function Quests() {
               <p className="text-[#b3b3b3] text-sm">Complete challenges for bonus XP</p>
             </div>
           </div>
-          <Button
-            variant="outline"
-            className="border-[#00d9ff]/30 text-[#00d9ff] hover:bg-[#00d9ff]/10 hover:border-[#00d9ff]"
-            onClick={refreshQuests}
-            disabled={refreshing}
-            data-testid="refresh-quests-btn"
-          >
-            {refreshing ? (
-              <Loader2 className="w-4 h-4 mr-2 animate-spin" />
-            ) : (
-              <RefreshCw className="w-4 h-4 mr-2" />
-            )}
-            Refresh
-          </Button>
         </div>
 
         {/* Daily Quests */}
@@ -192,7 +161,7 @@ export default function Quests() {
           {dailyQuests.length === 0 ? (
             <Card className="bg-[#1a1a1a] border-[#333333]">
               <CardContent className="p-6 text-center text-[#808080]">
-                No daily quests available. Click refresh to get new quests!
+                No daily quests available.
               </CardContent>
             </Card>
           ) : (
@@ -213,7 +182,7 @@ export default function Quests() {
           {weeklyQuests.length === 0 ? (
             <Card className="bg-[#1a1a1a] border-[#333333]">
               <CardContent className="p-6 text-center text-[#808080]">
-                No weekly quests available. Click refresh to get new quests!
+                No weekly quests available.
               </CardContent>
             </Card>
           ) : (
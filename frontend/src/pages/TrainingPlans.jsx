@@ -21,6 +21,9 @@ import {
 } from "lucide-react";
 import Navbar from "@/components/Navbar";
 
+const IMPORT_POLL_INTERVAL_MS = 1500;
+const IMPORT_POLL_MAX_ATTEMPTS = 120;
+
 export default function TrainingPlans() {
   const navigate = useNavigate();
   const [plans, setPlans] = useState([]);
@@ -71,6 +74,21 @@ export default function TrainingPlans() {
     }
   };
 
+  // Imports run in the background; poll the job until it finishes
+  const waitForImportJob = async (jobId) => {
+    for (let attempt = 0; attempt < IMPORT_POLL_MAX_ATTEMPTS; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, IMPORT_POLL_INTERVAL_MS));
+      const { data: job } = await api.get(`/plans/import/${jobId}`);
+      if (job.status === "completed") {
+        return job;
+      }
+      if (job.status === "failed") {
+        throw { response: { data: { detail: job.error } } };
+      }
+    }
+    throw { response: { data: { detail: "Import is taking longer than expected, check back shortly" } } };
+  };
+
   const uploadFile = async (file) => {
     const allowedTypes = ['application/pdf', 'image/jpeg', 'image/png', 'image/jpg', 'image/webp', 'text/plain'];
     
@@ -92,11 +110,15 @@ export default function TrainingPlans() {
       const response = await api.post("/plans/import", formData, {
         headers: { 'Content-Type': 'multipart/form-data' }
       });
+      // Files imported before come back completed straight from the plan cache
+      const job = response.data.status === "completed"
+        ? response.data
+        : await waitForImportJob(response.data.job_id);
       
       toast.success(
         <div>
           <p className="font-semibold">Plan Imported!</p>
-          <p className="text-sm">{response.data.plan.exercises.length} exercises extracted</p>
+          <p className="text-sm">{job.plan.exercises.length} exercises extracted</p>
         </div>
       );
       